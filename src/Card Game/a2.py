@@ -1,3 +1,6 @@
+import itertools
+import random
+from typing import Iterator
 from a2_support import *
 
 class Card():
@@ -522,7 +525,8 @@ class Player(Entity):
     discard pile(cards that have been played already this encounter).
     """
 
-    def __init__(self, max_hp: int, cards: list[Card] | None = None) -> None:
+    def __init__(self, max_hp: int, cards: list[Card] | None = None,
+                 rng: random.Random | None = None) -> None:
         """
         Initializes the player object with the deck of cards and
         energy to 3 along with regular initialization of entity class.
@@ -531,6 +535,8 @@ class Player(Entity):
         self: The player object.
         max_hp: The maximum HP the player object can have.
         cards: The deck of cards for the player.
+        rng: The game's random generator, used to draw cards. If None,
+        DEFAULT_RNG is used.
 
         Returns:
         None.
@@ -538,6 +544,7 @@ class Player(Entity):
         
         super().__init__(max_hp)
         self._energy = 3
+        self._rng = rng
 
         self._deck = []
         if cards != None and len(cards) > 0:
@@ -643,7 +650,7 @@ class Player(Entity):
         """
 
         super().new_turn()
-        draw_cards(self._deck, self._hand, self._discarded)
+        draw_cards(self._deck, self._hand, self._discarded, self._rng)
         self._energy = 3
 
     def play_card(self, card_name: str) -> Card | None:
@@ -681,20 +688,21 @@ class IronClad(Player):
     contains 5 Strike cards, 4 Defend cards, and 1 Bash card.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rng: random.Random | None = None) -> None:
         """
         Initializes the IronClad player object with 5 Strike cards,
         4 Defend cards, and 1 Bash card. The max HP is 80.
 
         Parameters:
         self: The IronClad object.
+        rng: The game's random generator, used to draw cards.
 
         Returns:
         None.
         """
         
         cards = generate_player_cards(self.get_name())
-        super().__init__(80, cards)
+        super().__init__(80, cards, rng)
 
     def __repr__(self) -> str:
         return f"{self.get_name()}()"
@@ -706,7 +714,7 @@ class Silent(Player):
     1 Survivor card.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rng: random.Random | None = None) -> None:
         """
         Initializes the Silent player object with 5 Strike cards,
         5 Defend cards, 1 Neutralize card, and 1 Survivor card.
@@ -714,13 +722,14 @@ class Silent(Player):
 
         Parameters:
         self: The Silent object.
+        rng: The game's random generator, used to draw cards.
 
         Returns:
         None.
         """
         
         cards = generate_player_cards(self.get_name())
-        super().__init__(70, cards)
+        super().__init__(70, cards, rng)
 
     def __repr__(self) -> str:
         return f"{self.get_name()}()"
@@ -732,7 +741,7 @@ class Watcher(Player):
     1 Vigilance card.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rng: random.Random | None = None) -> None:
         """
         Initializes the Watcher player object with 4 Strike cards,
         4 Defend cards, 1 Eruption card, and 1 Vigilance card.
@@ -740,13 +749,14 @@ class Watcher(Player):
 
         Parameters:
         self: The Watcher object.
+        rng: The game's random generator, used to draw cards.
 
         Returns:
         None.
         """
         
         cards = generate_player_cards(self.get_name())
-        super().__init__(72, cards)
+        super().__init__(72, cards, rng)
 
     def __repr__(self) -> str:
         return f"{self.get_name()}()"
@@ -762,13 +772,15 @@ class Monster(Entity):
 
     unique_id = 0
 
-    def __init__(self, max_hp: int) -> None:
+    def __init__(self, max_hp: int, monster_id: int | None = None) -> None:
         """
         Initializes the monster object with regular entity class.
 
         Parameters:
         self: The monster object.
         max_hp: The maximum HP the monster object can have.
+        monster_id: The monster's id, from its game's allocator. If None,
+        the next id shared by every game is used.
 
         Returns:
         None.
@@ -776,8 +788,10 @@ class Monster(Entity):
         
         super().__init__(max_hp)
 
-        self._monster_id = Monster.unique_id
-        Monster.unique_id += 1
+        if monster_id is None:
+            monster_id = Monster.unique_id
+            Monster.unique_id += 1
+        self._monster_id = monster_id
 
     def get_id(self) -> int:
         """
@@ -812,20 +826,24 @@ class Louse(Monster):
     Louse is a monster object which has only one action defined - damage.
     """
 
-    def __init__(self, max_hp: int) -> None:
+    def __init__(self, max_hp: int, monster_id: int | None = None,
+                 rng: random.Random | None = None) -> None:
         """
         Initializes the louse object with regular monster class.
 
         Parameters:
         self: The louse object.
         max_hp: The maximum HP the louse object can have.
+        monster_id: The louse's id (see Monster).
+        rng: The game's random generator, used to choose the louse's
+        damage. If None, DEFAULT_RNG is used.
 
         Returns:
         None.
         """
         
-        super().__init__(max_hp)
-        self._amount = random_louse_amount()
+        super().__init__(max_hp, monster_id)
+        self._amount = random_louse_amount(rng)
 
     def action(self) -> dict[str, int]:
         """
@@ -848,19 +866,20 @@ class Cultist(Monster):
     and weak.
     """
 
-    def __init__(self, max_hp: int) -> None:
+    def __init__(self, max_hp: int, monster_id: int | None = None) -> None:
         """
         Initializes the cultist object with regular monster class.
 
         Parameters:
         self: The cultist object.
         max_hp: The maximum HP the cultist object can have.
+        monster_id: The cultist's id (see Monster).
 
         Returns:
         None.
         """
         
-        super().__init__(max_hp)
+        super().__init__(max_hp, monster_id)
         self._damage_amount = 0
         self._weak_amount = False
 
@@ -891,19 +910,20 @@ class JawWorm(Monster):
     JawWorm is a monster object which has only one action - damage.
     """
 
-    def __init__(self, max_hp: int) -> None:
+    def __init__(self, max_hp: int, monster_id: int | None = None) -> None:
         """
         Initializes the JawWorm object with regular monster class.
 
         Parameters:
         self: The JawWorm object.
         max_hp: The maximum HP the JawWorm object can have.
+        monster_id: The JawWorm's id (see Monster).
 
         Returns:
         None.
         """
         
-        super().__init__(max_hp)
+        super().__init__(max_hp, monster_id)
 
     def action(self) -> dict[str, int]:
         """
@@ -936,7 +956,9 @@ class Encounter():
     facilitates the interactions between the player and monsters.
     """
 
-    def __init__(self, player: Player, monsters: list[tuple[str,int]]) -> None:
+    def __init__(self, player: Player, monsters: list[tuple[str,int]],
+                 rng: random.Random | None = None,
+                 monster_ids: Iterator[int] | None = None) -> None:
         """
         The initializer for an encounter takes the player instance, as
         well as a list of tuples describing the monsters in the encounter.
@@ -947,6 +969,11 @@ class Encounter():
         self: The encounter class object.
         player: The player object.
         monsters: 1 to 3 monsters that player needs to defeat.
+        rng: The game's random generator, used by the monsters. If None,
+        DEFAULT_RNG is used.
+        monster_ids: The game's monster id allocator, such as
+        itertools.count(), shared by the encounters of one game. If None,
+        ids are shared by every game.
 
         Returns:
         None.
@@ -958,14 +985,15 @@ class Encounter():
         self._monsters = []
         for monster_info in monsters:
             monster_name, monster_max_hp = monster_info
+            monster_id = None if monster_ids is None else next(monster_ids)
 
             monster = None
             if monster_name == "Louse":
-                monster = Louse(monster_max_hp)
+                monster = Louse(monster_max_hp, monster_id, rng)
             elif monster_name == "Cultist":
-                monster = Cultist(monster_max_hp)
+                monster = Cultist(monster_max_hp, monster_id)
             elif monster_name == "JawWorm":
-                monster = JawWorm(monster_max_hp)
+                monster = JawWorm(monster_max_hp, monster_id)
             self._monsters.append(monster)
 
         self._player.start_new_encounter()
@@ -1041,6 +1069,7 @@ class Encounter():
 
         return self._monsters != None and len(self._monsters) > 0
 
+    @traced('Encounter.player_apply_card')
     def player_apply_card(self, card_name: str,
                           target_id: int | None = None) -> bool:
         """
@@ -1130,6 +1159,7 @@ class Encounter():
         
         return True
 
+    @traced('Encounter.enemy_turn')
     def enemy_turn(self) -> None:
         """
         This method attempts to allow all remaining monsters in the
@@ -1246,14 +1276,17 @@ def main():
     None.
     """
 
+    rng = random.Random(GAME_SEED)
+    monster_ids = itertools.count()
+
     player = None
     player_type = input("Enter a player type: ")
     if player_type == "ironclad":
-        player = IronClad()
+        player = IronClad(rng)
     elif player_type == "silent":
-        player = Silent()
+        player = Silent(rng)
     elif player_type == "watcher":
-        player = Watcher()
+        player = Watcher(rng)
 
     game_file_name = input("Enter a game file: ")
     encounters = read_game_file(game_file_name)
@@ -1261,7 +1294,7 @@ def main():
     player_lost = False
     for encounter in encounters:
         if not player_lost:
-            encounter_obj = Encounter(player, encounter)
+            encounter_obj = Encounter(player, encounter, rng, monster_ids)
             print("New encounter!\n")
             display_encounter(encounter_obj)
 
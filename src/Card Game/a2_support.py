@@ -1,5 +1,11 @@
 import random
-random.seed(10012023)
+from tracing import traced
+
+# The seed of the game played from main, and the generator used by anything
+# not given its own. Games that must be reproducible independently of each
+# other, such as simulated ones, each use their own random.Random.
+GAME_SEED = 10012023
+DEFAULT_RNG = random.Random(GAME_SEED)
 
 ENCOUNTER_WIN_MESSAGE = '\nYou have won the encounter!\n'
 GAME_WIN_MESSAGE = '\nYou have won the game!\n'
@@ -53,27 +59,36 @@ def read_game_file(filename: str) -> list[list[tuple[str, int]]]:
 
     return encounters
 
-def select_cards(cards: list, amount: int) -> list['Card']:
+def select_cards(
+    cards: list,
+    amount: int,
+    rng: random.Random | None = None
+) -> list['Card']:
     """ Selects an amount of cards from the cards list, removes those cards from
         the original cards list, and returns the selected cards.
     
         Parameters:
             cards (list): The list of cards to select from.
             amount (int): The amount of cards to select.
+            rng (random.Random | None): The generator to select with, or None
+                                        for DEFAULT_RNG.
         
         Returns:
             list[Card]: The selected cards.
     """
-    selected_indices = random.sample(range(len(cards)), k=amount)
+    rng = DEFAULT_RNG if rng is None else rng
+    selected_indices = rng.sample(range(len(cards)), k=amount)
     selected_cards = [cards[i] for i in selected_indices]
     for i in sorted(selected_indices, reverse=True):
         cards.pop(i)
     return selected_cards
 
+@traced('draw_cards')
 def draw_cards(
     deck: list['Card'],
     hand: list['Card'],
-    discarded: list['Card']
+    discarded: list['Card'],
+    rng: random.Random | None = None
 ) -> None:
     """ Handles drawing cards from the deck to the hand at the beginning of a
         turn.
@@ -83,6 +98,8 @@ def draw_cards(
             hand (list[Card]): The hand to draw into.
             discard (list[Card]): The discard pile used to replenish the deck if
                                   there aren't enough cards available.
+            rng (random.Random | None): The generator to draw with, or None
+                                        for DEFAULT_RNG.
     """
     hand.clear()
     if len(deck) < 5:
@@ -90,8 +107,10 @@ def draw_cards(
         deck.clear()
         deck.extend(discarded)
         discarded.clear()
-    hand.extend(select_cards(deck, 5 - len(hand)))
+    hand.extend(select_cards(deck, 5 - len(hand), rng))
 
-def random_louse_amount() -> int:
-    """ (int) Returns a random amount of damage for a louse to give. """
-    return random.randint(5, 7)
+def random_louse_amount(rng: random.Random | None = None) -> int:
+    """ (int) Returns a random amount of damage for a louse to give, drawn
+        from rng (DEFAULT_RNG if None).
+    """
+    return (DEFAULT_RNG if rng is None else rng).randint(5, 7)
@@ -0,0 +1,341 @@
+import argparse
+import itertools
+import math
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from a2 import *
+
+# The number of games simulated by default, the number of games each worker
+# process is given at a time, and the most turns an encounter may last
+# before the game counts as lost
+SIMULATION_GAMES = 10_000
+SIMULATION_CHUNK = 250
+SIMULATION_MAX_TURNS = 100
+
+# The z-score of the confidence intervals reported (95%)
+CONFIDENCE_Z = 1.96
+
+PLAYER_TYPES = {'ironclad': IronClad, 'silent': Silent, 'watcher': Watcher}
+
+# A policy chooses the player's next move in an encounter: the name of a card
+# to play and the id of its target (None if it needs none), or None to end
+# the turn. It must be a module-level function, to be sent to workers, and
+# draw any randomness from the game's generator it is given.
+Policy = Callable[[Encounter, random.Random],
+                  Optional[tuple[str, Optional[int]]]]
+
+def _playable(encounter: Encounter) -> list[Card]:
+    """ Returns the cards in the player's hand they have the energy to play.
+    """
+    energy = encounter.get_player().get_energy()
+    return [card for card in encounter.get_player().get_hand()
+            if card.get_energy_cost() <= energy]
+
+# The value greedy_policy puts on each card type, worked out when first seen
+_CARD_VALUES = {}
+
+def _card_value(card: Card) -> float:
+    """ Returns the damage, block and status effects a card gives per energy,
+        with free cards valued highest.
+    """
+    value = _CARD_VALUES.get(type(card))
+    if value is None:
+        value = _CARD_VALUES[type(card)] = (
+            card.get_damage_amount() + card.get_block()
+            + 4 * sum(card.get_status_modifiers().values())
+        ) / max(card.get_energy_cost(), 0.5)
+    return value
+
+def greedy_policy(
+    encounter: Encounter,
+    rng: random.Random
+) -> Optional[tuple[str, Optional[int]]]:
+    """ Plays the affordable card with the most damage, block and status
+        effects per energy, free cards first, at the monster closest to
+        defeat.
+
+        Parameters:
+            encounter (Encounter): The encounter to move in.
+            rng (random.Random): Unused; policies may use it to choose.
+
+        Returns:
+            tuple[str, int | None] | None: The move, or None to end the turn.
+    """
+    cards = _playable(encounter)
+    if not cards:
+        return None
+    target = min(encounter.get_monsters(),
+                 key=lambda monster: monster.get_hp() + monster.get_block())
+    card = max(cards, key=_card_value)
+    return card.get_name(), target.get_id() if card.requires_target() else None
+
+def random_policy(
+    encounter: Encounter,
+    rng: random.Random
+) -> Optional[tuple[str, Optional[int]]]:
+    """ Plays a random affordable card at a random monster.
+
+        Parameters:
+            encounter (Encounter): The encounter to move in.
+            rng (random.Random): The generator choosing the move.
+
+        Returns:
+            tuple[str, int | None] | None: The move, or None to end the turn.
+    """
+    cards = _playable(encounter)
+    if not cards:
+        return None
+    card = rng.choice(cards)
+    target = rng.choice(encounter.get_monsters())
+    return card.get_name(), target.get_id() if card.requires_target() else None
+
+POLICIES = {'greedy': greedy_policy, 'random': random_policy}
+
+def play_game(
+    player_type: type,
+    encounters: list[list[tuple[str, int]]],
+    policy: Policy,
+    seed: int,
+    max_turns: int = SIMULATION_MAX_TURNS
+) -> dict:
+    """ Plays one game to the end without input or output, with the policy
+        choosing every move. When an encounter is won, the player's turn is
+        ended, so their hand goes back to the discard pile as it does at the
+        end of any turn.
+
+        Parameters:
+            player_type (type): The player class, e.g. IronClad.
+            encounters (list): The monsters of each encounter, as from
+                               read_game_file.
+            policy (Policy): Chooses the player's moves.
+            seed (int): Seeds the game's own generator, which draws its cards,
+                        rolls its monsters and is given to the policy.
+            max_turns (int): The most turns an encounter may last before the
+                             game counts as lost.
+
+        Returns:
+            dict: Whether the game was won, the player turns taken, the
+                  player's HP left, the encounters won, and a Counter of the
+                  cards played by name.
+    """
+    rng = random.Random(seed)
+    monster_ids = itertools.count()
+    player = player_type(rng)
+    turns = cleared = 0
+    played = Counter()
+    won = True
+    for monsters in encounters:
+        encounter = Encounter(player, monsters, rng, monster_ids)
+        encounter_turns = 1
+        while encounter.is_active():
+            move = policy(encounter, rng)
+            if move is not None and encounter.player_apply_card(*move):
+                played[move[0]] += 1
+                continue
+            encounter.end_player_turn()
+            encounter.enemy_turn()
+            if player.is_defeated() or encounter_turns >= max_turns:
+                won = False
+                break
+            encounter_turns += 1
+        turns += encounter_turns
+        if not won:
+            break
+        cleared += 1
+        player.end_turn()
+    return {'won': won, 'turns': turns, 'hp': player.get_hp(),
+            'cleared': cleared, 'cards': played}
+
+class SimulationStats():
+    """ Totals of the results of many games, which can be merged across
+        workers.
+    """
+
+    def __init__(self) -> None:
+        """ Sets up empty totals. """
+        self.games = self.wins = self.cleared = 0
+        self.turns = [0, 0.0, 0.0]
+        self.win_turns = [0, 0.0, 0.0]
+        self.win_hp = [0, 0.0, 0.0]
+        self.cards = Counter()
+
+    @staticmethod
+    def _add_sample(totals: list, value: float) -> None:
+        """ Adds a value to [count, sum, sum of squares] totals. """
+        totals[0] += 1
+        totals[1] += value
+        totals[2] += value * value
+
+    def add(self, result: dict) -> None:
+        """ Adds the result of one game from play_game. """
+        self.games += 1
+        self.cleared += result['cleared']
+        self._add_sample(self.turns, result['turns'])
+        if result['won']:
+            self.wins += 1
+            self._add_sample(self.win_turns, result['turns'])
+            self._add_sample(self.win_hp, result['hp'])
+        self.cards.update(result['cards'])
+
+    def merge(self, other: 'SimulationStats') -> None:
+        """ Adds the totals of other to these totals. """
+        self.games += other.games
+        self.wins += other.wins
+        self.cleared += other.cleared
+        for mine, theirs in ((self.turns, other.turns),
+                             (self.win_turns, other.win_turns),
+                             (self.win_hp, other.win_hp)):
+            for index in range(3):
+                mine[index] += theirs[index]
+        self.cards.update(other.cards)
+
+    def win_rate(self, z: float = CONFIDENCE_Z) -> tuple[float, float, float]:
+        """ Returns the win rate and the low and high ends of its Wilson score
+            confidence interval.
+        """
+        if self.games == 0:
+            return 0.0, 0.0, 1.0
+        n, rate = self.games, self.wins / self.games
+        centre = (rate + z * z / (2 * n)) / (1 + z * z / n)
+        margin = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) \
+            / (1 + z * z / n)
+        return rate, max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+    @staticmethod
+    def mean(
+        totals: list,
+        z: float = CONFIDENCE_Z
+    ) -> tuple[float, float] | None:
+        """ Returns the mean of [count, sum, sum of squares] totals and the half
+            width of its confidence interval, or None if there are no samples.
+        """
+        count, total, squares = totals
+        if count == 0:
+            return None
+        mean = total / count
+        if count < 2:
+            return mean, math.inf
+        variance = max(squares - count * mean * mean, 0.0) / (count - 1)
+        return mean, z * math.sqrt(variance / count)
+
+    def summary(self) -> dict:
+        """ Returns the win rate, mean turns and HP with their confidence
+            intervals, the mean encounters won, and the cards played per game.
+        """
+        games = max(self.games, 1)
+        return {
+            'games': self.games,
+            'win_rate': self.win_rate(),
+            'turns': self.mean(self.turns),
+            'turns_to_win': self.mean(self.win_turns),
+            'hp_remaining': self.mean(self.win_hp),
+            'encounters_won': self.cleared / games,
+            'cards_per_game': {name: count / games for name, count
+                               in self.cards.most_common()},
+        }
+
+def _run_games(
+    player_type: type,
+    encounters: list[list[tuple[str, int]]],
+    policy: Policy,
+    seeds: range,
+    max_turns: int
+) -> SimulationStats:
+    """ Plays a game for each seed, in a worker process. """
+    stats = SimulationStats()
+    for seed in seeds:
+        stats.add(play_game(player_type, encounters, policy, seed, max_turns))
+    return stats
+
+def simulate(
+    player_type: type,
+    encounters: list[list[tuple[str, int]]],
+    games: int = SIMULATION_GAMES,
+    policy: Policy = greedy_policy,
+    seed: int = 0,
+    workers: int | None = None,
+    max_turns: int = SIMULATION_MAX_TURNS,
+    chunk: int = SIMULATION_CHUNK
+) -> SimulationStats:
+    """ Plays many games across a pool of worker processes, game i with seed
+        seed + i, and returns their totals.
+
+        Parameters:
+            player_type (type): The player class, e.g. IronClad.
+            encounters (list): The monsters of each encounter, as from
+                               read_game_file.
+            games (int): The number of games to play.
+            policy (Policy): Chooses the player's moves.
+            seed (int): The seed of the first game.
+            workers (int | None): The number of worker processes, None for one
+                                  per CPU, or 0 to play in this process.
+            max_turns (int): The most turns an encounter may last.
+            chunk (int): The number of games given to a worker at a time.
+    """
+    seeds = [range(start, min(start + chunk, seed + games))
+             for start in range(seed, seed + games, chunk)]
+    stats = SimulationStats()
+    if workers == 0:
+        for chunk_seeds in seeds:
+            stats.merge(_run_games(player_type, encounters, policy,
+                                   chunk_seeds, max_turns))
+        return stats
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_run_games, player_type, encounters,
+                                   policy, chunk_seeds, max_turns)
+                   for chunk_seeds in seeds]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+def format_summary(name: str, summary: dict, seconds: float) -> str:
+    """ Returns a simulation summary from SimulationStats.summary as text. """
+    def interval(value: tuple[float, float] | None) -> str:
+        return '-' if value is None else f'{value[0]:.2f} ± {value[1]:.2f}'
+
+    rate, low, high = summary['win_rate']
+    lines = [
+        f'{name}: {summary["games"]:,} games in {seconds:.2f} s '
+        f'({summary["games"] / seconds:,.0f} games/s)',
+        f'  win rate        {rate:.1%} ({low:.1%} - {high:.1%})',
+        f'  turns to win    {interval(summary["turns_to_win"])}',
+        f'  HP remaining    {interval(summary["hp_remaining"])}',
+        f'  encounters won  {summary["encounters_won"]:.2f}',
+        '  cards per game  ' + ', '.join(
+            f'{card} {count:.1f}'
+            for card, count in summary['cards_per_game'].items()),
+    ]
+    return '\n'.join(lines)
+
+def main() -> None:
+    """ Estimates each player type's chances against a game file. """
+    parser = argparse.ArgumentParser(
+        description='Simulate games against a game file without input.')
+    parser.add_argument('game_file', help='the game file to play')
+    parser.add_argument('--players', nargs='+', choices=PLAYER_TYPES,
+                        default=list(PLAYER_TYPES))
+    parser.add_argument('--policy', choices=POLICIES, default='greedy')
+    parser.add_argument('--games', type=int, default=SIMULATION_GAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int,
+                        help='worker processes (default: one per CPU, '
+                             '0 to play in this process)')
+    parser.add_argument('--max-turns', type=int,
+                        default=SIMULATION_MAX_TURNS)
+    args = parser.parse_args()
+
+    encounters = read_game_file(args.game_file)
+    for name in args.players:
+        start = time.perf_counter()
+        stats = simulate(PLAYER_TYPES[name], encounters, args.games,
+                         POLICIES[args.policy], args.seed, args.workers,
+                         args.max_turns)
+        print(format_summary(name, stats.summary(),
+                             time.perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
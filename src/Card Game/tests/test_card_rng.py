@@ -0,0 +1,65 @@
+import ast
+import itertools
+import os
+import random
+import subprocess
+import sys
+
+import a2
+from a2 import *
+
+
+def _start(seed):
+    rng = random.Random(seed)
+    player = Silent(rng)
+    encounter = Encounter(player, [('Louse', 20), ('Louse', 20)], rng,
+                          itertools.count())
+    return player, encounter
+
+
+def _state(player, encounter):
+    return ([repr(card) for card in player.get_hand()],
+            [(monster.get_id(), monster.action())
+             for monster in encounter.get_monsters()])
+
+
+def test_interleaved_games_with_the_same_seed_match():
+    first, second = _start(5), _start(5)
+    global_state = random.getstate()
+    for _ in range(4):
+        assert _state(*first) == _state(*second)
+        for player, encounter in (first, second):
+            encounter.end_player_turn()
+            encounter.enemy_turn()
+
+    assert first[0].get_hp() == second[0].get_hp()
+    assert random.getstate() == global_state
+
+
+def test_each_game_allocates_its_own_monster_ids():
+    ids = itertools.count()
+    player = IronClad(random.Random(1))
+    first = Encounter(player, [('Cultist', 30), ('JawWorm', 30)],
+                      monster_ids=ids)
+    second = Encounter(player, [('Louse', 10)], monster_ids=ids)
+
+    assert [monster.get_id() for monster in first.get_monsters()] == [0, 1]
+    assert second.get_monsters()[0].get_id() == 2
+    assert _start(0)[1].get_monsters()[0].get_id() == 0
+
+
+def test_default_generator_keeps_the_game_seed():
+    # A fresh process, so the default generator is as the game starts it
+    game_directory = os.path.dirname(os.path.abspath(a2.__file__))
+    script = ('import random\n'
+              'from a2_support import *\n'
+              'global_state = random.getstate()\n'
+              'cards = list(range(10))\n'
+              'print(repr((select_cards(cards, 5), len(cards), '
+              'random_louse_amount(), random.getstate() == global_state)))\n')
+    output = subprocess.run([sys.executable, '-c', script], cwd=game_directory,
+                            capture_output=True, text=True, check=True).stdout
+
+    expected = random.Random(GAME_SEED)
+    assert ast.literal_eval(output) == (
+        expected.sample(range(10), k=5), 5, expected.randint(5, 7), True)
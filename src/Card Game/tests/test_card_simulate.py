@@ -0,0 +1,42 @@
+import pytest
+
+from simulate import *
+
+GAME = [[('Louse', 11), ('Cultist', 48)], [('JawWorm', 40)]]
+
+
+def test_same_seed_plays_the_same_game():
+    first = play_game(Silent, GAME, random_policy, seed=7)
+    second = play_game(Silent, GAME, random_policy, seed=7)
+
+    assert first == second
+    assert first['turns'] >= first['cleared'] >= 0
+    assert sum(first['cards'].values()) > 0
+
+
+def test_pool_and_in_process_results_match():
+    local = simulate(Silent, GAME, games=60, workers=0, chunk=25)
+    pooled = simulate(Silent, GAME, games=60, workers=2, chunk=25)
+
+    assert pooled.summary() == local.summary()
+    assert local.games == 60
+
+
+def test_summary_reports_intervals():
+    stats = simulate(Silent, GAME, games=200, workers=0)
+    summary = stats.summary()
+
+    rate, low, high = summary['win_rate']
+    assert 0 <= low <= rate <= high <= 1
+    mean, half_width = summary['turns_to_win']
+    assert mean >= len(GAME) and half_width > 0
+    assert set(summary['cards_per_game']) <= {
+        'Strike', 'Defend', 'Neutralize', 'Survivor'}
+    assert 'win rate' in format_summary('silent', summary, 1.0)
+
+
+def test_stalled_encounters_count_as_losses():
+    result = play_game(Watcher, [[('JawWorm', 500)]], greedy_policy, seed=0,
+                       max_turns=3)
+
+    assert not result['won'] and result['turns'] <= 3
@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import a2
+
+
+def test_trace_covers_encounter_hot_paths(tmp_path):
+    path = tmp_path / 'trace.json'
+    game_directory = os.path.dirname(os.path.abspath(a2.__file__))
+    script = ('from a2 import *\n'
+              'player = IronClad()\n'
+              "encounter = Encounter(player, [('JawWorm', 40)])\n"
+              'target = encounter.get_monsters()[0].get_id()\n'
+              "encounter.player_apply_card('Strike', target)\n"
+              'encounter.end_player_turn()\n'
+              'encounter.enemy_turn()\n')
+
+    subprocess.run([sys.executable, '-c', script], cwd=game_directory,
+                   env={**os.environ, 'GAME_TRACE': str(path)}, check=True)
+
+    events = json.loads(path.read_text())['traceEvents']
+    names = [event['name'] for event in events if event['ph'] == 'B']
+    assert names == ['draw_cards', 'Encounter.player_apply_card',
+                     'Encounter.enemy_turn', 'draw_cards']
+
+
+def test_tracing_module_matches_the_farm_game_copy():
+    # Each game runs from its own directory, so each has a copy of the module.
+    game_directory = os.path.dirname(os.path.abspath(a2.__file__))
+    copies = []
+    for game in ('Card Game', 'Farm Game'):
+        with open(os.path.join(game_directory, '..', game, 'tracing.py'),
+                  'rb') as file:
+            copies.append(file.read())
+    assert copies[0] == copies[1]
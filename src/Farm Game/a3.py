@@ -1,9 +1,27 @@
+import time
+_STARTED = time.perf_counter()
+
+import sys
+import argparse
 import tkinter as tk
 from tkinter import filedialog # For masters task
+from tkinter import ttk
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Callable, Union, Optional
 from a3_support import *
 from model import *
 from constants import *
+from farm_process import FarmProcess
+from savegame import Autosaver, SaveSnapshot
+from metrics import CountingCache, FrameMetrics, StartupProfile
+from memory import AllocationTracker, format_report
+from sprites import *
+from game_loop import FixedTimestep, interpolate, move_fraction
+from tracing import traced
+import actions
+import lod
+
+_IMPORTED = time.perf_counter()
 
 class InfoBar(AbstractGrid):
     """
@@ -31,15 +49,18 @@ class InfoBar(AbstractGrid):
 
         super().__init__(self._master, dimensions, size)
 
-    def redraw(self, day: int, money: int, energy: int) -> None:
+    def redraw(self, day: int, money: int, energy: int,
+               weather: Optional[tuple[str, str]] = None) -> None:
         """
         Clears the InfoBar and redraws it to display the provided day,
-        money, and energy.
+        money, and energy, along with the season and weather if given.
 
         Parameters:
         day: Elapsed days to be shown on the InfoBar.
         money: Money the player has.
         energy: Energy left for the player.
+        weather: The (season, weather) of the day, or None if the game
+        has no weather.
 
         Returns:
         None
@@ -55,7 +76,10 @@ class InfoBar(AbstractGrid):
         self.annotate_position((0,0), "Day:", HEADING_FONT)
         self.annotate_position((0,1), "Money:", HEADING_FONT)
         self.annotate_position((0,2), "Energy:", HEADING_FONT)
-        self.annotate_position((1,0), str(self._day))
+        day_text = str(self._day)
+        if weather is not None:
+            day_text += f" ({weather[0]}, {weather[1]})"
+        self.annotate_position((1,0), day_text)
         self.annotate_position((1,1), f"${str(self._money)}")
         self.annotate_position((1,2), str(self._energy))
 
@@ -66,7 +90,8 @@ class FarmView(AbstractGrid):
     """
     
     def __init__(self, master: tk.Tk | tk.Frame, dimensions: tuple[int,int],
-                 size: tuple[int,int], **kwargs) -> None:
+                 size: tuple[int,int], lod_cell_size: int = LOD_CELL_SIZE,
+                 image_cache: Optional[dict] = None, **kwargs) -> None:
         """
         Sets up the FarmView to be an AbstractGrid with the appropriate
         dimensions and size, and creates an instance attribute of an empty
@@ -76,6 +101,9 @@ class FarmView(AbstractGrid):
         master: The master widget which can be window or frame.
         dimensions: Dimensions of the grid to be set to contain the map.
         size: The pixels size of the FarmView.
+        lod_cell_size: The cell size (in pixels) below which the farm is
+        drawn as a low-detail raster instead of sprites.
+        image_cache: The cache for sprite images, or None for a new one.
 
         Returns:
         None
@@ -84,15 +112,19 @@ class FarmView(AbstractGrid):
         self._master = master
         self._dimensions = dimensions
         self._size = size
-        self._image_cache = {}
+        self._image_cache = {} if image_cache is None else image_cache
+        self._lod_cell_size = lod_cell_size
+        self.reset_low_detail()
 
         super().__init__(self._master, self._dimensions, self._size)
 
+    @traced("FarmView.redraw")
     def redraw(self, ground: list[str], plants: dict[tuple[int,int], 'Plant'],
-               playerposition: tuple[int,int], playerdirection: str) -> None:
+               playerposition: tuple[int,int], playerdirection: str,
+               devices: Optional[dict[tuple[int,int], str]] = None) -> None:
         """
         Clears the farmview, then creates the images for the ground,
-        then the plants, then the player.
+        then the plants, then the devices, then the player.
 
         Parameters:
         ground: The map that needs to be rendered.
@@ -100,12 +132,14 @@ class FarmView(AbstractGrid):
         playerposition: The position of the player on the grid
         as a tuple[int, int].
         playerdirection: The direction of the player (up, down, left, right).
+        devices: The automation devices to be labelled on the grid.
 
         Returns:
         None
         """
         
         self.clear()
+        self.reset_low_detail()
 
         cell_size = self.get_cell_size()
 
@@ -133,12 +167,150 @@ class FarmView(AbstractGrid):
             image = get_image(image_path, cell_size, self._image_cache)
             self.create_image(midpoint, image=image)
 
+        # Label the devices with the letter for their type.
+        for position, kind in (devices or {}).items():
+            self.annotate_position(position, DEVICE_LABELS[kind], DEVICE_FONT)
+
         # Render the player based on the player position and player
         # direction by getting the image and creating it on the canvas.
-        image_path = f"images/player_{playerdirection}.png"
-        midpoint = self.get_midpoint(playerposition)
-        image = get_image(image_path, cell_size, self._image_cache)
-        self.create_image(midpoint, image=image)
+        self.draw_player(playerposition, playerdirection)
+
+    def draw_player(self, playerposition: tuple[float,float],
+                    playerdirection: str) -> None:
+        """
+        Draws the player over the farm, replacing where it was drawn before.
+        The position may be between cells, while the player is moving. In
+        low-detail mode the player is drawn as an outline.
+
+        Parameters:
+        playerposition: The (row, column) of the player on the grid.
+        playerdirection: The direction of the player (up, down, left, right).
+
+        Returns:
+        None
+        """
+
+        self.delete("player")
+        row, col = playerposition
+
+        if self._lod_raster is None:
+            cell_width, cell_height = self.get_cell_size()
+            midpoint = (col * cell_width + cell_width // 2,
+                        row * cell_height + cell_height // 2)
+            image_path = f"images/player_{playerdirection}.png"
+            image = get_image(image_path, (cell_width, cell_height),
+                              self._image_cache)
+            self.create_image(midpoint, image=image, tags="player")
+            return
+
+        # Outline the player's cell, at least a few pixels wide so it
+        # stays visible however small the cells are.
+        width, height = self._size
+        rows, cols = self._dimensions
+        x_min, y_min = int(col * width / cols), int(row * height / rows)
+        x_max = max(int((col + 1) * width / cols), x_min + 3)
+        y_max = max(int((row + 1) * height / rows), y_min + 3)
+        self.create_rectangle(x_min, y_min, x_max, y_max,
+                              outline=LOD_PLAYER_COLOUR, tags="player")
+
+    def set_map(self, dimensions: tuple[int,int],
+                image_cache: Optional[dict] = None) -> None:
+        """
+        Clears the FarmView and sets it up for a map with new dimensions,
+        with a new image cache since the cell size may have changed.
+
+        Parameters:
+        dimensions: Dimensions of the grid to be set to contain the map.
+        image_cache: The cache for sprite images, or None for a new one.
+
+        Returns:
+        None
+        """
+
+        self.clear()
+        self.reset_low_detail()
+        self.set_dimensions(dimensions)
+        self._image_cache = {} if image_cache is None else image_cache
+
+    def is_low_detail(self) -> bool:
+        """
+        Returns True iff the cells are too small for sprites, so the farm
+        should be drawn with redraw_low_detail instead of redraw.
+
+        Returns:
+        Whether the FarmView is in low-detail mode.
+        """
+
+        return min(self.get_cell_size()) < self._lod_cell_size
+
+    def reset_low_detail(self) -> None:
+        """
+        Forgets the low-detail raster, so the next low-detail redraw draws
+        it from scratch. Called whenever the canvas is cleared.
+
+        Returns:
+        None
+        """
+
+        self._lod_raster = None
+        self._lod_bounds = []
+        self._lod_images = []
+
+    @traced("FarmView.redraw_low_detail")
+    def redraw_low_detail(self, tiles: np.ndarray,
+                          plant_arrays: tuple[np.ndarray, ...],
+                          playerposition: tuple[int,int],
+                          playerdirection: str,
+                          devices: Optional[dict[tuple[int,int], str]] = None
+                          ) -> None:
+        """
+        Draws the farm as one raster coloured by tile type, with plants
+        shaded by how close they are to harvest and devices marked, then
+        outlines the player. The raster is split into blocks, and only the
+        blocks whose pixels changed since the last redraw are updated.
+
+        Parameters:
+        tiles: The map as a (rows, columns) array of tile character codes.
+        plant_arrays: The (kind, stage, row, col) arrays of the plants.
+        playerposition: The position of the player on the grid
+        as a tuple[int, int].
+        playerdirection: The direction of the player (up, down, left, right).
+        devices: The automation devices to be marked on the grid.
+
+        Returns:
+        None
+        """
+
+        width, height = self._size
+        raster = lod.scale_raster(
+            lod.build_cell_raster(tiles, plant_arrays, devices),
+            (width, height)
+        )
+
+        # Create one image per block the first time, or after the canvas
+        # was cleared, then paste only the blocks that changed.
+        if self._lod_raster is None:
+            self.clear()
+            self._lod_bounds = [
+                bounds for bounds in lod.block_bounds((width, height),
+                                                      LOD_BLOCKS)
+                if bounds[0] < bounds[2] and bounds[1] < bounds[3]
+            ]
+            for x_min, y_min, x_max, y_max in self._lod_bounds:
+                block = Image.fromarray(raster[y_min:y_max, x_min:x_max])
+                image = ImageTk.PhotoImage(image=block)
+                self._lod_images.append(image)
+                self.create_image(x_min, y_min, image=image, anchor=tk.NW,
+                                  tags="lod")
+        else:
+            for index in lod.dirty_blocks(self._lod_raster, raster,
+                                          self._lod_bounds):
+                x_min, y_min, x_max, y_max = self._lod_bounds[index]
+                block = Image.fromarray(raster[y_min:y_max, x_min:x_max])
+                self._lod_images[index].paste(block)
+        self._lod_raster = raster
+
+        self.draw_player(playerposition, playerdirection)
 
 class ItemView(tk.Frame):
     """
@@ -150,23 +322,27 @@ class ItemView(tk.Frame):
     
     def __init__(self, master: tk.Frame, item_name: str, amount: int,
                  select_command: Optional[Callable[[str], None]] = None,
-                 sell_command: Optional[Callable[[str], None]] = None,
-                 buy_command: Optional[Callable[[str], None]] = None) -> None:
+                 sell_command: Optional[Callable[[str, Optional[int]],
+                                                 None]] = None,
+                 buy_command: Optional[Callable[[str, Optional[int]],
+                                                None]] = None) -> None:
         """
         Sets up ItemView to operate as a tk.Frame, and creates all internal
         widgets. Sets the commands for the buy and sell buttons to the
         buy_command and sell_command each called with the appropriate
-        item_name respectively. Binds the select_command to be called with the
-        appropriate item_name when either the ItemView frame or label
-        is left clicked.
+        item_name and quantity respectively: one unit for a plain click, or
+        the BULK_QUANTITIES for a click with a modifier key held. The Sell all
+        button calls sell_command with a quantity of None. Binds the
+        select_command to be called with the appropriate item_name when
+        either the ItemView frame or label is left clicked.
 
         Parameters:
         master: The master widget which is a frame.
         item_name: Name of the item.
         amount: Available inventory for the item.
         select_command: Binding the selection of item function.
-        sell_command: Binding the buying of an item function.
-        buy_command: Binding the selling of an item function.
+        sell_command: Binding the selling of an item function.
+        buy_command: Binding the buying of an item function.
 
         Returns:
         None
@@ -179,6 +355,7 @@ class ItemView(tk.Frame):
         self._sell_command = sell_command
         self._buy_command = buy_command
         self._selected = False
+        self._drawn = None
 
         super().__init__(self._master)
 
@@ -210,13 +387,15 @@ class ItemView(tk.Frame):
                 text="Buy",
                 padx=10,
                 command = (
-                    lambda: self._buy_command(item_name)
+                    lambda: self._buy_command(item_name, 1)
                     if self._buy_command
                     else None
                 )
-            ).pack(
+            )
+            self._buy.pack(
                 side=tk.LEFT
             )
+            self.bind_bulk(self._buy, self._buy_command)
         
         # Sell Button creation for the item view
         self._sell = tk.Button(
@@ -224,7 +403,23 @@ class ItemView(tk.Frame):
             text="Sell",
             padx=10,
             command = (
-                lambda: self._sell_command(item_name)
+                lambda: self._sell_command(item_name, 1)
+                if self._sell_command
+                else None
+            )
+        )
+        self._sell.pack(
+            side=tk.LEFT
+        )
+        self.bind_bulk(self._sell, self._sell_command)
+
+        # Sell all Button creation for the item view
+        tk.Button(
+            self,
+            text="Sell all",
+            padx=10,
+            command = (
+                lambda: self._sell_command(item_name, None)
                 if self._sell_command
                 else None
             )
@@ -251,7 +446,32 @@ class ItemView(tk.Frame):
 
         self.update(self._amount)
 
-    def update(self, amount: int, selected: bool = False) -> None:
+    def bind_bulk(self, button: tk.Button,
+                  command: Optional[Callable[[str, Optional[int]], None]]
+                  ) -> None:
+        """
+        Binds clicks on the given button with each modifier key in
+        BULK_QUANTITIES held to call command with that quantity, instead of
+        the button's own command.
+
+        Parameters:
+        button: The Buy or Sell button.
+        command: The buy or sell command of this ItemView.
+
+        Returns:
+        None
+        """
+
+        for modifier, quantity in BULK_QUANTITIES.items():
+            def click(event: tk.Event, quantity: int = quantity) -> str:
+                if command:
+                    command(self._item_name, quantity)
+                # Stop the plain click binding from trading one unit too.
+                return "break"
+            button.bind(f"<{modifier}-Button-1>", click)
+
+    def update(self, amount: int, selected: bool = False,
+               sell_price: Optional[int] = None) -> None:
         """
         Updates the text on the label, and the colour of this ItemView
         appropriately.
@@ -259,13 +479,24 @@ class ItemView(tk.Frame):
         Parameters:
         amount: Amount to be updated on the item text.
         selected: Boolean value which represents if the item is selected.
+        sell_price: The current sell price of the item, if it has changed.
 
         Returns:
         None
         """
         
+        if sell_price is None:
+            sell_price = self._sell_price
+
+        # Nothing to do if the row already shows this state.
+        state = (amount, selected, sell_price)
+        if state == self._drawn:
+            return
+        self._drawn = state
+
         self._amount = amount
         self._selected = selected
+        self._sell_price = sell_price
 
         item_name_text = f"{self._item_name}: {str(amount)}"
         sell_text = f"Sell price: ${str(self._sell_price)}"
@@ -299,7 +530,13 @@ class FarmGame():
     model and view classes.
     """
     
-    def __init__(self, master: tk.Tk, map_file: str) -> None:
+    def __init__(self, master: tk.Tk, map_file: str,
+                 weather_seed: Optional[int] = WEATHER_SEED,
+                 use_process: bool = False,
+                 use_market: bool = False,
+                 use_metrics: bool = False,
+                 use_realtime: bool = False,
+                 profile: Optional[StartupProfile] = None) -> None:
         """
         Sets the title of the window, a title banner to have the header image,
         creates the FramModel instance, creates the instances of all the view
@@ -309,6 +546,18 @@ class FarmGame():
         Parameters:
         master: The master widget which is the root window.
         map_file: The map that should be loaded to the FarmView instance.
+        weather_seed: Seed for the weather timeline, or None to play
+        without seasons and weather.
+        use_process: If True, the model runs in a separate simulation
+        process, and the views are drawn from the snapshots it publishes.
+        use_market: If True, produce is sold to a market whose prices fall
+        with bulk sales.
+        use_metrics: If True, frame timings are recorded and can be shown
+        in an overlay (see FrameMetrics).
+        use_realtime: If True, days pass in real time on a fixed-timestep
+        game loop (see frame_tick), instead of only on the next day button.
+        profile: If given, the time taken by each phase of starting the
+        game is recorded in it.
 
         Returns:
         None
@@ -316,26 +565,62 @@ class FarmGame():
         
         self._master = master
         self._map_file = map_file
+        self._weather_seed = weather_seed
+        self._use_market = use_market
         self._cache = {}
+        self._metrics = FrameMetrics() if use_metrics else None
+        self._allocations = AllocationTracker()
+        self._show_metrics = use_metrics
+        self._loader = ThreadPoolExecutor(max_workers=1)
+        self._loading = None
+
+        # In real-time mode, redraws wait for the next frame of the game
+        # loop, and the player is drawn moving between cells.
+        self._clock = FixedTimestep() if use_realtime else None
+        self._day_ticks = 0
+        self._needs_redraw = None
+        self._player_from = None
+        self._moved_at = None
+
+        if profile is None:
+            profile = StartupProfile()
 
         self._master.title("Farm Game")
 
-        # TITLE BANNER having the header image.
+        # The header and every sprite are decoded and resized by a pool of
+        # threads while the window is built, and collected before the first
+        # frame is drawn.
+        preloader = ThreadPoolExecutor(max_workers=PRELOAD_WORKERS)
+        image_path = "images/header.png"
+        banner_size = (FARM_WIDTH + INVENTORY_WIDTH, BANNER_HEIGHT)
+        header = preload_sprites(preloader, [image_path], banner_size)
+
+        # Creation of FarmModel instance, or of the simulation process
+        # whose snapshots stand in for it.
+        with profile.time("model"):
+            self._process = None
+            if use_process:
+                self.start_simulation()
+            else:
+                self._farmModel = self.create_model()
+
+        cell_size = farm_cell_size(self._farmModel.get_dimensions())
+        sprites = []
+        if min(cell_size) >= LOD_CELL_SIZE:
+            sprites = preload_sprites(preloader, sprite_names(), cell_size)
+
+        widgets_started = time.perf_counter()
+
+        # TITLE BANNER having the header image, once it is loaded.
         title_frame = tk.Frame(
             self._master
         )
         title_frame.pack()
 
-        image_path = "images/header.png"
-        banner_size = (FARM_WIDTH + INVENTORY_WIDTH, BANNER_HEIGHT)
-        title_image = get_image(image_path, banner_size, self._cache)
-        tk.Label(
-            title_frame,
-            image=title_image
-        ).pack()
-
-        # Creation of FarmModel instance.
-        self._farmModel = FarmModel(self._map_file)
+        title_label = tk.Label(
+            title_frame
+        )
+        title_label.pack()
 
         # Creayion of frame for FarmView and ItemViews.
         self._farm_item_frame = tk.Frame(
@@ -381,7 +666,50 @@ class FarmGame():
         filemenu.add_command(label="Quit", command=self.quit)
         filemenu.add_command(label="Map selection", command=self.map_selection)
 
-        self.redraw()
+        # The memory report works without metrics, so Debug is always there.
+        debugmenu = tk.Menu(menubar)
+        menubar.add_cascade(label="Debug", menu=debugmenu)
+        if self._metrics is not None:
+            debugmenu.add_command(label="Toggle metrics overlay",
+                                  command=self.toggle_metrics)
+            debugmenu.add_command(label="Dump metrics",
+                                  command=self.dump_metrics)
+        debugmenu.add_command(label="Memory report",
+                              command=self.report_memory)
+
+        # Closing the window quits too, so the simulation process is stopped.
+        self._master.protocol("WM_DELETE_WINDOW", self.quit)
+
+        # Autosaving on a timer, written in the background by the autosaver
+        # (or by the simulation process, when there is one).
+        self._autosaver = None
+        if self._process is None:
+            self._autosaver = Autosaver(AUTOSAVE_PATH)
+        self._autosave_id = self._master.after(AUTOSAVE_INTERVAL,
+                                               self.autosave_tick)
+
+        profile.record("Tk widgets", time.perf_counter() - widgets_started)
+
+        # Wait for the preloaded images, and make Tk images of them.
+        with profile.time("image wait"):
+            header_images, header_decode = collect_sprites(header)
+            sprite_images, sprite_decode = collect_sprites(sprites)
+            preloader.shutdown()
+        profile.record("PIL decode (all threads)",
+                       header_decode + sprite_decode)
+        with profile.time("Tk images"):
+            cache_sprites(header_images, self._cache)
+            cache_sprites(sprite_images, self._farmView._image_cache)
+            title_image = get_image(image_path, banner_size, self._cache)
+            title_label.config(image=title_image)
+
+        with profile.time("first frame"):
+            self.redraw()
+            self._master.update_idletasks()
+
+        if self._clock is not None:
+            self._frame_id = self._master.after(FRAME_INTERVAL,
+                                                self.frame_tick)
 
     def redraw(self) -> None:
         """
@@ -390,6 +718,105 @@ class FarmGame():
         Parameters:
         self: The FarmGame instance.
 
+        Returns:
+        None
+        """
+
+        self.draw_frame(True)
+
+    def redraw_inventory(self) -> None:
+        """
+        Redraws the InfoBar and ItemViews, which are all that trading
+        changes, based on the current model state.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        self.draw_frame(False)
+
+    def draw_frame(self, draw_farm: bool) -> None:
+        """
+        Redraws the views as one frame, timing each of them if metrics are
+        enabled.
+
+        Parameters:
+        draw_farm: Whether the FarmView is redrawn too.
+
+        Returns:
+        None
+        """
+
+        if self._metrics is not None:
+            self._metrics.start_frame()
+
+        if draw_farm:
+            self.timed("FarmView.redraw", self.redraw_farm)
+        self.timed("InfoBar.redraw", self.redraw_info_bar)
+        self.timed("ItemView.update", self.redraw_item_views)
+
+        if self._metrics is not None:
+            self.end_frame()
+
+    def timed(self, section: str, function: Callable, *args):
+        """
+        Calls a function with the given arguments, timing it as the named
+        section of the frame if metrics are enabled.
+
+        Parameters:
+        section: The name of the section.
+        function: The function to call.
+        args: The arguments for the function.
+
+        Returns:
+        The result of the function.
+        """
+
+        if self._metrics is None:
+            return function(*args)
+        with self._metrics.time(section):
+            return function(*args)
+
+    def redraw_farm(self) -> None:
+        """
+        Redraws the FarmView based on the current model state.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        # redraw FarmView with updated infomartion.
+        player_position = self._farmModel.get_player_position()
+        player_direction = self._farmModel.get_player_direction()
+
+        devices = self._farmModel.get_devices()
+
+        # Small cells are drawn as one raster rather than a sprite each.
+        if self._farmView.is_low_detail():
+            self._farmView.redraw_low_detail(
+                self._farmModel.get_tile_array(),
+                self._farmModel.get_plant_arrays(),
+                player_position, player_direction, devices
+            )
+        else:
+            ground = self._farmModel.get_map()
+            plants = self._farmModel.get_plants()
+            self._farmView.redraw(ground, plants,
+                                  player_position, player_direction, devices)
+
+    def redraw_info_bar(self) -> None:
+        """
+        Redraws the InfoBar based on the current model state.
+
+        Parameters:
+        self: The FarmGame instance.
+
         Returns:
         None
         """
@@ -399,26 +826,133 @@ class FarmGame():
         money = self._farmModel.get_player().get_money()
         energy = self._farmModel.get_player().get_energy()
 
-        self._inforBar.redraw(day, money, energy)
+        weather = None
+        if self._farmModel.get_weather() is not None:
+            timeline = self._farmModel.get_weather()
+            weather = (timeline.get_season(day), timeline.get_weather(day))
 
-        # redraw FarmView with updated infomartion.
-        ground = self._farmModel.get_map()
-        plants = self._farmModel.get_plants()
-        player_position = self._farmModel.get_player_position()
-        player_direction = self._farmModel.get_player_direction()
+        self._inforBar.redraw(day, money, energy, weather)
+
+    def redraw_item_views(self) -> None:
+        """
+        Updates the ItemViews based on the current model state, unless the
+        inventory is unchanged since they were drawn.
+
+        Parameters:
+        self: The FarmGame instance.
 
-        self._farmView.redraw(ground, plants,
-                              player_position, player_direction)
+        Returns:
+        None
+        """
+
+        # Prices only change with the inventory (selling) or the day
+        # (market recovery).
+        day = self._farmModel.get_days_elapsed()
+        inventory = self._farmModel.get_player().get_inventory()
+        drawn = (inventory.get_version(), day)
+        if drawn == self._drawn_inventory:
+            return
+        self._drawn_inventory = drawn
 
-        # update ItemViews with updated infomartion.
         for item_view in self._item_views:
             item_name = item_view._item_name
-            player_inventory = self._farmModel.get_player().get_inventory()
-            amount = player_inventory.get(item_name)
-            if amount == None:
-                amount = 0
+            amount = inventory.get(item_name, 0)
+            sell_price = self._farmModel.get_sell_price(item_name)
+            item_view.update(amount, item_view._selected, sell_price)
 
-            item_view.update(amount)
+    def end_frame(self) -> None:
+        """
+        Records the image cache hits and misses and the number of canvas
+        items of the frame just drawn, finishes it, and draws the metrics
+        overlay if it is shown.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        cache = self._farmView._image_cache
+        self._metrics.count("image_hits", cache.hits)
+        self._metrics.count("image_misses", cache.misses)
+        cache.hits = cache.misses = 0
+        self._metrics.count("canvas_items",
+                            len(self._farmView.find_all())
+                            + len(self._inforBar.find_all()))
+        self._metrics.end_frame()
+
+        self._farmView.delete("metrics")
+        if not self._show_metrics:
+            return
+        frame = self._metrics.get_percentiles(FRAME_SECTION)
+        lines = [f"frame p50 {frame[50]:.1f}ms p95 {frame[95]:.1f}ms"]
+        for section, times in self._metrics.get_report()["sections"].items():
+            if section != FRAME_SECTION:
+                lines.append(f"{section} p50 {times[50]:.1f}ms")
+        counters = self._metrics.get_frames()[-1]["counters"]
+        lines.append(f"items {counters['canvas_items']} images "
+                     f"{counters['image_hits']}/{counters['image_misses']}")
+        self._farmView.create_text(4, 4, text="\n".join(lines),
+                                   anchor=tk.NW, font=METRICS_FONT,
+                                   fill=METRICS_COLOUR, tags="metrics")
+
+    def toggle_metrics(self) -> None:
+        """
+        Shows or hides the metrics overlay.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        self._show_metrics = not self._show_metrics
+        self.redraw()
+
+    def dump_metrics(self) -> None:
+        """
+        Writes the recorded frames to METRICS_PATH.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        self._metrics.dump(METRICS_PATH)
+
+    def report_memory(self) -> None:
+        """
+        Prints the memory used by the farm model, the FarmView's sprites and
+        the header images, by section and by type, followed by the source
+        lines whose allocations grew most since the last report. The first
+        report starts tracemalloc, so later ones can show what a map
+        selection left behind.
+
+        Parameters:
+        self: The FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        growth = self._allocations.compare()
+        if isinstance(self._farmModel, FarmModel):
+            report = self._farmModel.memory_report(
+                {"farm_view_images": self._farmView._image_cache,
+                 "header_images": self._cache},
+                by_type=True
+            )
+            print(format_report(report), file=sys.stderr)
+        else:
+            print("The farm model is in the simulation process",
+                  file=sys.stderr)
+        if growth:
+            print("Allocations grown since the last report:", *growth,
+                  sep="\n", file=sys.stderr)
 
     def handle_keypress(self, event: tk.Event) -> None:
         """
@@ -431,59 +965,201 @@ class FarmGame():
         None
         """
         
-        if event.char == UP:
-            # Move the player UP.
-            self._farmModel.move_player(UP)
-        elif event.char == DOWN:
-            # Move the player DOWN.
-            self._farmModel.move_player(DOWN)
-        elif event.char == LEFT:
-            # Move the player LEFT.
-            self._farmModel.move_player(LEFT)
-        elif event.char == RIGHT:
-            # Move the player RIGHT
-            self._farmModel.move_player(RIGHT)
-        elif event.char == "p":
-            # Plant the seed at the player position and redraw the views.
-            selected_item_name = ""
-            item_amount = 0
-
-            # Get the item name and amount of the selected item
-            for item_view in self._item_views:
-                if item_view._selected:
-                    selected_item_name = item_view._item_name
-                    item_amount = item_view._amount
-
-            # Proceed only if the item is a seed and amount is greater than 0.
-            if selected_item_name in SEEDS and item_amount > 0:
-                player_position = self._farmModel.get_player_position()
-                row, col = player_position
-                # Proceed only if the player is on the soil.
-                if (self._farmModel.get_map()[row][col] == UNTILLED
-                            or self._farmModel.get_map()[row][col] == SOIL):
-                    # Create the plant instance with the given item name.
-                    plant = self.create_plant(selected_item_name.split(" ")[0])
-
-                    if self._farmModel.add_plant(player_position, plant):
-                        to_remove = (selected_item_name, 1)
-                        self._farmModel.get_player().remove_item(to_remove)
-        elif event.char == "h":
-            # Harvest the plant from player position if possible.
-            to_add = self._farmModel.harvest_plant(
-                self._farmModel.get_player_position())
-            if to_add:
-                self._farmModel.get_player().add_item(to_add)
-        elif event.char == "r":
-            # Remove the plant from player position if available.
-            self._farmModel.remove_plant(self._farmModel.get_player_position())
-        elif event.char == "t":
-            # Till the soil on the player position.
-            self._farmModel.till_soil(self._farmModel.get_player_position())
-        elif event.char == "u":
-            # Untill the soil on the player position.
-            self._farmModel.untill_soil(self._farmModel.get_player_position())
+        # Find the item selected in the inventory, used for planting.
+        selected_item_name = None
+        for item_view in self._item_views:
+            if item_view._selected:
+                selected_item_name = item_view._item_name
 
-        self.redraw()
+        if event.keysym == METRICS_KEY and self._metrics is not None:
+            self.toggle_metrics()
+        elif event.char in HISTORY_KEYS:
+            self.perform(HISTORY_KEYS[event.char])
+        else:
+            self.perform('keypress', event.char, selected_item_name)
+
+    def perform(self, action: str, *args) -> None:
+        """
+        Performs the named action (see actions.perform) on the model. With a
+        simulation process, the action is sent to the process and the views
+        are redrawn when it publishes the new state.
+
+        Parameters:
+        action: The name of the action.
+        args: The arguments for the action.
+
+        Returns:
+        None
+        """
+
+        if self._process is not None:
+            self._process.send(action, *args)
+            return
+
+        position = self._farmModel.get_player_position()
+        self.timed("model", actions.perform, self._farmModel, action, *args)
+        self.note_player_move(position)
+        self.request_redraw(action in ('buy', 'sell'))
+
+    def request_redraw(self, inventory_only: bool = False) -> None:
+        """
+        Redraws the game after the model changed. In real-time mode the
+        redraw is left to the next frame of the game loop.
+
+        Parameters:
+        inventory_only: Whether only the InfoBar and ItemViews changed.
+
+        Returns:
+        None
+        """
+
+        if self._clock is None:
+            if inventory_only:
+                self.redraw_inventory()
+            else:
+                self.redraw()
+        elif not inventory_only or self._needs_redraw is None:
+            self._needs_redraw = "inventory" if inventory_only else "all"
+
+    def note_player_move(self, position: tuple[int,int]) -> None:
+        """
+        Starts animating the player's move in real-time mode, if it has
+        moved from the given position.
+
+        Parameters:
+        position: Where the player was before the model changed.
+
+        Returns:
+        None
+        """
+
+        if self._clock is None:
+            return
+        if self._farmModel.get_player_position() != position:
+            now = time.perf_counter()
+            if self._moved_at is not None:
+                # Start from wherever the previous move had got to.
+                position = interpolate(
+                    self._player_from, position,
+                    move_fraction(self._moved_at, now)
+                )
+            self._player_from = position
+            self._moved_at = now
+
+    def frame_tick(self) -> None:
+        """
+        Runs one frame of the real-time game loop: simulates every tick due
+        since the last frame, then draws the frame only if the simulation is
+        caught up and within the frame budget. Frames that are not drawn
+        are counted as dropped. The next frame is scheduled with after, so
+        the mainloop is never blocked.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        frame_start = time.perf_counter()
+        for _ in range(self._clock.advance(frame_start)):
+            self.tick()
+
+        now = time.perf_counter()
+        if self._clock.should_render(frame_start, now):
+            self.render_frame(now)
+        elif self._metrics is not None:
+            self._metrics.count("dropped_frames", 1)
+
+        elapsed = int((time.perf_counter() - frame_start) * 1000)
+        self._frame_id = self._master.after(max(FRAME_INTERVAL - elapsed, 1),
+                                            self.frame_tick)
+
+    def tick(self) -> None:
+        """
+        Advances in-game time by one tick, starting a new day once a day's
+        worth of ticks has passed.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        self._day_ticks += 1
+        if self._day_ticks * self._clock.get_tick() >= REALTIME_DAY_SECONDS:
+            self._day_ticks = 0
+            self.next_day_click()
+
+    def render_frame(self, now: float) -> None:
+        """
+        Draws a frame of the real-time game loop: redraws whatever the model
+        changed since the last frame, and moves the player along its
+        current move.
+
+        Parameters:
+        now: The time of the frame.
+
+        Returns:
+        None
+        """
+
+        if self._needs_redraw == "all":
+            self.redraw()
+        elif self._needs_redraw == "inventory":
+            self.redraw_inventory()
+        self._needs_redraw = None
+
+        if self._moved_at is not None:
+            fraction = move_fraction(self._moved_at, now)
+            position = interpolate(self._player_from,
+                                   self._farmModel.get_player_position(),
+                                   fraction)
+            self._farmView.draw_player(
+                position, self._farmModel.get_player_direction()
+            )
+            if fraction >= 1:
+                self._moved_at = None
+
+    def get_dropped_frames(self) -> int:
+        """
+        Returns the number of frames the real-time game loop has dropped to
+        keep up with the simulation.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        int: The number of dropped frames, or 0 if not in real-time mode.
+        """
+
+        return 0 if self._clock is None else self._clock.get_dropped_frames()
+
+    def poll_simulation(self) -> None:
+        """
+        Redraws the views from the latest snapshot published by the
+        simulation process, if there is a new one, and schedules the next
+        poll.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None
+        """
+
+        for error in self._process.get_errors():
+            print(f"Simulation error: {error}", file=sys.stderr)
+
+        if self._process.has_update():
+            position = self._farmModel.get_player_position()
+            self._farmModel = self._process.snapshot()
+            self.note_player_move(position)
+            self.request_redraw()
+
+        self._poll_id = self._master.after(SIMULATION_POLL_INTERVAL,
+                                           self.poll_simulation)
 
     def select_item(self, item_name: str) -> None:
         """
@@ -506,45 +1182,39 @@ class FarmGame():
             else:
                 item_view.update(item_view._amount, False)
 
-    def buy_item(self, item_name: str) -> None:
+    def buy_item(self, item_name: str, quantity: Optional[int] = 1) -> None:
         """
         The callback to be given to each ItemView for buying items. This
-        method should cause the player to attempt to buy the item with the
-        given item_name, at the price specified in BUY_PRICES, and then
-        redraw the view.
+        method should cause the player to attempt to buy the quantity of the
+        item with the given item_name, at the price specified in BUY_PRICES,
+        and then redraw the view.
 
         Parameters:
         item_name: Name of the item selected.
+        quantity: Number of units to buy, or None for as many as possible.
 
         Returns:
         None
         """
         
-        # Proceed to buy the item if item buy price is available.
-        if item_name in BUY_PRICES:
-            amount = BUY_PRICES.get(item_name)
-            self._farmModel.get_player().buy(item_name, amount)
-        self.redraw()
+        self.perform('buy', item_name, quantity)
 
-    def sell_item(self, item_name: str) -> None:
+    def sell_item(self, item_name: str, quantity: Optional[int] = 1) -> None:
         """
         The callback to be given to each ItemView for selling items. This
-        method should cause the player to attempt to sell the item with the
-        given item_name, at the price specified in SELL_PRICES, and then
-        redraw the view.
+        method should cause the player to attempt to sell the quantity of
+        the item with the given item_name, at the market price or the price
+        specified in SELL_PRICES, and then redraw the view.
 
         Parameters:
         item_name: Name of the item selected.
+        quantity: Number of units to sell, or None to sell all of them.
 
         Returns:
         None
         """
         
-        # Proceed to sell the item if item sell price is available.
-        if item_name in SELL_PRICES:
-            amount = SELL_PRICES.get(item_name)
-            self._farmModel.get_player().sell(item_name, amount)
-        self.redraw()
+        self.perform('sell', item_name, quantity)
 
     def next_day_click(self) -> None:
         """
@@ -558,8 +1228,59 @@ class FarmGame():
         """
 
         # New day method will update the information and redraw the views.
-        self._farmModel.new_day()
-        self.redraw()
+        self.perform('next_day')
+        self.autosave()
+
+    def autosave(self) -> None:
+        """
+        Saves the game in the background. Only a snapshot of the model is
+        taken here; it is written to disk by another thread.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None.
+        """
+
+        if self._process is not None:
+            self._process.save(AUTOSAVE_PATH)
+        else:
+            self._autosaver.submit(SaveSnapshot(self._farmModel))
+
+    def autosave_tick(self) -> None:
+        """
+        Autosaves and schedules the next timed autosave.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None.
+        """
+
+        self.autosave()
+        self._autosave_id = self._master.after(AUTOSAVE_INTERVAL,
+                                               self.autosave_tick)
+
+    def create_model(self, map_file: Optional[str] = None) -> FarmModel:
+        """
+        Method to create the FarmModel for a map, with a new weather
+        timeline if the game has weather.
+
+        Parameters:
+        self: FarmGame instance.
+        map_file: The map to load, or None for the current map.
+
+        Returns:
+        FarmModel: Returns the created model.
+        """
+
+        weather = None
+        if self._weather_seed is not None:
+            weather = Weather(self._weather_seed)
+        market = Market() if self._use_market else None
+        return FarmModel(map_file or self._map_file, weather, market)
 
     def create_farmview(self) -> None:
         """
@@ -575,7 +1296,9 @@ class FarmGame():
         dimensions = self._farmModel.get_dimensions()
         size = (FARM_WIDTH, FARM_WIDTH)
         
-        self._farmView = FarmView(self._farm_item_frame, dimensions, size)
+        image_cache = CountingCache() if self._metrics is not None else None
+        self._farmView = FarmView(self._farm_item_frame, dimensions, size,
+                                  image_cache=image_cache)
         self._farmView.pack(
             side=tk.LEFT
         )
@@ -592,11 +1315,10 @@ class FarmGame():
         """
         
         self._item_views = []
+        self._drawn_inventory = None
+        player_inventory = self._farmModel.get_player().get_inventory()
         for item_name in ITEMS:
-            player_inventory = self._farmModel.get_player().get_inventory()
-            amount = player_inventory.get(item_name)
-            if amount == None:
-                amount = 0
+            amount = player_inventory.get(item_name, 0)
 
             # Store the newly created ItemView instances in a list.
             self._item_views.append(ItemView(self.make_item_frame(),
@@ -637,19 +1359,11 @@ class FarmGame():
         Plant: Returns the created plant instance.
         """
         
-        plant = None
-        if plant_name == "Potato":
-            plant = PotatoPlant()
-        elif plant_name == "Kale":
-            plant = KalePlant()
-        elif plant_name == "Berry":
-            plant = BerryPlant()
-
-        return plant
+        return actions.create_plant(plant_name)
 
     def quit(self) -> None:
         """
-        Closes the complete game by destroy method.
+        Saves and closes the complete game by destroy method.
 
         Parameters:
         self: FarmGame instance.
@@ -658,12 +1372,61 @@ class FarmGame():
         None.
         """
         
+        self._master.after_cancel(self._autosave_id)
+        if self._clock is not None:
+            self._master.after_cancel(self._frame_id)
+            dropped = self._clock.get_dropped_frames()
+            total = dropped + self._clock.get_frames()
+            print(f"Dropped {dropped} of {total} frames", file=sys.stderr)
+        self.autosave()
+        self.stop_simulation()
+        if self._autosaver is not None:
+            self._autosaver.close()
+        # A simulation process started for a map still loading is closed
+        # once it has started.
+        if self._loading is not None:
+            self._loading.add_done_callback(close_loaded_process)
+        self._loader.shutdown(wait=False, cancel_futures=True)
         self._master.destroy()
 
+    def start_simulation(self) -> None:
+        """
+        Starts a simulation process for the current map, takes its first
+        snapshot as the model to draw from, and starts polling it.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None.
+        """
+
+        self._process = FarmProcess(self._map_file, self._weather_seed,
+                                    self._use_market)
+        self._farmModel = self._process.snapshot()
+        self._poll_id = self._master.after(SIMULATION_POLL_INTERVAL,
+                                           self.poll_simulation)
+
+    def stop_simulation(self) -> None:
+        """
+        Stops polling and closes the simulation process, if there is one.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None.
+        """
+
+        if self._process is not None:
+            self._master.after_cancel(self._poll_id)
+            self._process.close()
+
     def map_selection(self) -> None:
         """
-        Selects the new map from the file dialog and redraws the
-        complete game.
+        Selects the new map from the file dialog and starts loading it in
+        the background (see load_map). The current game stays playable
+        until the new map is ready.
 
         Parameters:
         self: FarmGame instance.
@@ -672,25 +1435,154 @@ class FarmGame():
         None.
         """
         
+        # Only one map is loaded at a time.
+        if self._loading is not None:
+            return
+
         # Get the directory of the chosen map file.
         name = filedialog.askopenfilename()
 
         # Proceed only if a map file is selected.
         if name:
             name_components = name.split("/")[-2:]
-            self._map_file = name_components[0] + "/" + name_components[1]
-            self._farmModel = FarmModel(self._map_file)
+            map_file = name_components[0] + "/" + name_components[1]
 
-            # Destroy the FarmView and ItemViews frame and redraw with new map.
-            for each_widget in self._farm_item_frame.winfo_children():
-                each_widget.destroy()
+            self._progress = ttk.Progressbar(self._master,
+                                             mode="indeterminate")
+            self._progress.pack(side=tk.BOTTOM, fill=tk.X)
+            self._progress.start()
 
-            self.create_farmview()
-            self.create_itemviews()
-            
-            self.redraw()
+            self._loading = self._loader.submit(self.load_map, map_file)
+            self._master.after(SIMULATION_POLL_INTERVAL, self.poll_loading)
+
+    def load_map(self, map_file: str) -> tuple:
+        """
+        Loads a map on the loader thread: parses it into a new model (or
+        starts a simulation process for it), and decodes and resizes the
+        sprites for its cell size. Nothing here touches Tk.
+
+        Parameters:
+        map_file: The map to load.
+
+        Returns:
+        tuple: The map file, the new model, the new simulation process or
+        None, and the loaded sprites.
+        """
+
+        process = None
+        if self._process is not None:
+            process = FarmProcess(map_file, self._weather_seed,
+                                  self._use_market)
+            model = process.snapshot()
+        else:
+            model = self.create_model(map_file)
+
+        cell_size = farm_cell_size(model.get_dimensions())
+        sprites = {}
+        if min(cell_size) >= LOD_CELL_SIZE:
+            sprites = load_sprites(sprite_names(), cell_size)
+        return map_file, model, process, sprites
+
+    def poll_loading(self) -> None:
+        """
+        Swaps in the map being loaded once it is ready, or checks again
+        later.
+
+        Parameters:
+        self: FarmGame instance.
+
+        Returns:
+        None.
+        """
+
+        if not self._loading.done():
+            self._master.after(SIMULATION_POLL_INTERVAL, self.poll_loading)
+            return
+
+        loading, self._loading = self._loading, None
+        self._progress.destroy()
+        try:
+            map_file, model, process, sprites = loading.result()
+        except Exception as error:
+            print(f"Could not load map: {error!r}", file=sys.stderr)
+            return
+        self.swap_model(map_file, model, process, sprites)
+
+    def swap_model(self, map_file: str, model: FarmModel,
+                   process: Optional[FarmProcess],
+                   sprites: dict) -> None:
+        """
+        Replaces the game's model with one for a new map in a single step,
+        then rebinds the existing FarmView and ItemViews to it and redraws.
+
+        Parameters:
+        map_file: The new map.
+        model: The model for the new map.
+        process: The simulation process for the new map, or None.
+        sprites: The sprites for the new cell size, by path.
+
+        Returns:
+        None.
+        """
+
+        if process is not None:
+            self.stop_simulation()
+            self._process = process
+            self._poll_id = self._master.after(SIMULATION_POLL_INTERVAL,
+                                               self.poll_simulation)
+        self._map_file = map_file
+        self._farmModel = model
+        self._moved_at = None
+
+        # Reuse the FarmView with a new image cache for the new cell size,
+        # filled with the sprites loaded in the background.
+        image_cache = CountingCache() if self._metrics is not None else {}
+        cache_sprites(sprites, image_cache)
+        self._farmView.set_map(model.get_dimensions(), image_cache)
+
+        # Reuse the ItemViews, deselecting every item.
+        self._drawn_inventory = None
+        for item_view in self._item_views:
+            item_view.update(item_view._amount, False)
+
+        self.redraw()
+
+def farm_cell_size(dimensions: tuple[int, int]) -> tuple[int, int]:
+    """
+    Returns the size of the cells of a FarmView for a map of the given
+    dimensions.
+
+    Parameters:
+    dimensions: The (rows, columns) of the map.
+
+    Returns:
+    tuple[int, int]: The (width, height) of each cell in pixels.
+    """
+
+    rows, cols = dimensions
+    return FARM_WIDTH // cols, FARM_WIDTH // rows
+
+def close_loaded_process(loading: Future) -> None:
+    """
+    Closes the simulation process of a map that finished loading after the
+    game quit, if it has one.
+
+    Parameters:
+    loading: The result of FarmGame.load_map.
+
+    Returns:
+    None.
+    """
+
+    if not loading.cancelled() and loading.exception() is None:
+        process = loading.result()[2]
+        if process is not None:
+            process.close()
 
-def play_game(root: tk.Tk, map_file: str) -> None:
+def play_game(root: tk.Tk, map_file: str, use_process: bool = False,
+              use_market: bool = False, use_metrics: bool = False,
+              use_realtime: bool = False,
+              profile: Optional[StartupProfile] = None) -> None:
     """
     Constructs the controller instance (FarmGame) with the given map_file
     and the root window parameters.
@@ -698,12 +1590,24 @@ def play_game(root: tk.Tk, map_file: str) -> None:
     Parameters:
     root: tk.Tk instance - root window.
     map_file: The selected map for the game.
+    use_process: If True, the model runs in a separate simulation process.
+    use_market: If True, produce is sold to a market with falling prices.
+    use_metrics: If True, frame timings are recorded and shown in an
+    overlay.
+    use_realtime: If True, days pass in real time.
+    profile: If given, the startup phases are recorded in it and reported
+    once the first frame is drawn.
 
     Returns:
     None.
     """
     
-    farmGame = FarmGame(root, map_file)
+    farmGame = FarmGame(root, map_file, use_process=use_process,
+                        use_market=use_market, use_metrics=use_metrics,
+                        use_realtime=use_realtime, profile=profile)
+    if profile is not None:
+        profile.record("total", time.perf_counter() - _STARTED)
+        print(profile.report(), file=sys.stderr)
     root.mainloop()
 
 def main() -> None:
@@ -718,9 +1622,34 @@ def main() -> None:
     None.
     """
     
+    parser = argparse.ArgumentParser(description="Farm Game")
+    parser.add_argument("--process", action="store_true",
+                        help="run the model in a separate process")
+    parser.add_argument("--market", action="store_true",
+                        help="sell to a market whose prices fall with "
+                             "bulk sales")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record frame timings and show them in an "
+                             "overlay")
+    parser.add_argument("--realtime", action="store_true",
+                        help="let days pass in real time")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report how long each phase of starting the "
+                             "game takes")
+    args = parser.parse_args()
+
+    profile = None
+    if args.profile_startup:
+        profile = StartupProfile()
+        profile.record("imports", _IMPORTED - _STARTED)
+
+    tk_started = time.perf_counter()
     root = tk.Tk()
+    if profile is not None:
+        profile.record("Tk root", time.perf_counter() - tk_started)
     map_file = "maps/map1.txt"
-    play_game(root, map_file)
+    play_game(root, map_file, args.process, args.market, args.metrics,
+              args.realtime, profile)
 
 if __name__ == '__main__':
     main()
@@ -2,20 +2,8 @@ import tkinter as tk
 from PIL import ImageTk, Image
 from typing import Union
 from constants import *
-
-def read_map(map_file: str) -> list[str]:
-    """ Reads the map file and returns a list of strings, where each string
-        represents one row of the farm (first string represents top row), and
-        each character in a string represents a tile.
-
-    Parameters:
-        map_file: The path to the map file.
-
-    Returns:
-        A list of strings representing the tiles in the map.
-    """
-    with open(map_file, 'r') as file:
-        return [line.strip() for line in file.readlines()]
+from map_io import read_map
+from tracing import traced
 
 def get_plant_image_name(plant: 'Plant') -> str:
     """ Returns the name of the appropriate image for the given plant at its
@@ -33,6 +21,7 @@ def get_plant_image_name(plant: 'Plant') -> str:
     """
     return f'plants/{plant.get_name()}/stage_{plant.get_stage()}.png'
 
+@traced('get_image')
 def get_image(
         image_name: str,
         size: tuple[int, int],
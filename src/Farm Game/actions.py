@@ -0,0 +1,127 @@
+from typing import Optional
+from constants import *
+from model import *
+
+def create_plant(
+        plant_name: str,
+        model: Optional[FarmModel] = None
+    ) -> Optional[Plant]:
+    """ Creates a plant instance with the given name.
+
+    Parameters:
+        plant_name: The name of the plant's produce, e.g. 'Potato'.
+        model: If given, the farm the plant is for, which may reuse a plant
+               removed from it (see FarmModel.new_plant).
+
+    Returns:
+        The new plant, or None if there is no plant with that name.
+    """
+    for plant_type in PLANT_TYPES:
+        if plant_type._PRODUCE == plant_name:
+            if model is not None:
+                return model.new_plant(plant_type)
+            return plant_type()
+
+def apply_keypress(
+        model: FarmModel,
+        key: str,
+        selected_item: Optional[str] = None
+    ) -> None:
+    """ Applies the action bound to the given key to the model, at the player's
+        position.
+
+    Parameters:
+        model: The model to act on.
+        key: The key pressed.
+        selected_item: The name of the item selected in the inventory, used
+                       when planting.
+    """
+    player = model.get_player()
+    position = model.get_player_position()
+
+    if key in MOVE_DELTAS:
+        model.move_player(key)
+    elif key == PLANT_KEY:
+        # Plant only if a seed is selected and the player is on soil
+        amount = player.get_inventory().get(selected_item, 0)
+        if selected_item in SEEDS and amount > 0:
+            row, col = position
+            if model.get_map()[row][col] in (UNTILLED, SOIL):
+                plant = create_plant(selected_item.split(' ')[0], model)
+                if model.add_plant(position, plant):
+                    player.remove_item((selected_item, 1))
+                else:
+                    model.discard_new_plant(plant)
+    elif key == HARVEST_KEY:
+        to_add = model.harvest_plant(position)
+        if to_add:
+            player.add_item(to_add)
+    elif key == REMOVE_KEY:
+        model.remove_plant(position)
+    elif key == TILL_KEY:
+        model.till_soil(position)
+    elif key == UNTILL_KEY:
+        model.untill_soil(position)
+    elif key in DEVICE_KEYS:
+        model.add_device(position, DEVICE_KEYS[key])
+    elif key == REMOVE_DEVICE_KEY:
+        model.remove_device(position)
+
+def buy_item(
+        model: FarmModel,
+        item_name: str,
+        quantity: Optional[int] = 1
+    ) -> None:
+    """ Makes the player attempt to buy the given quantity of an item (None for
+        as many as they can afford), at the price specified in BUY_PRICES.
+    """
+    if item_name in BUY_PRICES:
+        model.get_player().buy(item_name, BUY_PRICES[item_name], quantity)
+
+def sell_item(
+        model: FarmModel,
+        item_name: str,
+        quantity: Optional[int] = 1
+    ) -> None:
+    """ Makes the player attempt to sell the given quantity of an item (None
+        for all of it), to the model's market if it has one and otherwise at
+        the price specified in SELL_PRICES.
+    """
+    if item_name not in SELL_PRICES:
+        return
+    if model.get_market() is not None:
+        model.sell_to_market(item_name, quantity)
+    else:
+        model.get_player().sell(item_name, SELL_PRICES[item_name], quantity)
+
+def next_day(model: FarmModel) -> None:
+    """ Advances the model by one day. """
+    model.new_day()
+
+# Actions that can be requested by name, e.g. from another process
+ACTIONS = {
+    'keypress': apply_keypress,
+    'buy': buy_item,
+    'sell': sell_item,
+    'next_day': next_day,
+}
+
+# Actions that move through the model's history instead of being recorded in it
+HISTORY_ACTIONS = {
+    'undo': FarmModel.undo,
+    'redo': FarmModel.redo,
+}
+
+def perform(model: FarmModel, action: str, *args) -> None:
+    """ Performs the named action from ACTIONS or HISTORY_ACTIONS on the
+        model. Actions from ACTIONS can be undone.
+
+    Parameters:
+        model: The model to act on.
+        action: The name of the action.
+        args: The arguments for the action, after the model.
+    """
+    if action in HISTORY_ACTIONS:
+        HISTORY_ACTIONS[action](model)
+    else:
+        model.do(lambda: ACTIONS[action](model, *args))
@@ -22,6 +22,17 @@ INVENTORY_OUTLINE_COLOUR = '#d68f54'
 INVENTORY_SELECTED_COLOUR = '#d68f54'
 INVENTORY_EMPTY_COLOUR = 'grey'
 
+# Colours of the low-detail farm view, as (red, green, blue). Plants shade
+# from the first colour when planted to the second when ready to harvest.
+LOD_TILE_COLOURS = {
+    GRASS: (106, 170, 72),
+    SOIL: (110, 74, 44),
+    UNTILLED: (176, 140, 96),
+}
+LOD_PLANT_COLOURS = ((190, 230, 110), (240, 80, 40))
+LOD_DEVICE_COLOUR = (60, 120, 220)
+LOD_PLAYER_COLOUR = 'white'
+
 # Images
 IMAGES = {
     GRASS: 'grass.png',
@@ -33,6 +44,12 @@ IMAGES = {
     RIGHT: 'player_d.png',
 }
 
+# Cell size (in pixels) below which the farm is drawn as one low-detail
+# raster instead of a sprite per cell, and the number of blocks along each
+# side of the raster that are updated separately when they change
+LOD_CELL_SIZE = 8
+LOD_BLOCKS = 8
+
 # Fonts
 HEADING_FONT = ('Helvetica', 15, 'bold')
 
@@ -84,3 +101,164 @@ SELL_PRICES = {
     'Berry': 50,
     'Berry Seed': 40,
 }
+
+# With the optional market, how many units of an item must be sold for its
+# price to fall by a factor of e, and the fraction of those sales still
+# weighing on the price after each day
+MARKET_DEPTH = 200
+MARKET_RECOVERY = 0.5
+
+# Units traded by clicking Buy or Sell with each modifier key held
+BULK_QUANTITIES = {
+    'Shift': 10,
+    'Control': 100,
+}
+
+# Seasons, in order, and how many days each one lasts
+SEASONS = ['spring', 'summer', 'autumn', 'winter']
+SEASON_LENGTH = 28
+
+# Weather types
+SUNNY = 'sunny'
+RAIN = 'rain'
+DROUGHT = 'drought'
+FROST = 'frost'
+
+# Chance of each type of weather on a day in each season
+WEATHER_CHANCES = {
+    'spring': {SUNNY: 0.5, RAIN: 0.4, DROUGHT: 0.05, FROST: 0.05},
+    'summer': {SUNNY: 0.6, RAIN: 0.15, DROUGHT: 0.25, FROST: 0.0},
+    'autumn': {SUNNY: 0.45, RAIN: 0.4, DROUGHT: 0.05, FROST: 0.1},
+    'winter': {SUNNY: 0.3, RAIN: 0.2, DROUGHT: 0.0, FROST: 0.5},
+}
+
+# Growth speed multiplier for each season
+SEASON_GROWTH = {
+    'spring': 1.0,
+    'summer': 1.25,
+    'autumn': 0.75,
+    'winter': 0.5,
+}
+
+# Growth speed multiplier for each type of weather, by tile
+# Tiles not listed grow at normal speed
+WEATHER_GROWTH = {
+    SUNNY: {},
+    RAIN: {SOIL: 1.5, UNTILLED: 1.25},
+    DROUGHT: {SOIL: 0.5, UNTILLED: 0.25},
+    FROST: {SOIL: 0.0, UNTILLED: 0.0, GRASS: 0.0},
+}
+
+# Harvest yield multiplier for each type of weather, by tile
+# Tiles not listed yield normally
+WEATHER_YIELD = {
+    SUNNY: {},
+    RAIN: {SOIL: 1.5, UNTILLED: 1.25},
+    DROUGHT: {SOIL: 0.75, UNTILLED: 0.5},
+    FROST: {SOIL: 0.5, UNTILLED: 0.5, GRASS: 0.5},
+}
+
+# Farm automation devices
+SPRINKLER = 'sprinkler'
+HARVESTER = 'harvester'
+TILLER = 'tiller'
+
+# How many cells away from itself (including diagonally) each device reaches
+DEVICE_RADII = {
+    SPRINKLER: 1,
+    HARVESTER: 1,
+    TILLER: 2,
+}
+
+# Growth speed multiplier for plants watered by a sprinkler
+SPRINKLER_GROWTH = 1.5
+
+# Seed for the weather timeline used by the game
+WEATHER_SEED = 10012023
+
+# Keys for placing each type of device at the player's position, and for
+# removing the device there
+DEVICE_KEYS = {
+    '1': SPRINKLER,
+    '2': HARVESTER,
+    '3': TILLER,
+}
+REMOVE_DEVICE_KEY = 'x'
+
+# Labels drawn on the farm for each type of device
+DEVICE_LABELS = {
+    SPRINKLER: 'S',
+    HARVESTER: 'H',
+    TILLER: 'T',
+}
+DEVICE_FONT = ('Helvetica', 10, 'bold')
+
+# Keys for actions at the player's position
+PLANT_KEY = 'p'
+HARVEST_KEY = 'h'
+REMOVE_KEY = 'r'
+TILL_KEY = 't'
+UNTILL_KEY = 'u'
+
+# Keys for undoing and redoing actions, mapped to the action they perform
+HISTORY_KEYS = {
+    'z': 'undo',
+    'y': 'redo',
+}
+
+# How often (in milliseconds) the UI checks for a new state from the
+# simulation process
+SIMULATION_POLL_INTERVAL = 16
+
+# Where the game autosaves, how many saves are kept, and how often (in
+# milliseconds) it saves in addition to every new day
+AUTOSAVE_PATH = 'saves/autosave.npz'
+AUTOSAVE_KEEP = 3
+AUTOSAVE_INTERVAL = 60000
+
+# Frame metrics: the number of recent frames kept, the percentiles reported
+# for each timed section, the section holding each frame's total time, the
+# key that shows or hides the overlay, and where recorded frames are dumped
+METRICS_WINDOW = 300
+METRICS_PERCENTILES = (50, 95, 99)
+FRAME_SECTION = 'frame'
+METRICS_KEY = 'F3'
+METRICS_PATH = 'metrics.json'
+METRICS_FONT = ('Courier', 9)
+METRICS_COLOUR = 'yellow'
+
+# The number of threads decoding sprites while the game starts
+PRELOAD_WORKERS = 4
+
+# Real-time mode: the simulated time of one tick and the wall-clock length
+# of a day (both in seconds), how often (in milliseconds) frames are due and
+# how long (in seconds) one may take to still be drawn, the most ticks
+# simulated per frame while catching up, and how long (in seconds) the
+# player takes to move between cells
+REALTIME_TICK = 0.05
+REALTIME_DAY_SECONDS = 60
+FRAME_INTERVAL = 16
+FRAME_BUDGET = 0.016
+MAX_CATCH_UP_TICKS = 20
+PLAYER_MOVE_SECONDS = 0.12
+
+# Farm server: the address it listens on by default, the number of worker
+# processes sessions are sharded across (0 keeps them in the server), the
+# longest message (in bytes) it accepts, and the map size of sessions opened
+# without a map
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_SHARDS = 0
+SERVER_MESSAGE_LIMIT = 1 << 20
+SESSION_MAP_SIZE = 16
+
+# The fewest plants worth aging in parallel by a ShardedPlantStore
+DAY_SHARD_MIN_PLANTS = 200_000
+
+# Memory reports: the number of types listed by size, and of source lines
+# listed by growth since the last report
+MEMORY_TOP_TYPES = 15
+MEMORY_TOP_LINES = 10
+
+# The most removed plants of each type a farm keeps for reuse by new plants
+PLANT_POOL_LIMIT = 1024
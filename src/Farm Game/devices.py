@@ -0,0 +1,89 @@
+from typing import Optional
+import numpy as np
+from constants import *
+
+def box_sum(grid: np.ndarray, radius: int) -> np.ndarray:
+    """ Convolves the grid with a square kernel of ones, giving for every cell
+        the sum of the cells within radius of it. Uses a summed-area table, so
+        the cost does not depend on the radius.
+
+    Parameters:
+        grid: A (rows, columns) array of counts.
+        radius: How many cells away from each cell to sum over.
+
+    Returns:
+        A (rows, columns) array of window sums.
+    """
+    rows, cols = grid.shape
+    width = 2 * radius + 1
+    table = np.zeros((rows + width, cols + width), dtype=np.int32)
+    table[radius + 1:radius + 1 + rows, radius + 1:radius + 1 + cols] = grid
+    table = table.cumsum(axis=0).cumsum(axis=1)
+    return (table[width:, width:] - table[:-width, width:]
+            - table[width:, :-width] + table[:-width, :-width])
+
+
+class Devices:
+    """ The automation devices placed on a farm. The area each type of device
+        reaches is computed for the whole grid at once, so the daily cost
+        barely depends on how many devices there are.
+    """
+
+    def __init__(self) -> None:
+        """ Constructor for an empty set of devices. """
+        self._devices = {}
+        self._coverage = {}
+
+    def get_devices(self) -> dict[tuple[int, int], str]:
+        """ Returns the devices, as a dictionary mapping positions to device
+            types.
+        """
+        return self._devices
+
+    def has(self, kind: str) -> bool:
+        """ Returns True iff at least one device of the given type is placed. """
+        return kind in self._devices.values()
+
+    def add(self, position: tuple[int, int], kind: str) -> bool:
+        """ Places a device at the given position, if there isn't one there.
+
+        Parameters:
+            position: The (row, col) position to place the device at.
+            kind: The type of device, one of SPRINKLER, HARVESTER or TILLER.
+
+        Returns:
+            True if the device was placed, False if there is already a device
+            there or the type is unknown.
+        """
+        if position in self._devices or kind not in DEVICE_RADII:
+            return False
+        self._devices[position] = kind
+        self._coverage.pop(kind, None)
+        return True
+
+    def remove(self, position: tuple[int, int]) -> Optional[str]:
+        """ Removes the device at the given position, if there is one.
+
+        Returns:
+            The type of the removed device, or None if there was none.
+        """
+        kind = self._devices.pop(position, None)
+        self._coverage.pop(kind, None)
+        return kind
+
+    def coverage(self, kind: str, dimensions: tuple[int, int]) -> np.ndarray:
+        """ Returns a (rows, columns) boolean mask of the cells reached by at
+            least one device of the given type. Masks are cached until a device
+            of that type is added or removed.
+        """
+        mask = self._coverage.get(kind)
+        if mask is None or mask.shape != dimensions:
+            counts = np.zeros(dimensions, dtype=np.int32)
+            positions = [pos for pos, other in self._devices.items()
+                         if other == kind]
+            if positions:
+                rows, cols = np.array(positions).T
+                np.add.at(counts, (rows, cols), 1)
+            mask = box_sum(counts, DEVICE_RADII[kind]) > 0
+            self._coverage[kind] = mask
+        return mask
@@ -0,0 +1,485 @@
+import argparse
+import time
+from typing import Optional
+import numpy as np
+from constants import *
+from model import *
+from map_io import read_map
+from plant_store import age_slots
+import actions
+
+# Keys that can be pressed in an environment, with the moves first
+ACTION_KEYS = [UP, LEFT, DOWN, RIGHT, PLANT_KEY, HARVEST_KEY, REMOVE_KEY,
+               TILL_KEY, UNTILL_KEY]
+
+# The discrete action space shared by FarmEnv and VecFarmEnv. Each action is
+# the name of the action followed by its argument, if any.
+ENV_ACTIONS = ([('keypress', key) for key in ACTION_KEYS]
+               + [('select', item) for item in ITEMS]
+               + [('buy', item) for item in ITEMS]
+               + [('sell', item) for item in ITEMS]
+               + [('next_day',)])
+
+# Directions in the order of their codes in observations
+DIRECTIONS = list(MOVE_DELTAS)
+
+# Number of days in an episode before it ends
+MAX_DAYS = 100
+
+
+def _player_observation(
+        row: np.ndarray,
+        col: np.ndarray,
+        direction: np.ndarray,
+        energy: np.ndarray,
+        money: np.ndarray,
+        day: np.ndarray,
+        selected: np.ndarray,
+        inventory: np.ndarray
+    ) -> np.ndarray:
+    """ Returns the player part of an observation: the player's row, column,
+        direction code, energy, money, day and selected item index (-1 if none)
+        followed by the amount of each item in ITEMS.
+    """
+    scalars = np.stack([row, col, direction, energy, money, day, selected],
+                       axis=-1)
+    return np.concatenate([scalars, inventory], axis=-1).astype(np.int64)
+
+
+class FarmEnv:
+    """ A gym-style environment around a single FarmModel. Actions are indices
+        into ENV_ACTIONS and are applied through the same code as the game's
+        controls. The reward for a step is the change in the player's money.
+
+        Observations are dictionaries of arrays:
+            'tiles': (rows, cols) tile character codes.
+            'plant_kind': (rows, cols) plant kind codes, 0 where there is none.
+            'plant_stage': (rows, cols) plant stages, 0 where there is none.
+            'player': player scalars and inventory, see _player_observation.
+    """
+
+    def __init__(
+            self,
+            map_file: str | list[str],
+            weather_seed: Optional[int] = None,
+            max_days: int = MAX_DAYS
+        ) -> None:
+        """ Constructor for the environment.
+
+        Parameters:
+            map_file: The path to the map file, or the rows of the map.
+            weather_seed: The seed of the weather to grow plants under, or None
+                          for plants to grow one stage-day per day.
+            max_days: The number of days in an episode.
+        """
+        self._map = read_map(map_file) if isinstance(map_file, str) \
+            else list(map_file)
+        self._weather_seed = weather_seed
+        self._max_days = max_days
+        self.reset()
+
+    def get_model(self) -> FarmModel:
+        """ Returns the model of the current episode. """
+        return self._model
+
+    def reset(self) -> dict[str, np.ndarray]:
+        """ Starts a new episode and returns its first observation. """
+        weather = None
+        if self._weather_seed is not None:
+            weather = Weather(self._weather_seed)
+        self._model = FarmModel(self._map, weather)
+        return self.observe()
+
+    def observe(self) -> dict[str, np.ndarray]:
+        """ Returns an observation of the current state of the farm. """
+        model = self._model
+        store = model.get_plant_store()
+        slots = store.occupied()
+        rows, cols = store.row[slots], store.col[slots]
+        kind = np.zeros(model.get_dimensions(), dtype=np.int8)
+        stage = np.zeros(model.get_dimensions(), dtype=np.int8)
+        kind[rows, cols] = store.kind[slots]
+        stage[rows, cols] = store.stage[slots]
+
+        player = model.get_player()
+        inventory = player.get_inventory()
+        selected = player.get_selected_item()
+        return {
+            'tiles': model.get_tile_array().copy(),
+            'plant_kind': kind,
+            'plant_stage': stage,
+            'player': _player_observation(
+                *player.get_position(),
+                DIRECTIONS.index(player.get_direction()),
+                player.get_energy(),
+                player.get_money(),
+                model.get_days_elapsed(),
+                -1 if selected is None else ITEMS.index(selected),
+                np.array([inventory.get(item, 0) for item in ITEMS])
+            ),
+        }
+
+    def step(self, action: int) -> tuple[dict, float, bool, dict]:
+        """ Applies an action to the farm.
+
+        Parameters:
+            action: The index of the action in ENV_ACTIONS.
+
+        Returns:
+            The observation after the action, the reward, whether the episode
+            has ended, and a dictionary of extra information (always empty).
+        """
+        model = self._model
+        player = model.get_player()
+        money = player.get_money()
+
+        name, *args = ENV_ACTIONS[action]
+        # Actions are applied directly rather than through actions.perform,
+        # so no undo history builds up over an episode
+        if name == 'select':
+            player.select_item(*args)
+        elif name == 'keypress':
+            actions.apply_keypress(model, *args, player.get_selected_item())
+        else:
+            actions.ACTIONS[name](model, *args)
+
+        done = model.get_days_elapsed() > self._max_days
+        return self.observe(), float(player.get_money() - money), done, {}
+
+
+def _action_table(values: dict, default) -> np.ndarray:
+    """ Returns an array with a value for each action in ENV_ACTIONS, looked
+        up by action argument in the given dictionary.
+    """
+    return np.array([values.get(action[-1], default)
+                     for action in ENV_ACTIONS])
+
+
+# Action types, and the type of each action in ENV_ACTIONS
+_MOVE, _PLANT, _HARVEST, _REMOVE, _TILL, _UNTILL = range(6)
+_SELECT, _BUY, _SELL, _NEXT_DAY = range(6, 10)
+_KEY_TYPES = {PLANT_KEY: _PLANT, HARVEST_KEY: _HARVEST, REMOVE_KEY: _REMOVE,
+              TILL_KEY: _TILL, UNTILL_KEY: _UNTILL}
+_ACTION_TYPE = np.array([
+    (_KEY_TYPES.get(action[1], _MOVE) if action[0] == 'keypress'
+     else {'select': _SELECT, 'buy': _BUY, 'sell': _SELL,
+           'next_day': _NEXT_DAY}[action[0]])
+    for action in ENV_ACTIONS
+])
+
+# Per-action lookups: move deltas and directions, and item indices and prices
+_ROW_DELTA = _action_table({key: d[0] for key, d in MOVE_DELTAS.items()}, 0)
+_COL_DELTA = _action_table({key: d[1] for key, d in MOVE_DELTAS.items()}, 0)
+_DIRECTION = _action_table(
+    {key: DIRECTIONS.index(key) for key in MOVE_DELTAS}, 0)
+_ITEM = _action_table({item: ITEMS.index(item) for item in ITEMS}, 0)
+_BUY_PRICE = _action_table(BUY_PRICES, -1)
+_SELL_PRICE = _action_table(SELL_PRICES, -1)
+
+# Per-kind plant lookups, indexed by kind code (0 for no plant)
+_HARVEST_STAGE = np.array(
+    [-1] + [plant_type._HARVEST_STAGE for plant_type in PLANT_TYPES])
+_REGROW_STAGE = np.array(
+    [0] + [plant_type._REGROW_STAGE or 0 for plant_type in PLANT_TYPES])
+_YIELD = np.array([0] + [plant_type._YIELD for plant_type in PLANT_TYPES])
+_REMOVED = np.array(
+    [False] + [plant_type().remove_on_harvest() for plant_type in PLANT_TYPES])
+_PRODUCE_ITEM = np.array(
+    [0] + [ITEMS.index(plant_type._PRODUCE) for plant_type in PLANT_TYPES])
+
+# Kind code planted by each item, 0 for items that are not seeds
+_SEED_KIND = np.array([
+    [plant_type._PRODUCE for plant_type in PLANT_TYPES].index(
+        item.split(' ')[0]) + 1 if item in SEEDS else 0
+    for item in ITEMS
+])
+
+
+class VecFarmEnv:
+    """ A batch of farms stepped in lockstep, with the same actions, rules and
+        observations as FarmEnv. The state of every farm is held in arrays with
+        the farm as the first axis, so each step is a fixed number of array
+        operations however many farms there are. Episodes that end are
+        restarted automatically.
+
+        Observations have the layout of FarmEnv's with an extra leading axis,
+        and the grid arrays are views of the environment's state, which are
+        only valid until the next step and must not be modified.
+    """
+
+    def __init__(
+            self,
+            map_file: str | list[str],
+            num_envs: int,
+            weather_seed: Optional[int] = None,
+            max_days: int = MAX_DAYS
+        ) -> None:
+        """ Constructor for the batch of environments.
+
+        Parameters:
+            map_file: The path to the map file, or the rows of the map.
+            num_envs: The number of farms in the batch.
+            weather_seed: As for FarmEnv. Every farm shares the same weather.
+            max_days: The number of days in an episode.
+        """
+        model = FarmModel(read_map(map_file) if isinstance(map_file, str)
+                          else list(map_file))
+        self._num_envs = num_envs
+        self._rows, self._cols = model.get_dimensions()
+        self._weather = None if weather_seed is None else Weather(weather_seed)
+        self._max_days = max_days
+        self._start_tiles = model.get_tile_array().ravel()
+
+        # Starting state of the player, taken from a new model
+        player = model.get_player()
+        self._start_inventory = np.array(
+            [player.get_inventory().get(item, 0) for item in ITEMS])
+        self._start_position = player.get_position()
+        self._start_direction = DIRECTIONS.index(player.get_direction())
+        self._start_energy = player.get_start_energy()
+        self._start_money = player.get_money()
+        self._start_day = model.get_days_elapsed()
+
+        # Cells of every farm, flattened so that a cell's index is
+        # (farm * rows + row) * cols + col. Plant columns match a PlantStore,
+        # and the stage of an empty cell is kept at 0 for observations.
+        cells = num_envs * self._rows * self._cols
+        self.tiles = np.empty(cells, dtype=np.uint8)
+        for name, dtype in PlantStore.COLUMNS.items():
+            if name not in ('row', 'col'):
+                setattr(self, name, np.zeros(cells, dtype=dtype))
+
+        self.row = np.zeros(num_envs, dtype=np.int32)
+        self.col = np.zeros(num_envs, dtype=np.int32)
+        self.direction = np.zeros(num_envs, dtype=np.int32)
+        self.energy = np.zeros(num_envs, dtype=np.int32)
+        self.money = np.zeros(num_envs, dtype=np.int64)
+        self.day = np.zeros(num_envs, dtype=np.int32)
+        self.selected = np.zeros(num_envs, dtype=np.int32)
+        self.inventory = np.zeros((num_envs, len(ITEMS)), dtype=np.int64)
+        self.reset()
+
+    def __len__(self) -> int:
+        """ Returns the number of farms in the batch. """
+        return self._num_envs
+
+    def reset(self, envs: Optional[np.ndarray] = None) -> dict:
+        """ Starts new episodes and returns an observation of every farm.
+
+        Parameters:
+            envs: The indices of the farms to restart, or None for all farms.
+        """
+        if envs is None:
+            envs = np.arange(self._num_envs)
+        if len(envs):
+            size = self._rows * self._cols
+            grids = self.tiles.reshape(self._num_envs, size)
+            grids[envs] = self._start_tiles
+            self.kind.reshape(self._num_envs, size)[envs] = 0
+            self.stage.reshape(self._num_envs, size)[envs] = 0
+
+            self.row[envs], self.col[envs] = self._start_position
+            self.direction[envs] = self._start_direction
+            self.energy[envs] = self._start_energy
+            self.money[envs] = self._start_money
+            self.day[envs] = self._start_day
+            self.selected[envs] = -1
+            self.inventory[envs] = self._start_inventory
+        return self.observe()
+
+    def observe(self) -> dict[str, np.ndarray]:
+        """ Returns an observation of every farm. """
+        shape = (self._num_envs, self._rows, self._cols)
+        return {
+            'tiles': self.tiles.reshape(shape),
+            'plant_kind': self.kind.reshape(shape),
+            'plant_stage': self.stage.reshape(shape),
+            'player': _player_observation(
+                self.row, self.col, self.direction, self.energy, self.money,
+                self.day, self.selected, self.inventory),
+        }
+
+    def _cells(self, envs: np.ndarray) -> np.ndarray:
+        """ Returns the index of the cell each given farm's player is on. """
+        return (envs * self._rows + self.row[envs]) * self._cols \
+            + self.col[envs]
+
+    def step(
+            self,
+            env_actions: np.ndarray
+        ) -> tuple[dict, np.ndarray, np.ndarray, dict]:
+        """ Applies one action to every farm.
+
+        Parameters:
+            env_actions: The index in ENV_ACTIONS of each farm's action.
+
+        Returns:
+            The observations after the actions, the reward of each farm,
+            whether each farm's episode ended (in which case it has been
+            restarted and its observation is of the new episode), and a
+            dictionary of extra information (always empty).
+        """
+        env_actions = np.asarray(env_actions)
+        types = _ACTION_TYPE[env_actions]
+        money = self.money.copy()
+
+        for action_type, apply in self._APPLY.items():
+            envs = np.flatnonzero(types == action_type)
+            if len(envs):
+                apply(self, envs, env_actions[envs])
+
+        done = self.day > self._max_days
+        reward = (self.money - money).astype(np.float32)
+        return self.reset(np.flatnonzero(done)), reward, done, {}
+
+    def _move(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        able = self.energy[envs] >= MOVE_COST
+        envs, env_actions = envs[able], env_actions[able]
+        row = np.clip(self.row[envs] + _ROW_DELTA[env_actions],
+                      0, self._rows - 1)
+        col = np.clip(self.col[envs] + _COL_DELTA[env_actions],
+                      0, self._cols - 1)
+        moved = (row != self.row[envs]) | (col != self.col[envs])
+        self.row[envs], self.col[envs] = row, col
+        self.direction[envs] = _DIRECTION[env_actions]
+        self.energy[envs] -= MOVE_COST * moved
+
+    def _plant(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        item = np.maximum(self.selected[envs], 0)
+        cells = self._cells(envs)
+        tile = self.tiles[cells]
+        able = ((self.selected[envs] >= 0)
+                & (_SEED_KIND[item] != 0)
+                & (self.inventory[envs, item] > 0)
+                & ((tile == ord(UNTILLED)) | (tile == ord(SOIL)))
+                & (self.energy[envs] >= PLANT_COST)
+                & (self.kind[cells] == 0))
+        envs, cells, item = envs[able], cells[able], item[able]
+        self.kind[cells] = _SEED_KIND[item]
+        self.stage[cells] = 1
+        self.days[cells] = 0
+        self.since_harvest[cells] = 0
+        self.growth[cells] = 0.0
+        self.quality[cells] = 1.0
+        self.inventory[envs, item] -= 1
+        self.energy[envs] -= PLANT_COST
+
+    def _harvest(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        cells = self._cells(envs)
+        kind = self.kind[cells]
+        able = ((self.energy[envs] >= HARVEST_COST)
+                & (self.stage[cells] == _HARVEST_STAGE[kind]))
+        envs, cells, kind = envs[able], cells[able], kind[able]
+
+        amount = np.maximum(1, np.floor(
+            _YIELD[kind] * self.quality[cells].astype(np.float64) + 0.5
+        ).astype(np.int64))
+        self.inventory[envs, _PRODUCE_ITEM[kind]] += amount
+
+        # Plants removed on harvest also cost the energy of removing them
+        removed = _REMOVED[kind] & (self.energy[envs] >= REMOVE_COST)
+        self.kind[cells[removed]] = 0
+        self.stage[cells[removed]] = 0
+        regrow = cells[~_REMOVED[kind]]
+        self.stage[regrow] = _REGROW_STAGE[self.kind[regrow]]
+        self.since_harvest[regrow] = 0
+        self.energy[envs] -= HARVEST_COST + REMOVE_COST * removed
+
+    def _remove(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        cells = self._cells(envs)
+        able = (self.energy[envs] >= REMOVE_COST) & (self.kind[cells] != 0)
+        self.kind[cells[able]] = 0
+        self.stage[cells[able]] = 0
+        self.energy[envs[able]] -= REMOVE_COST
+
+    def _till(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        cells = self._cells(envs)
+        able = ((self.energy[envs] >= TILL_COST)
+                & (self.tiles[cells] == ord(UNTILLED)))
+        self.tiles[cells[able]] = ord(SOIL)
+        self.energy[envs[able]] -= TILL_COST
+
+    def _untill(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        cells = self._cells(envs)
+        able = ((self.energy[envs] >= UNTILL_COST)
+                & (self.kind[cells] == 0)
+                & (self.tiles[cells] == ord(SOIL)))
+        self.tiles[cells[able]] = ord(UNTILLED)
+        self.energy[envs[able]] -= UNTILL_COST
+
+    def _select(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        item = _ITEM[env_actions]
+        able = self.inventory[envs, item] > 0
+        self.selected[envs[able]] = item[able]
+
+    def _buy(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        price = _BUY_PRICE[env_actions]
+        able = (price >= 0) & (self.money[envs] >= price)
+        envs = envs[able]
+        self.money[envs] -= price[able]
+        self.inventory[envs, _ITEM[env_actions[able]]] += 1
+
+    def _sell(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        price, item = _SELL_PRICE[env_actions], _ITEM[env_actions]
+        able = (price >= 0) & (self.inventory[envs, item] > 0)
+        envs = envs[able]
+        self.money[envs] += price[able]
+        self.inventory[envs, item[able]] -= 1
+
+    def _next_day(self, envs: np.ndarray, env_actions: np.ndarray) -> None:
+        size = self._rows * self._cols
+        farms, cells = np.nonzero(self.kind.reshape(-1, size)[envs])
+        slots = envs[farms] * size + cells
+
+        rate, yields = 1.0, 1.0
+        if self._weather is not None:
+            days, day_index = np.unique(self.day[envs], return_inverse=True)
+            tables = [self._weather.get_tables(int(day)) for day in days]
+            growth = np.stack([growth for growth, _ in tables])
+            yield_table = np.stack([yield_table for _, yield_table in tables])
+            tiles = self.tiles[slots]
+            rate = growth[day_index[farms], tiles]
+            yields = yield_table[day_index[farms], tiles]
+        age_slots(self, PLANT_TYPES, slots, rate, yields)
+
+        self.day[envs] += 1
+        self.energy[envs] = self._start_energy
+
+    # How each type of action is applied to the farms taking it
+    _APPLY = {
+        _MOVE: _move,
+        _PLANT: _plant,
+        _HARVEST: _harvest,
+        _REMOVE: _remove,
+        _TILL: _till,
+        _UNTILL: _untill,
+        _SELECT: _select,
+        _BUY: _buy,
+        _SELL: _sell,
+        _NEXT_DAY: _next_day,
+    }
+
+
+def main() -> None:
+    """ Measures the throughput of a batch of environments taking random
+        actions on the map given on the command line.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark VecFarmEnv.')
+    parser.add_argument('map_file', help='the map file to use')
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    env = VecFarmEnv(args.map_file, args.envs)
+    rng = np.random.default_rng(args.seed)
+    batches = rng.integers(0, len(ENV_ACTIONS), size=(args.steps, args.envs))
+    start = time.perf_counter()
+    for env_actions in batches:
+        env.step(env_actions)
+    elapsed = time.perf_counter() - start
+    print(f'{args.envs * args.steps / elapsed:,.0f} env-steps/s')
+
+
+if __name__ == '__main__':
+    main()
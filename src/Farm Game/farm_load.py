@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+import numpy as np
+from constants import *
+from farm_server import FarmClient, FarmServer
+
+# The default load: the number of concurrent sessions, the batches each
+# sends, and the actions in each batch
+LOAD_SESSIONS = 100
+LOAD_BATCHES = 20
+LOAD_BATCH_SIZE = 10
+
+# Keypresses chosen from for random actions, weighted towards moving
+_KEYS = [*MOVE_DELTAS] * 2 + [TILL_KEY, PLANT_KEY, HARVEST_KEY, REMOVE_KEY]
+
+
+def load_map(size: int) -> list[str]:
+    """ Returns the map of each session: untilled soil crossed by a grass
+        path every few columns, so random actions have crops to tend.
+    """
+    row = ''.join(GRASS if col % 4 == 3 else UNTILLED for col in range(size))
+    return [row] * size
+
+
+def random_actions(rng: random.Random, count: int) -> list[list]:
+    """ Returns a batch of random actions, like a player's: mostly moving,
+        tilling, planting and harvesting, with some buying, selling and an
+        occasional new day.
+    """
+    actions = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            actions.append(['next_day'])
+        elif roll < 0.15:
+            actions.append(['buy', rng.choice(SEEDS), 1])
+        elif roll < 0.2:
+            actions.append(['sell', rng.choice(ITEMS), None])
+        else:
+            actions.append(['keypress', rng.choice(_KEYS), rng.choice(SEEDS)])
+    return actions
+
+
+async def _run_session(
+        connect: Callable[[], Awaitable[FarmClient]],
+        batches: int,
+        batch_size: int,
+        size: int,
+        seed: int,
+        latencies: list[float]
+    ) -> int:
+    """ Runs one session on its own connection, adding the latency of each
+        batch to latencies, and returns the number of actions sent.
+    """
+    rng = random.Random(seed)
+    client = await connect()
+    try:
+        session, _ = await client.open(load_map(size))
+        for _ in range(batches):
+            actions = random_actions(rng, batch_size)
+            start = time.perf_counter()
+            await client.act(session, actions)
+            latencies.append(time.perf_counter() - start)
+        await client.close_session(session)
+    finally:
+        await client.close()
+    return batches * batch_size
+
+
+async def run_load(
+        connect: Callable[[], Awaitable[FarmClient]],
+        sessions: int = LOAD_SESSIONS,
+        batches: int = LOAD_BATCHES,
+        batch_size: int = LOAD_BATCH_SIZE,
+        size: int = SESSION_MAP_SIZE,
+        seed: int = 0
+    ) -> dict[str, float]:
+    """ Runs concurrent sessions against a server, each sending batches of
+        random actions and waiting for each reply before the next.
+
+    Parameters:
+        connect: Opens a new connection to the server.
+        sessions: The number of concurrent sessions.
+        batches: The number of batches each session sends.
+        batch_size: The number of actions in each batch.
+        size: The map size of each session's farm (see load_map).
+        seed: The seed of the first session's actions; each session uses the
+              next.
+
+    Returns:
+        The totals and the rates of actions and batches per second, and the
+        percentiles of the batch latency in ms.
+    """
+    latencies = []
+    start = time.perf_counter()
+    actions = await asyncio.gather(*(
+        _run_session(connect, batches, batch_size, size, seed + index,
+                     latencies)
+        for index in range(sessions)))
+    seconds = time.perf_counter() - start
+    results = {
+        'sessions': sessions,
+        'actions': sum(actions),
+        'seconds': seconds,
+        'actions_per_second': sum(actions) / seconds,
+        'batches_per_second': len(latencies) / seconds,
+    }
+    for percentile in METRICS_PERCENTILES:
+        results[f'latency_p{percentile}_ms'] = float(
+            np.percentile(latencies, percentile) * 1000)
+    return results
+
+
+async def _run(args: argparse.Namespace) -> dict[str, float]:
+    """ Runs the load from the command line, against a server started here
+        if --shards is given.
+    """
+    server = None
+    if args.shards is not None:
+        server = FarmServer(args.shards)
+        await server.start(args.unix, args.host, args.port)
+    try:
+        return await run_load(
+            lambda: FarmClient.connect(args.unix, args.host, args.port),
+            args.sessions, args.batches, args.batch_size, args.size,
+            args.seed)
+    finally:
+        if server is not None:
+            await server.close()
+
+
+def main() -> None:
+    """ Measures the throughput of a farm server from the command line. """
+    parser = argparse.ArgumentParser(
+        description='Generate load on a farm server.')
+    parser.add_argument('--unix', help='connect to a Unix socket at this '
+                                       'path instead of TCP')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--shards', type=int,
+                        help='start a server with this many worker '
+                             'processes, rather than use a running one')
+    parser.add_argument('--sessions', type=int, default=LOAD_SESSIONS)
+    parser.add_argument('--batches', type=int, default=LOAD_BATCHES)
+    parser.add_argument('--batch-size', type=int, default=LOAD_BATCH_SIZE)
+    parser.add_argument('--size', type=int, default=SESSION_MAP_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = asyncio.run(_run(args))
+    for name, value in results.items():
+        print(f'{name:<22} {value:12,.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,487 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+import numpy as np
+from constants import *
+from model import *
+from actions import perform
+from savegame import Autosaver, SaveSnapshot
+import tracing
+
+DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+DEVICE_TYPES = list(DEVICE_RADII)
+
+# Slots in the control block shared by both buffers
+FRONT, SEQUENCE, READING = range(3)
+
+# Slots in the scalar block of each buffer
+(PLANT_COUNT, DAY, MONEY, ENERGY, PLAYER_ROW, PLAYER_COL, DIRECTION,
+ INVENTORY_VERSION) = range(8)
+
+# Command asking the simulation to save its model to the given path, in the
+# background, as ('save', path)
+SAVE_COMMAND = 'save'
+
+# How long the simulation waits before retrying a publish the UI blocked
+RETRY_INTERVAL = 0.005
+
+# How long the UI waits for the simulation to start and to shut down
+START_TIMEOUT = 30
+CLOSE_TIMEOUT = 5
+
+
+def _layout(rows: int, cols: int) -> tuple[dict[str, tuple], int]:
+    """ Returns the (dtype, shape, offset) of each array in a farm buffer for
+        a map of the given dimensions, and the total size of the buffer.
+    """
+    cells = rows * cols
+    fields = [
+        ('scalars', np.int64, (8,)),
+        ('inventory', np.int64, (len(INVENTORY_ITEMS),)),
+        ('prices', np.int64, (len(ITEMS),)),
+        ('plant_row', np.int32, (cells,)),
+        ('plant_col', np.int32, (cells,)),
+        ('tiles', np.uint8, (rows, cols)),
+        ('devices', np.uint8, (rows, cols)),
+        ('plant_kind', np.int8, (cells,)),
+        ('plant_stage', np.int8, (cells,)),
+    ]
+    layout, offset = {}, 0
+    for name, dtype, shape in fields:
+        layout[name] = (dtype, shape, offset)
+        offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+    return layout, offset
+
+
+class FarmBuffer:
+    """ One copy of the farm state in shared memory, viewed as NumPy arrays. """
+
+    def __init__(
+            self,
+            rows: int,
+            cols: int,
+            name: Optional[str] = None
+        ) -> None:
+        """ Creates a new buffer, or attaches to an existing one.
+
+        Parameters:
+            rows, cols: The dimensions of the map.
+            name: The name of the shared memory block to attach to. If None,
+                  a new block is created.
+        """
+        layout, size = _layout(rows, cols)
+        self._owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self._owner, size=size)
+        for field, (dtype, shape, offset) in layout.items():
+            setattr(self, field, np.ndarray(
+                shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+
+    def write(self, model: FarmModel) -> None:
+        """ Copies the state of the model into this buffer. """
+        self.tiles[:] = model.get_tile_array()
+        self.devices[:] = 0
+        for (row, col), kind in model.get_devices().items():
+            self.devices[row, col] = DEVICE_TYPES.index(kind) + 1
+
+        store = model.get_plant_store()
+        slots = store.occupied()
+        count = len(slots)
+        self.plant_kind[:count] = store.kind[slots]
+        self.plant_stage[:count] = store.stage[slots]
+        self.plant_row[:count] = store.row[slots]
+        self.plant_col[:count] = store.col[slots]
+
+        player = model.get_player()
+        inventory = player.get_inventory()
+        self.inventory[:] = inventory.get_amounts()
+        self.prices[:] = [model.get_sell_price(item) or 0 for item in ITEMS]
+        row, col = player.get_position()
+        self.scalars[:] = [
+            count, model.get_days_elapsed(), player.get_money(),
+            player.get_energy(), row, col,
+            DIRECTIONS.index(player.get_direction()), inventory.get_version()
+        ]
+
+    def close(self) -> None:
+        """ Detaches from the buffer, freeing it if this process created it. """
+        for field in _layout(0, 0)[0]:
+            delattr(self, field)
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+class _PlantView:
+    """ The name and stage of a plant in a snapshot. """
+
+    def __init__(self, name: str, stage: int) -> None:
+        self._name = name
+        self._stage = stage
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_stage(self) -> int:
+        return self._stage
+
+
+class _PlayerView:
+    """ The player's state in a snapshot. """
+
+    def __init__(self, buffer: FarmBuffer) -> None:
+        self._buffer = buffer
+
+    def get_money(self) -> int:
+        return int(self._buffer.scalars[MONEY])
+
+    def get_energy(self) -> int:
+        return int(self._buffer.scalars[ENERGY])
+
+    def get_position(self) -> tuple[int, int]:
+        scalars = self._buffer.scalars
+        return int(scalars[PLAYER_ROW]), int(scalars[PLAYER_COL])
+
+    def get_direction(self) -> str:
+        return DIRECTIONS[self._buffer.scalars[DIRECTION]]
+
+    def get_inventory(self) -> Inventory:
+        amounts = {item: int(amount) for item, amount
+                   in zip(INVENTORY_ITEMS, self._buffer.inventory)}
+        return Inventory(INVENTORY_ITEMS, amounts,
+                         int(self._buffer.scalars[INVENTORY_VERSION]))
+
+
+class FarmSnapshot:
+    """ A read-only view of the farm state published by the simulation. It
+        reads the shared buffer directly, with the same getters as FarmModel.
+        The simulation will not write to the buffer until the snapshot is
+        released.
+    """
+
+    def __init__(
+            self,
+            buffer: FarmBuffer,
+            weather: Optional[Weather] = None
+        ) -> None:
+        self._buffer = buffer
+        self._weather = weather
+        self._player = _PlayerView(buffer)
+        self._map = None
+        self._plants = None
+
+    def get_tile_array(self) -> np.ndarray:
+        """ Returns the map as a (rows, columns) array of tile character codes.
+        """
+        return self._buffer.tiles
+
+    def get_plant_arrays(self) -> tuple[np.ndarray, ...]:
+        """ Returns the (kind, stage, row, col) arrays of the plants. """
+        count = self._buffer.scalars[PLANT_COUNT]
+        buffer = self._buffer
+        return (buffer.plant_kind[:count], buffer.plant_stage[:count],
+                buffer.plant_row[:count], buffer.plant_col[:count])
+
+    def get_map(self) -> list[str]:
+        if self._map is None:
+            self._map = [row.tobytes().decode('ascii')
+                         for row in self._buffer.tiles]
+        return self._map
+
+    def get_plants(self) -> dict[tuple[int, int], _PlantView]:
+        if self._plants is None:
+            names = [plant_type._NAME for plant_type in PLANT_TYPES]
+            self._plants = {
+                (int(row), int(col)): _PlantView(names[kind - 1], int(stage))
+                for kind, stage, row, col in zip(*self.get_plant_arrays())
+            }
+        return self._plants
+
+    def get_devices(self) -> dict[tuple[int, int], str]:
+        rows, cols = np.nonzero(self._buffer.devices)
+        kinds = self._buffer.devices[rows, cols]
+        return {(int(row), int(col)): DEVICE_TYPES[kind - 1]
+                for row, col, kind in zip(rows, cols, kinds)}
+
+    def get_weather(self) -> Optional[Weather]:
+        return self._weather
+
+    def get_sell_price(self, item_name: str) -> Optional[int]:
+        if item_name not in SELL_PRICES:
+            return None
+        return int(self._buffer.prices[ITEMS.index(item_name)])
+
+    def get_dimensions(self) -> tuple[int, int]:
+        return self._buffer.tiles.shape
+
+    def get_days_elapsed(self) -> int:
+        return int(self._buffer.scalars[DAY])
+
+    def get_player(self) -> _PlayerView:
+        return self._player
+
+    def get_player_position(self) -> tuple[int, int]:
+        return self._player.get_position()
+
+    def get_player_direction(self) -> str:
+        return self._player.get_direction()
+
+
+def _publish(
+        model: FarmModel,
+        buffers: list[FarmBuffer],
+        control: np.ndarray
+    ) -> bool:
+    """ Writes the model into the back buffer and makes it the front buffer.
+
+    Returns:
+        True if the state was published, False if the UI was still reading the
+        back buffer.
+    """
+    back = 1 - control[FRONT]
+    if control[READING] == back:
+        return False
+    buffers[back].write(model)
+    control[SEQUENCE] += 1
+    control[FRONT] = back
+    return True
+
+
+def _report_save_errors(savers: dict, replies: mp.Queue) -> None:
+    """ Reports the errors from the simulation's autosavers on the replies
+        queue.
+    """
+    for saver in savers.values():
+        for error in saver.get_errors():
+            replies.put(('error', f'save {saver.get_path()}: {error}'))
+
+
+def _simulate(
+        map_file: str,
+        weather_seed: Optional[int],
+        use_market: bool,
+        commands: mp.Queue,
+        replies: mp.Queue
+    ) -> None:
+    """ Runs the model in the simulation process, applying commands from the
+        UI and publishing the state after each batch of commands. Errors are
+        reported on the replies queue as ('error', message).
+    """
+    try:
+        weather = None if weather_seed is None else Weather(weather_seed)
+        model = FarmModel(map_file, weather, Market() if use_market else None)
+    except Exception as error:
+        replies.put(('error', repr(error)))
+        return
+
+    rows, cols = model.get_dimensions()
+    buffers = []
+    savers = {}
+    control_shm = shared_memory.SharedMemory(create=True, size=3 * 8)
+    try:
+        control = np.ndarray((3,), dtype=np.int64, buffer=control_shm.buf)
+        control[:] = [1, 0, -1]
+        buffers.extend(FarmBuffer(rows, cols) for _ in range(2))
+        _publish(model, buffers, control)
+        replies.put(('ready', rows, cols, control_shm.name,
+                     [buffer.shm.name for buffer in buffers]))
+
+        pending = False
+        running = True
+        while running:
+            batch = []
+            try:
+                timeout = RETRY_INTERVAL if pending else None
+                batch.append(commands.get(timeout=timeout))
+                while True:
+                    batch.append(commands.get_nowait())
+            except queue.Empty:
+                pass
+            for command in batch:
+                if command is None:
+                    running = False
+                    break
+                if command[0] == SAVE_COMMAND:
+                    _, path = command
+                    if path not in savers:
+                        savers[path] = Autosaver(path)
+                    savers[path].submit(SaveSnapshot(model))
+                    continue
+                try:
+                    perform(model, *command)
+                except Exception as error:
+                    replies.put(('error', f'{command!r}: {error!r}'))
+                pending = True
+            if pending:
+                pending = not _publish(model, buffers, control)
+            _report_save_errors(savers, replies)
+        del control
+    finally:
+        for saver in savers.values():
+            saver.close()
+        _report_save_errors(savers, replies)
+        for buffer in buffers:
+            buffer.close()
+        control_shm.close()
+        control_shm.unlink()
+        tracing.export()
+    replies.put(('closed',))
+
+
+class FarmProcess:
+    """ Runs a FarmModel in a separate process. The process publishes the farm
+        state through double-buffered shared memory and takes commands from a
+        queue, so heavy model work never blocks the Tk thread.
+    """
+
+    def __init__(
+            self,
+            map_file: str,
+            weather_seed: Optional[int] = None,
+            use_market: bool = False
+        ) -> None:
+        """ Starts the simulation process and waits until it has published the
+            initial state.
+
+        Parameters:
+            map_file: The path to the map the model is created with.
+            weather_seed: Seed for the model's weather timeline, or None for
+                          no weather.
+            use_market: Whether the model sells to a Market.
+
+        Raises:
+            RuntimeError: If the simulation could not create the model.
+        """
+        context = mp.get_context('spawn')
+        self._commands = context.Queue()
+        self._replies = context.Queue()
+        self._errors = []
+        self._process = context.Process(
+            target=_simulate,
+            args=(map_file, weather_seed, use_market, self._commands,
+                  self._replies),
+            daemon=True
+        )
+        self._process.start()
+
+        reply = self._wait_for(('ready',), START_TIMEOUT)
+        if reply is None:
+            self._process.join(CLOSE_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+            raise RuntimeError(
+                f'Simulation failed to start: {"; ".join(self._errors)}')
+
+        _, rows, cols, control_name, buffer_names = reply
+        self._control_shm = shared_memory.SharedMemory(name=control_name)
+        self._control = np.ndarray(
+            (3,), dtype=np.int64, buffer=self._control_shm.buf)
+        self._buffers = [FarmBuffer(rows, cols, name)
+                         for name in buffer_names]
+        # The weather only depends on its seed, so the UI keeps its own copy
+        self._weather = None
+        if weather_seed is not None:
+            self._weather = Weather(weather_seed)
+        self._snapshot = None
+        self._sequence = -1
+
+    def _wait_for(self, kinds: tuple[str, ...], timeout: float):
+        """ Returns the next reply of one of the given kinds, collecting any
+            errors reported on the way. Returns None if the simulation stops
+            or no such reply arrives within the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                reply = self._replies.get(timeout=RETRY_INTERVAL * 10)
+            except queue.Empty:
+                if not self._process.is_alive() and self._replies.empty():
+                    return None
+                continue
+            if reply[0] in kinds:
+                return reply
+            if reply[0] == 'error':
+                self._errors.append(reply[1])
+                if not self._process.is_alive():
+                    return None
+
+    def send(self, action: str, *args) -> None:
+        """ Asks the simulation to perform the named action (see
+            actions.perform).
+        """
+        self._commands.put((action, *args))
+
+    def save(self, path: str) -> None:
+        """ Asks the simulation to save its model to the given path, on a
+            background thread of the simulation process.
+        """
+        self.send(SAVE_COMMAND, path)
+
+    def get_errors(self) -> list[str]:
+        """ Returns and clears the errors reported by the simulation. """
+        while True:
+            try:
+                reply = self._replies.get_nowait()
+            except queue.Empty:
+                break
+            if reply[0] == 'error':
+                self._errors.append(reply[1])
+        errors, self._errors = self._errors, []
+        return errors
+
+    def is_alive(self) -> bool:
+        """ Returns True iff the simulation process is running. """
+        return self._process.is_alive()
+
+    def has_update(self) -> bool:
+        """ Returns True iff a state newer than the current snapshot has been
+            published.
+        """
+        return self._control[SEQUENCE] != self._sequence
+
+    def snapshot(self) -> FarmSnapshot:
+        """ Releases the previous snapshot and returns one of the latest
+            published state. The snapshot stays consistent until the next call.
+        """
+        control = self._control
+        while True:
+            front = control[FRONT]
+            sequence = control[SEQUENCE]
+            control[READING] = front
+            # The simulation may have flipped buffers before seeing our claim
+            if control[FRONT] == front:
+                break
+        self._sequence = sequence
+        self._snapshot = FarmSnapshot(self._buffers[front], self._weather)
+        return self._snapshot
+
+    def close(self) -> None:
+        """ Stops the simulation process and detaches from shared memory. If
+            the simulation does not shut down cleanly, it is terminated and
+            the shared memory is freed here instead.
+        """
+        self._snapshot = None
+        self._control[READING] = -1
+        clean = False
+        if self._process.is_alive():
+            self._commands.put(None)
+            clean = self._wait_for(('closed',), CLOSE_TIMEOUT) is not None
+        self._process.join(CLOSE_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+
+        blocks = [buffer.shm for buffer in self._buffers]
+        blocks.append(self._control_shm)
+        for buffer in self._buffers:
+            buffer.close()
+        del self._control
+        self._control_shm.close()
+        if not clean:
+            for block in blocks:
+                try:
+                    block.unlink()
+                except FileNotFoundError:
+                    pass
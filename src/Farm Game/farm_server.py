@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+from constants import *
+from model import *
+from actions import ACTIONS, HISTORY_ACTIONS, perform
+from mapgen import generate_map
+
+# The server speaks newline-delimited JSON. Each request is an object with an
+# 'op' and, optionally, an 'id' echoed in its reply:
+#   {"op": "open", "map": [row, ...]} or {"op": "open", "size": n, "seed": s}
+#       -> {"session": id, "state": full state}
+#   {"op": "act", "session": id, "actions": [[name, *args], ...]}
+#       -> {"session": id, "diff": changes since the last reply}
+#   {"op": "close", "session": id} -> {"session": id}
+# Actions are those of actions.perform; a batch naming an unknown action is
+# rejected before any of it is performed. Otherwise a batch is performed in
+# order, and one that fails part way stays partly applied: the actions before
+# the failing one are kept, and are sent in the diff of the next reply. A
+# request that fails is answered with {"error": message}.
+
+
+def _check_rows(rows: object) -> list[str]:
+    """ Returns the rows of a map sent by a client, checking that they are a
+        non-empty list of rows of tiles, all the same length.
+
+    Raises:
+        ValueError: If they are not.
+    """
+    if (not isinstance(rows, list) or not rows
+            or not all(isinstance(row, str) for row in rows)):
+        raise ValueError('map must be a non-empty list of rows')
+    if not rows[0] or any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError('map rows must be non-empty and the same length')
+    return rows
+
+
+def _plant_grids(model: FarmModel) -> tuple[np.ndarray, np.ndarray]:
+    """ Returns the plant kind code (0 for no plant, see PlantStore) and the
+        stage of every cell of the farm, flattened.
+    """
+    rows, cols = model.get_dimensions()
+    kind, stage, row, col = model.get_plant_arrays()
+    cells = row.astype(np.int64) * cols + col
+    kinds = np.zeros(rows * cols, dtype=np.int16)
+    stages = np.zeros(rows * cols, dtype=np.int16)
+    kinds[cells] = kind
+    stages[cells] = stage
+    return kinds, stages
+
+
+def _plant_entry(cell: int, cols: int, kind: int, stage: int) -> list:
+    """ Returns a cell's plant as sent to clients: [row, col, name, stage], or
+        [row, col] if there is none.
+    """
+    row, col = divmod(cell, cols)
+    if kind == 0:
+        return [row, col]
+    return [row, col, PLANT_TYPES[kind - 1]._NAME, stage]
+
+
+class FarmState:
+    """ The state of a farm that clients are sent, captured so that later
+        states can be sent as the differences from it.
+    """
+
+    def __init__(self, model: FarmModel) -> None:
+        """ Captures the state of the given model. """
+        self._dimensions = model.get_dimensions()
+        self._tiles = model.get_tile_array().ravel().copy()
+        self._kinds, self._stages = _plant_grids(model)
+        self._devices = dict(model.get_devices())
+        player = model.get_player()
+        self._player = {
+            'money': player.get_money(),
+            'energy': player.get_energy(),
+            'position': list(model.get_player_position()),
+            'direction': model.get_player_direction(),
+        }
+        self._inventory = {item: int(amount) for item, amount
+                           in player.get_inventory().items()}
+        self._day = model.get_days_elapsed()
+
+    def to_message(self) -> dict:
+        """ Returns the whole state, as sent when a session is opened. """
+        rows, cols = self._dimensions
+        tiles = self._tiles.reshape(rows, cols)
+        cells = np.flatnonzero(self._kinds)
+        return {
+            'map': [row.tobytes().decode('ascii') for row in tiles],
+            'plants': [_plant_entry(cell, cols, kind, stage) for cell, kind,
+                       stage in zip(cells.tolist(),
+                                    self._kinds[cells].tolist(),
+                                    self._stages[cells].tolist())],
+            'devices': [[*position, kind]
+                        for position, kind in self._devices.items()],
+            'player': dict(self._player),
+            'inventory': dict(self._inventory),
+            'day': self._day,
+        }
+
+    def diff(self, old: 'FarmState') -> dict:
+        """ Returns what changed since an older state of the same farm, with
+            only the keys of to_message that changed: tiles as [row, col,
+            tile], plants as in to_message ([row, col] where one was removed),
+            devices as [row, col, kind] ([row, col] where one was removed),
+            and the player's values and inventory amounts that changed.
+        """
+        cols = self._dimensions[1]
+        diff = {}
+
+        cells = np.flatnonzero(self._tiles != old._tiles)
+        if len(cells):
+            diff['tiles'] = [[*divmod(cell, cols), chr(tile)] for cell, tile
+                             in zip(cells.tolist(),
+                                    self._tiles[cells].tolist())]
+
+        cells = np.flatnonzero((self._kinds != old._kinds)
+                               | (self._stages != old._stages))
+        if len(cells):
+            diff['plants'] = [_plant_entry(cell, cols, kind, stage)
+                              for cell, kind, stage in zip(
+                                  cells.tolist(), self._kinds[cells].tolist(),
+                                  self._stages[cells].tolist())]
+
+        devices = [[*position, kind] for position, kind
+                   in self._devices.items()
+                   if old._devices.get(position) != kind]
+        devices += [list(position) for position in old._devices
+                    if position not in self._devices]
+        if devices:
+            diff['devices'] = devices
+
+        for key, values, old_values in (
+                ('player', self._player, old._player),
+                ('inventory', self._inventory, old._inventory)):
+            changed = {name: value for name, value in values.items()
+                       if old_values.get(name) != value}
+            changed.update({name: 0 for name in old_values
+                            if name not in values})
+            if changed:
+                diff[key] = changed
+
+        if self._day != old._day:
+            diff['day'] = self._day
+        return diff
+
+
+def apply_diff(state: dict, diff: dict) -> None:
+    """ Applies a diff from FarmState.diff to a state from
+        FarmState.to_message, as a client would. Plants and devices are left
+        sorted by position.
+    """
+    for row, col, tile in diff.get('tiles', ()):
+        line = state['map'][row]
+        state['map'][row] = line[:col] + tile + line[col + 1:]
+    for key in ('plants', 'devices'):
+        if key not in diff:
+            continue
+        entries = {tuple(entry[:2]): entry for entry in state[key]}
+        for entry in diff[key]:
+            entries[tuple(entry[:2])] = entry
+        state[key] = sorted(entry for entry in entries.values()
+                            if len(entry) > 2)
+    state['player'].update(diff.get('player', {}))
+    state['inventory'].update(diff.get('inventory', {}))
+    state['inventory'] = {item: amount for item, amount
+                          in state['inventory'].items() if amount > 0}
+    state['day'] = diff.get('day', state['day'])
+
+
+class SessionStore:
+    """ The farms of many sessions, each with the state its client was last
+        sent. A store handles requests for its sessions one at a time.
+    """
+
+    def __init__(self) -> None:
+        """ Constructor for a store with no sessions. """
+        self._sessions = {}
+
+    def __len__(self) -> int:
+        """ Returns the number of open sessions. """
+        return len(self._sessions)
+
+    def get_model(self, session: int) -> FarmModel:
+        """ Returns the farm of the given session. """
+        return self._sessions[session][0]
+
+    def open(
+            self,
+            session: int,
+            map_file: Optional[str | list[str]] = None,
+            size: int = SESSION_MAP_SIZE,
+            seed: int = 0
+        ) -> dict:
+        """ Opens a session on a farm with the given map (a map file or its
+            rows), or a map generated with the given size and seed if there is
+            none. Only local callers may give a map file: handle accepts only
+            rows from clients.
+
+        Returns:
+            The whole state of the new farm (see FarmState.to_message).
+        """
+        if session in self._sessions:
+            raise ValueError(f'session {session} is already open')
+        if map_file is None:
+            if not isinstance(size, int) or size < 1:
+                raise ValueError(f'map size must be at least 1, not {size!r}')
+            map_file = generate_map(size, size, seed)
+        elif not isinstance(map_file, str):
+            map_file = _check_rows(map_file)
+        model = FarmModel(map_file)
+        state = FarmState(model)
+        self._sessions[session] = (model, state)
+        return state.to_message()
+
+    def act(self, session: int, actions: list[list]) -> dict:
+        """ Performs a batch of actions on a session's farm.
+
+        Returns:
+            The changes to the farm since the client was last sent its state
+            (see FarmState.diff).
+        """
+        model, old = self._sessions[session]
+        for action in actions:
+            if not action or (action[0] not in ACTIONS
+                              and action[0] not in HISTORY_ACTIONS):
+                raise ValueError(f'unknown action {action!r}')
+        for name, *args in actions:
+            perform(model, name, *args)
+        state = FarmState(model)
+        self._sessions[session] = (model, state)
+        return state.diff(old)
+
+    def close(self, session: int) -> None:
+        """ Closes a session, discarding its farm. """
+        del self._sessions[session]
+
+    def handle(self, request: dict) -> dict:
+        """ Handles one request to the store (see the protocol above) and
+            returns the reply, without the request's id.
+        """
+        operation = request.get('op')
+        session = request.get('session')
+        try:
+            if operation == 'open':
+                rows = request.get('map')
+                state = self.open(session,
+                                  None if rows is None else _check_rows(rows),
+                                  request.get('size', SESSION_MAP_SIZE),
+                                  request.get('seed', 0))
+                return {'session': session, 'state': state}
+            if operation == 'act':
+                return {'session': session,
+                        'diff': self.act(session, request['actions'])}
+            if operation == 'close':
+                self.close(session)
+                return {'session': session}
+            raise ValueError(f'unknown op {operation!r}')
+        except KeyError as error:
+            return {'error': f'no {error.args[0]!r} in request or sessions'}
+        except Exception as error:
+            # Any failure is the request's, and must not end the connection
+            return {'error': str(error) or type(error).__name__}
+
+
+# The sessions of a worker process
+_WORKER_STORE = SessionStore()
+
+def _handle_in_worker(request: dict) -> dict:
+    """ Handles a request in a worker process, with its own sessions. """
+    return _WORKER_STORE.handle(request)
+
+
+def encode(message: dict) -> bytes:
+    """ Returns a message as one line of compact JSON. """
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+class FarmServer:
+    """ An asyncio server holding many farm sessions. Without shards, the
+        sessions live in the server process and every request is handled on
+        its event loop. With shards, each session lives in one of that many
+        worker processes, chosen by its id, so CPU-bound requests for
+        different sessions run in parallel while the loop keeps serving.
+    """
+
+    def __init__(self, shards: int = SERVER_SHARDS) -> None:
+        """ Constructor for a server that is not yet listening.
+
+        Parameters:
+            shards: The number of worker processes, or 0 for none.
+        """
+        self._store = SessionStore()
+        # One process per executor, so each session stays in one process.
+        self._workers = [ProcessPoolExecutor(1) for _ in range(shards)]
+        self._next_session = 0
+        self._requests = 0
+        self._server = None
+        self._clients = set()
+
+    def get_requests(self) -> int:
+        """ Returns the number of requests handled so far. """
+        return self._requests
+
+    async def handle(self, request: dict) -> dict:
+        """ Handles one request and returns its reply. Opened sessions are
+            given the next unused id.
+        """
+        self._requests += 1
+        if not isinstance(request, dict):
+            return {'error': 'requests must be JSON objects'}
+        if request.get('op') == 'open':
+            request = {**request, 'session': self._next_session}
+            self._next_session += 1
+        session = request.get('session')
+        if not isinstance(session, int):
+            reply = {'error': 'requests must name a session'}
+        elif self._workers:
+            worker = self._workers[session % len(self._workers)]
+            reply = await asyncio.get_running_loop().run_in_executor(
+                worker, _handle_in_worker, request)
+        else:
+            reply = self._store.handle(request)
+        if 'id' in request:
+            reply['id'] = request['id']
+        return reply
+
+    async def _serve_client(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+        ) -> None:
+        """ Answers a client's requests, in order, until it disconnects or
+            the server closes. Sessions outlive the connection that opened
+            them.
+        """
+        self._clients.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    reply = {'error': f'invalid JSON: {error}'}
+                else:
+                    try:
+                        reply = await self.handle(request)
+                    except Exception as error:
+                        # Such as a worker process that died
+                        reply = {'error': str(error) or type(error).__name__}
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # A message over the limit, or the server closing, ends the
+            # connection without a reply.
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            writer.close()
+
+    async def start(
+            self,
+            path: Optional[str] = None,
+            host: str = SERVER_HOST,
+            port: int = SERVER_PORT
+        ) -> asyncio.AbstractServer:
+        """ Starts listening on a Unix socket at path, or on host and port if
+            there is no path.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._serve_client, path, limit=SERVER_MESSAGE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve_client, host, port, limit=SERVER_MESSAGE_LIMIT)
+        return self._server
+
+    async def close(self) -> None:
+        """ Stops listening, closes every connection and shuts down the
+            worker processes.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for client in list(self._clients):
+            client.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        for worker in self._workers:
+            worker.shutdown(cancel_futures=True)
+
+
+class FarmClient:
+    """ A connection to a FarmServer, sending one request at a time. """
+
+    def __init__(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+        ) -> None:
+        """ Constructor for a client on an open connection (see connect). """
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(
+            cls,
+            path: Optional[str] = None,
+            host: str = SERVER_HOST,
+            port: int = SERVER_PORT
+        ) -> 'FarmClient':
+        """ Connects to a server on a Unix socket at path, or on host and port
+            if there is no path.
+        """
+        if path is not None:
+            streams = await asyncio.open_unix_connection(
+                path, limit=SERVER_MESSAGE_LIMIT)
+        else:
+            streams = await asyncio.open_connection(
+                host, port, limit=SERVER_MESSAGE_LIMIT)
+        return cls(*streams)
+
+    async def request(self, request: dict) -> dict:
+        """ Sends a request and returns its reply.
+
+        Raises:
+            RuntimeError: If the server replied with an error.
+            ConnectionError: If the server closed the connection.
+        """
+        self._writer.write(encode(request))
+        await self._writer.drain()
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError('the server closed the connection')
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    async def open(
+            self,
+            rows: Optional[list[str]] = None,
+            size: int = SESSION_MAP_SIZE,
+            seed: int = 0
+        ) -> tuple[int, dict]:
+        """ Opens a session (see SessionStore.open) on a map's rows, or a
+            generated map, returning its id and whole state.
+        """
+        request = {'op': 'open', 'size': size, 'seed': seed}
+        if rows is not None:
+            request['map'] = rows
+        reply = await self.request(request)
+        return reply['session'], reply['state']
+
+    async def act(self, session: int, actions: list[list]) -> dict:
+        """ Performs a batch of actions, returning the diff of the state. """
+        reply = await self.request({'op': 'act', 'session': session,
+                                    'actions': actions})
+        return reply['diff']
+
+    async def close_session(self, session: int) -> None:
+        """ Closes a session. """
+        await self.request({'op': 'close', 'session': session})
+
+    async def close(self) -> None:
+        """ Closes the connection. """
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def serve(
+        path: Optional[str] = None,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        shards: int = SERVER_SHARDS
+    ) -> None:
+    """ Runs a server until it is cancelled. """
+    server = FarmServer(shards)
+    listener = await server.start(path, host, port)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    """ Runs a farm server from the command line. """
+    parser = argparse.ArgumentParser(description='Serve farm sessions.')
+    parser.add_argument('--unix', help='listen on a Unix socket at this path '
+                                       'instead of TCP')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--shards', type=int, default=SERVER_SHARDS,
+                        help='worker processes to shard sessions across')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.unix, args.host, args.port, args.shards))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
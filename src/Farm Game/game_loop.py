@@ -0,0 +1,109 @@
+from typing import Optional
+from constants import *
+
+class FixedTimestep:
+    """ The clock of a fixed-timestep game loop. Wall-clock time is
+        accumulated and spent in whole ticks of simulation, so the simulation
+        advances at the same rate however often frames are drawn. A frame is
+        only worth drawing if the simulation is caught up and there is time
+        left in the frame budget; otherwise it is dropped, and the
+        simulation keeps its pace.
+    """
+
+    def __init__(
+            self,
+            tick: float = REALTIME_TICK,
+            frame_budget: float = FRAME_BUDGET,
+            max_ticks: int = MAX_CATCH_UP_TICKS
+        ) -> None:
+        """ Constructor for a clock that has not started.
+
+        Parameters:
+            tick: The simulated time of one tick, in seconds.
+            frame_budget: The longest a frame may take, in seconds, for it
+                          to still be drawn.
+            max_ticks: The most ticks simulated in one frame. Any more due are
+                       carried over to later frames rather than dropped.
+        """
+        self._tick = tick
+        self._frame_budget = frame_budget
+        self._max_ticks = max_ticks
+        self._last = None
+        self._accumulator = 0.0
+        self._ticks = 0
+        self._frames = 0
+        self._dropped = 0
+
+    def get_tick(self) -> float:
+        """ Returns the simulated time of one tick, in seconds. """
+        return self._tick
+
+    def get_ticks(self) -> int:
+        """ Returns the number of ticks simulated so far. """
+        return self._ticks
+
+    def get_frames(self) -> int:
+        """ Returns the number of frames drawn so far. """
+        return self._frames
+
+    def get_dropped_frames(self) -> int:
+        """ Returns the number of frames dropped so far. """
+        return self._dropped
+
+    def advance(self, now: float) -> int:
+        """ Accumulates the time since the last call and returns the number of
+            ticks to simulate now.
+
+        Parameters:
+            now: The current time, in seconds.
+        """
+        if self._last is not None:
+            self._accumulator += now - self._last
+        self._last = now
+        ticks = min(int(self._accumulator / self._tick), self._max_ticks)
+        self._accumulator -= ticks * self._tick
+        self._ticks += ticks
+        return ticks
+
+    def is_behind(self) -> bool:
+        """ Returns True iff ticks are still due after the last advance. """
+        return self._accumulator >= self._tick
+
+    def get_alpha(self) -> float:
+        """ Returns how far (from 0 to 1) the clock is between the last tick
+            and the next, for interpolating what is drawn.
+        """
+        return min(self._accumulator / self._tick, 1.0)
+
+    def should_render(self, frame_start: float, now: float) -> bool:
+        """ Returns True iff a frame started at frame_start should be drawn,
+            counting it as drawn or dropped.
+        """
+        if self.is_behind() or now - frame_start > self._frame_budget:
+            self._dropped += 1
+            return False
+        self._frames += 1
+        return True
+
+
+def interpolate(
+        start: tuple[float, float],
+        end: tuple[float, float],
+        fraction: float
+    ) -> tuple[float, float]:
+    """ Returns the point the given fraction of the way from start to end. """
+    return (start[0] + (end[0] - start[0]) * fraction,
+            start[1] + (end[1] - start[1]) * fraction)
+
+
+def move_fraction(
+        moved_at: Optional[float],
+        now: float,
+        duration: float = PLAYER_MOVE_SECONDS
+    ) -> float:
+    """ Returns how far (from 0 to 1) through a move that started at moved_at
+        (or None, if it has finished) the player is at the time now.
+    """
+    if moved_at is None or duration <= 0:
+        return 1.0
+    return min(max((now - moved_at) / duration, 0.0), 1.0)
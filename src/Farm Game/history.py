@@ -0,0 +1,101 @@
+from typing import Callable, Optional
+
+class Edit:
+    """ The changes made by one action to a model, stored as the values they
+        replaced. Each record holds only what the action touched (a row of the
+        map, a plant, the player's state), so unchanged parts of the farm are
+        shared between the model and every edit in its history.
+    """
+
+    def __init__(self, apply: Callable[[], None]) -> None:
+        """ Constructor for an edit.
+
+        Parameters:
+            apply: Performs the action again, used to redo it.
+        """
+        self._apply = apply
+        self._records = []
+
+    def get_apply(self) -> Callable[[], None]:
+        """ Returns the function that performs the edit's action. """
+        return self._apply
+
+    def add(self, record: tuple) -> None:
+        """ Adds a record of replaced values, in the order the changes were
+            made.
+        """
+        self._records.append(record)
+
+    def get_records(self) -> list[tuple]:
+        """ Returns the records of replaced values, oldest first. Undoing an
+            edit restores them newest first.
+        """
+        return self._records
+
+
+class History:
+    """ Undo and redo stacks of edits, and the edit currently being recorded.
+    """
+
+    def __init__(self) -> None:
+        """ Constructor for an empty history. """
+        self._undo = []
+        self._redo = []
+        self._current = None
+
+    def is_recording(self) -> bool:
+        """ Returns True iff an edit is being recorded. """
+        return self._current is not None
+
+    def begin(self, apply: Callable[[], None]) -> Edit:
+        """ Starts recording a new edit for the given action. """
+        self._current = Edit(apply)
+        return self._current
+
+    def record(self, record: tuple) -> None:
+        """ Adds a record to the edit being recorded, if there is one. """
+        if self._current is not None:
+            self._current.add(record)
+
+    def end(self, keep: bool, clear_redo: bool = True) -> None:
+        """ Stops recording the current edit.
+
+        Parameters:
+            keep: Whether the action changed anything, so the edit should be
+                  added to the undo stack.
+            clear_redo: Whether a kept edit invalidates the redo stack, as it
+                        does for every new action but not for a redone one.
+        """
+        if keep:
+            self._undo.append(self._current)
+            if clear_redo:
+                self._redo.clear()
+        self._current = None
+
+    def pop_undo(self) -> Optional[Edit]:
+        """ Removes and returns the most recent edit, and makes it available
+            to redo. Returns None if there is nothing to undo.
+        """
+        if not self._undo:
+            return None
+        edit = self._undo.pop()
+        self._redo.append(edit)
+        return edit
+
+    def pop_redo(self) -> Optional[Edit]:
+        """ Removes and returns the most recently undone edit, or None if there
+            is nothing to redo.
+        """
+        return self._redo.pop() if self._redo else None
+
+    def can_undo(self) -> bool:
+        """ Returns True iff there is an edit to undo. """
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        """ Returns True iff there is an edit to redo. """
+        return bool(self._redo)
+
+    def __len__(self) -> int:
+        """ Returns the number of edits that can be undone. """
+        return len(self._undo)
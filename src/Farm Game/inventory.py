@@ -0,0 +1,96 @@
+from collections.abc import Mapping
+from typing import Iterator, Optional
+import numpy as np
+
+class Inventory(Mapping):
+    """ A player's inventory, stored as an array of amounts indexed by each
+        item's position in a fixed list of items. It reads like the dict the
+        inventory used to be: items with a positive amount are its keys.
+
+        Every change increments a version number, so a view can tell whether
+        anything changed since it last drew by comparing one integer.
+    """
+
+    def __init__(
+            self,
+            items: list[str],
+            amounts: Optional[dict[str, int]] = None,
+            version: int = 0
+        ) -> None:
+        """ Constructor for an inventory.
+
+        Parameters:
+            items: Every item the inventory can hold, in index order.
+            amounts: The starting amount of each item, if any.
+            version: The starting version number.
+        """
+        self._items = items
+        self._index = {item: index for index, item in enumerate(items)}
+        self._amounts = np.zeros(len(items), dtype=np.int64)
+        self._version = version
+        for item_name, amount in (amounts or {}).items():
+            self._amounts[self._index[item_name]] = amount
+
+    def get_items(self) -> list[str]:
+        """ Returns every item the inventory can hold, in index order. """
+        return self._items
+
+    def index(self, item_name: str) -> int:
+        """ Returns the index of the given item in the amounts array. """
+        return self._index[item_name]
+
+    def get_amounts(self) -> np.ndarray:
+        """ Returns the amount of every item, in index order. The array must
+            not be modified.
+        """
+        return self._amounts
+
+    def get_version(self) -> int:
+        """ Returns a number that changes whenever the inventory does. """
+        return self._version
+
+    def add(self, item_name: str, amount: int) -> None:
+        """ Adds the given amount of an item. """
+        self._amounts[self._index[item_name]] += amount
+        self._version += 1
+
+    def remove(self, item_name: str, amount: int) -> None:
+        """ Removes the given amount of an item, leaving none if that is more
+            than there is.
+        """
+        index = self._index[item_name]
+        self._amounts[index] = max(int(self._amounts[index]) - amount, 0)
+        self._version += 1
+
+    def set_amounts(self, amounts: dict[str, int]) -> None:
+        """ Replaces the contents of the inventory with the given amounts. """
+        self._amounts[:] = 0
+        for item_name, amount in amounts.items():
+            self._amounts[self._index[item_name]] = amount
+        self._version += 1
+
+    def get(self, item_name: str, default=None):
+        """ Returns the amount of an item, or default if there is none. """
+        index = self._index.get(item_name)
+        if index is None or self._amounts[index] <= 0:
+            return default
+        return int(self._amounts[index])
+
+    def __getitem__(self, item_name: str) -> int:
+        amount = self.get(item_name)
+        if amount is None:
+            raise KeyError(item_name)
+        return amount
+
+    def __contains__(self, item_name: object) -> bool:
+        return self.get(item_name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._items[index]
+                for index in np.flatnonzero(self._amounts > 0))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._amounts > 0))
+
+    def __repr__(self) -> str:
+        return f'Inventory({dict(self.items())})'
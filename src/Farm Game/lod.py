@@ -0,0 +1,94 @@
+from typing import Optional
+import numpy as np
+from constants import *
+from model import PLANT_TYPES
+
+def _colour_table() -> np.ndarray:
+    """ Returns a (256, 3) table of the colour of each tile character code. """
+    table = np.zeros((256, 3), dtype=np.uint8)
+    for tile, colour in LOD_TILE_COLOURS.items():
+        table[ord(tile)] = colour
+    return table
+
+def _plant_table() -> np.ndarray:
+    """ Returns a (kinds + 1, stages + 1, 3) table of the colour of each plant
+        kind at each stage, running from LOD_PLANT_COLOURS[0] when planted to
+        LOD_PLANT_COLOURS[1] once ready for harvest.
+    """
+    stages = max(plant_type._HARVEST_STAGE for plant_type in PLANT_TYPES)
+    table = np.zeros((len(PLANT_TYPES) + 1, stages + 1, 3), dtype=np.uint8)
+    young, ripe = (np.array(colour, dtype=np.float64)
+                   for colour in LOD_PLANT_COLOURS)
+    for kind, plant_type in enumerate(PLANT_TYPES, start=1):
+        harvest = plant_type._HARVEST_STAGE
+        for stage in range(1, stages + 1):
+            ripeness = min((stage - 1) / max(harvest - 1, 1), 1.0)
+            table[kind, stage] = np.rint(young + (ripe - young) * ripeness)
+    return table
+
+_TILE_COLOURS = _colour_table()
+_PLANT_COLOURS = _plant_table()
+
+
+def build_cell_raster(
+        tiles: np.ndarray,
+        plant_arrays: tuple[np.ndarray, ...],
+        devices: Optional[dict[tuple[int, int], str]] = None
+    ) -> np.ndarray:
+    """ Returns a (rows, cols, 3) colour for each cell of a farm: the colour of
+        its tile, overlaid with a heatmap of plant stages and with devices.
+
+    Parameters:
+        tiles: The (rows, cols) tile character codes.
+        plant_arrays: The (kind, stage, row, col) arrays of the plants.
+        devices: The devices on the farm, if any.
+    """
+    raster = _TILE_COLOURS[tiles]
+    kind, stage, row, col = plant_arrays
+    stage = np.clip(stage, 0, _PLANT_COLOURS.shape[1] - 1)
+    raster[row, col] = _PLANT_COLOURS[kind, stage]
+    for position in (devices or {}):
+        raster[position] = LOD_DEVICE_COLOUR
+    return raster
+
+
+def scale_raster(raster: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """ Returns a raster of cells resized to (width, height) pixels by nearest
+        neighbour sampling. This works whether cells are larger or smaller
+        than a pixel.
+    """
+    width, height = size
+    rows, cols = raster.shape[:2]
+    row_index = np.arange(height) * rows // height
+    col_index = np.arange(width) * cols // width
+    return raster[row_index[:, None], col_index[None, :]]
+
+
+def block_bounds(
+        size: tuple[int, int],
+        blocks: int
+    ) -> list[tuple[int, int, int, int]]:
+    """ Returns the (x_min, y_min, x_max, y_max) pixel bounds of each block
+        when an image of the given size is split into blocks x blocks parts.
+    """
+    width, height = size
+    xs = [width * index // blocks for index in range(blocks + 1)]
+    ys = [height * index // blocks for index in range(blocks + 1)]
+    return [(xs[col], ys[row], xs[col + 1], ys[row + 1])
+            for row in range(blocks) for col in range(blocks)]
+
+
+def dirty_blocks(
+        old: Optional[np.ndarray],
+        new: np.ndarray,
+        bounds: list[tuple[int, int, int, int]]
+    ) -> list[int]:
+    """ Returns the indices of the blocks (see block_bounds) in which two
+        pixel rasters differ. Every block is dirty if there is no old raster
+        or it has a different shape.
+    """
+    if old is None or old.shape != new.shape:
+        return list(range(len(bounds)))
+    changed = np.any(old != new, axis=2)
+    return [index for index, (x_min, y_min, x_max, y_max) in enumerate(bounds)
+            if changed[y_min:y_max, x_min:x_max].any()]
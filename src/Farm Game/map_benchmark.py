@@ -0,0 +1,82 @@
+import argparse
+import os
+import tempfile
+import time
+from constants import *
+from map_io import read_map, write_binary_map
+from mapgen import generate_rows, write_generated_map
+
+# The map sizes (rows and columns) benchmarked by default, and the number of
+# times each file is loaded, keeping the fastest
+MAP_BENCHMARK_SIZES = (100, 1000, 4000)
+MAP_BENCHMARK_REPEATS = 5
+
+
+def load_seconds(map_file: str, repeats: int = MAP_BENCHMARK_REPEATS) -> float:
+    """ Returns the fastest time (in seconds) read_map takes to load a map
+        file, out of the given number of loads.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        read_map(map_file)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_map(
+        size: int,
+        directory: str,
+        seed: int = 0,
+        repeats: int = MAP_BENCHMARK_REPEATS
+    ) -> dict[str, float]:
+    """ Writes a generated map in the text and binary formats, and compares
+        them.
+
+    Parameters:
+        size: The rows and columns of the map.
+        directory: Where the map files are written.
+
+    Returns:
+        The size (in bytes) of each file and the time (in seconds) to load
+        it, and the ratios of text to binary.
+    """
+    text_file = os.path.join(directory, f'map{size}.txt')
+    binary_file = os.path.join(directory, f'map{size}.fmap')
+    write_generated_map(text_file, size, size, seed)
+    write_binary_map(binary_file, generate_rows(size, size, seed))
+    results = {
+        'text_bytes': os.path.getsize(text_file),
+        'binary_bytes': os.path.getsize(binary_file),
+        'text_seconds': load_seconds(text_file, repeats),
+        'binary_seconds': load_seconds(binary_file, repeats),
+    }
+    results['size_ratio'] = results['text_bytes'] / results['binary_bytes']
+    results['speedup'] = results['text_seconds'] / results['binary_seconds']
+    return results
+
+
+def main() -> None:
+    """ Compares the file size and load time of text and binary maps. """
+    parser = argparse.ArgumentParser(
+        description='Benchmark text and binary map files.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=MAP_BENCHMARK_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=MAP_BENCHMARK_REPEATS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            results = benchmark_map(size, directory, args.seed, args.repeats)
+            print(f'{size}x{size}  '
+                  f'text {results["text_bytes"]:,} B '
+                  f'{results["text_seconds"] * 1000:,.2f} ms  '
+                  f'binary {results["binary_bytes"]:,} B '
+                  f'{results["binary_seconds"] * 1000:,.2f} ms  '
+                  f'{results["size_ratio"]:,.1f}x smaller, '
+                  f'{results["speedup"]:,.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import codecs
+import struct
+from typing import Iterable
+import numpy as np
+
+# Binary maps start with BINARY_MAGIC and a header of the format version,
+# the rows and columns of the map, the number of distinct tiles and the
+# number of runs. The header is followed by the tile table (the character of
+# each tile code), the length of every run, then the tile code of every run.
+# Runs never cross the end of a row, and longer runs are split.
+BINARY_MAGIC = b'FMAP'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sBIIBI')
+_RUN_LENGTH = np.dtype('<u2')
+_MAX_RUN = np.iinfo(_RUN_LENGTH).max
+
+def read_map(map_file: str) -> list[str]:
+    """ Reads the map file and returns a list of strings, where each string
+        represents one row of the farm (first string represents top row), and
+        each character in a string represents a tile. The file may be a text
+        map or a binary map (see write_binary_map), told apart by its start.
+
+    Parameters:
+        map_file: The path to the map file.
+
+    Returns:
+        A list of strings representing the tiles in the map.
+    """
+    with open(map_file, 'rb') as file:
+        if file.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            file.seek(0)
+            return decode_binary_map(file.read())
+    with open(map_file, 'r') as file:
+        return [line.strip() for line in file.readlines()]
+
+def write_map(map_file: str, rows: Iterable[str]) -> None:
+    """ Writes rows of tiles to a map file in the format read by read_map. Rows
+        are written as they are produced, so a generator of rows can be
+        streamed to disk without holding the whole map in memory.
+
+    Parameters:
+        map_file: The path to the map file to write.
+        rows: The rows of the map, top row first. Each item may also be a
+              block of several rows separated by newlines.
+    """
+    with open(map_file, 'w') as file:
+        for row in rows:
+            file.write(row)
+            file.write('\n')
+
+def _encode_runs(tiles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Returns the lengths and tile bytes of the runs in a block of rows,
+        given as a 2D array of tile bytes.
+    """
+    flat = tiles.ravel()
+    starts = np.ones(len(flat), dtype=bool)
+    starts[1:] = flat[1:] != flat[:-1]
+    starts[::tiles.shape[1]] = True
+    starts = np.flatnonzero(starts)
+    lengths = np.diff(starts, append=len(flat))
+
+    # Split runs too long for a run length into pieces of the longest length
+    pieces = -(-lengths // _MAX_RUN)
+    counts = np.full(int(pieces.sum()), _MAX_RUN, dtype=_RUN_LENGTH)
+    counts[np.cumsum(pieces) - 1] = lengths - (pieces - 1) * _MAX_RUN
+    return counts, np.repeat(flat[starts], pieces)
+
+def write_binary_map(map_file: str, rows: Iterable[str]) -> None:
+    """ Writes rows of tiles to a binary map file, with each row run-length
+        encoded. Rows are encoded as they are produced, so only the runs of a
+        streamed map are held in memory.
+
+    Parameters:
+        map_file: The path to the map file to write.
+        rows: The rows of the map, top row first, all the same length. Each
+              item may also be a block of several rows separated by newlines.
+    """
+    codes = np.full(256, -1, dtype=np.int16)
+    table = bytearray()
+    counts, tile_codes = [], []
+    height = width = 0
+    for block in rows:
+        lines = block.split('\n')
+        if height == 0:
+            width = len(lines[0])
+        if any(len(line) != width for line in lines):
+            raise ValueError(f'map rows must all be {width} tiles long')
+        height += len(lines)
+        if width == 0:
+            continue
+        tiles = np.frombuffer(''.join(lines).encode('ascii'),
+                              dtype=np.uint8).reshape(len(lines), width)
+        block_counts, block_tiles = _encode_runs(tiles)
+        for tile in np.unique(block_tiles[codes[block_tiles] < 0]):
+            codes[tile] = len(table)
+            table.append(int(tile))
+        counts.append(block_counts)
+        tile_codes.append(codes[block_tiles].astype(np.uint8))
+
+    if len(table) > 255:
+        raise ValueError('a binary map holds at most 255 kinds of tile')
+    counts = np.concatenate(counts or [np.empty(0, _RUN_LENGTH)])
+    tile_codes = np.concatenate(tile_codes or [np.empty(0, np.uint8)])
+    with open(map_file, 'wb') as file:
+        file.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, height, width,
+                                len(table), len(counts)))
+        file.write(table)
+        file.write(counts.tobytes())
+        file.write(tile_codes.tobytes())
+
+def decode_binary_map(data: bytes) -> list[str]:
+    """ Returns the rows of a binary map, from the contents of its file.
+
+    Raises:
+        ValueError: If the data is not a binary map this version can read.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError('binary map is truncated')
+    magic, version, height, width, tile_count, run_count = \
+        _HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f'not a version {BINARY_VERSION} binary map')
+    offset = _HEADER.size
+    table = np.frombuffer(data, np.uint8, tile_count, offset)
+    offset += tile_count
+    counts = np.frombuffer(data, _RUN_LENGTH, run_count, offset)
+    offset += counts.nbytes
+    tile_codes = np.frombuffer(data, np.uint8, run_count, offset)
+    if tile_codes.size and tile_codes.max() >= tile_count:
+        raise ValueError('binary map has an unknown tile code')
+
+    tiles = np.repeat(table[tile_codes], counts)
+    if tiles.size != height * width:
+        raise ValueError(f'binary map has {tiles.size} tiles, not '
+                         f'{height} x {width}')
+    # Decoding the array's buffer directly saves copying it to bytes first
+    text = codecs.ascii_decode(tiles)[0]
+    return [text[start:start + width]
+            for start in range(0, height * width, width)] if width \
+        else [''] * height
+
+def main() -> None:
+    """ Converts a map file between the text and binary formats. """
+    parser = argparse.ArgumentParser(
+        description='Convert a map file between the text and binary formats.')
+    parser.add_argument('source', help='the map file to read, in either '
+                                       'format')
+    parser.add_argument('target', help='the map file to write')
+    parser.add_argument('--to', choices=('binary', 'text'), default='binary',
+                        help='the format to write (default: binary)')
+    args = parser.parse_args()
+    rows = read_map(args.source)
+    if args.to == 'binary':
+        write_binary_map(args.target, rows)
+    else:
+        write_map(args.target, rows)
+
+if __name__ == '__main__':
+    main()
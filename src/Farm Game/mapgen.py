@@ -0,0 +1,169 @@
+import argparse
+from typing import Iterator
+import numpy as np
+from constants import *
+from map_io import write_map
+
+# Number of rows generated together in each chunk
+CHUNK_ROWS = 256
+
+# Distance in cells between lattice points of the field and cluster noise
+FIELD_SCALE = 48
+CLUSTER_SCALE = 12
+
+# Distance in cells between grass paths, and their width
+PATH_SPACING = 40
+PATH_WIDTH = 2
+
+# Noise thresholds above which cells become tilled fields or untilled soil
+FIELD_THRESHOLD = 0.55
+UNTILLED_THRESHOLD = 0.45
+CLUSTER_THRESHOLD = 0.8
+
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+def _hash(rows: np.ndarray, cols: np.ndarray, seed: int) -> np.ndarray:
+    """ Returns a pseudo-random value in [0, 1) for each lattice point. The
+        value only depends on the point and the seed, so chunks of a map can be
+        generated independently.
+    """
+    h = (rows.astype(np.uint64) * np.uint64(0x9E3779B1)
+         + cols.astype(np.uint64) * np.uint64(0x85EBCA77)
+         + np.uint64(seed * 0xC2B2AE3D & 0xFFFFFFFF)) & _MASK
+    h ^= h >> np.uint64(15)
+    h = (h * np.uint64(0x2C1B3C6D)) & _MASK
+    h ^= h >> np.uint64(12)
+    h = (h * np.uint64(0x297A2D39)) & _MASK
+    h ^= h >> np.uint64(15)
+    return h.astype(np.float32) / np.float32(2 ** 32)
+
+
+def _smooth(t: np.ndarray) -> np.ndarray:
+    """ Smoothstep easing of interpolation weights in [0, 1]. """
+    return t * t * (3 - 2 * t)
+
+
+def value_noise(
+        start: int,
+        stop: int,
+        cols: int,
+        scale: int,
+        seed: int
+    ) -> np.ndarray:
+    """ Returns smooth value noise in [0, 1) for rows start to stop of a map.
+        Lattice values are interpolated along each lattice row first, then
+        between lattice rows, so the cost per cell is a few array operations.
+
+    Parameters:
+        start, stop: The range of rows to generate.
+        cols: The number of columns in the map.
+        scale: The distance in cells between lattice points.
+        seed: The seed for the noise.
+
+    Returns:
+        A (stop - start, cols) array of noise values.
+    """
+    lattice_cols = np.arange(cols // scale + 2)
+    lattice_rows = np.arange(start // scale, (stop - 1) // scale + 2)
+    values = _hash(lattice_rows[:, None], lattice_cols[None, :], seed)
+
+    col_index = np.arange(cols) // scale
+    col_weight = _smooth((np.arange(cols) % scale) / np.float32(scale))
+    across = (values[:, col_index] * (1 - col_weight)
+              + values[:, col_index + 1] * col_weight)
+
+    row_index = np.arange(start, stop) // scale - lattice_rows[0]
+    row_weight = _smooth((np.arange(start, stop) % scale)
+                         / np.float32(scale))[:, None]
+    return (across[row_index] * (1 - row_weight)
+            + across[row_index + 1] * row_weight).astype(np.float32)
+
+
+def generate_chunk(start: int, stop: int, cols: int, seed: int) -> np.ndarray:
+    """ Returns rows start to stop of a generated map, as an array of tile
+        character codes.
+    """
+    fields = (value_noise(start, stop, cols, FIELD_SCALE, seed) * 0.75
+              + value_noise(start, stop, cols, CLUSTER_SCALE, seed + 1) * 0.25)
+    clusters = value_noise(start, stop, cols, CLUSTER_SCALE, seed + 2)
+
+    tiles = np.full((stop - start, cols), ord(GRASS), dtype=np.uint8)
+    tiles[fields > UNTILLED_THRESHOLD] = ord(UNTILLED)
+    tiles[fields > FIELD_THRESHOLD] = ord(SOIL)
+    tiles[clusters > CLUSTER_THRESHOLD] = ord(UNTILLED)
+
+    # Grass paths run between the fields in both directions
+    tiles[np.arange(start, stop) % PATH_SPACING < PATH_WIDTH, :] = ord(GRASS)
+    tiles[:, np.arange(cols) % PATH_SPACING < PATH_WIDTH] = ord(GRASS)
+    return tiles
+
+
+def generate_chunks(
+        rows: int,
+        cols: int,
+        seed: int = 0,
+        chunk_rows: int = CHUNK_ROWS
+    ) -> Iterator[np.ndarray]:
+    """ Generates a map chunk by chunk, as arrays of tile character codes of
+        at most chunk_rows rows each. Only one chunk is in memory at a time.
+
+    Parameters:
+        rows, cols: The dimensions of the map.
+        seed: The seed for the map. The same seed always gives the same map.
+        chunk_rows: The number of rows in each chunk.
+    """
+    for start in range(0, rows, chunk_rows):
+        yield generate_chunk(start, min(start + chunk_rows, rows), cols, seed)
+
+
+def generate_rows(rows: int, cols: int, seed: int = 0) -> Iterator[str]:
+    """ Generates a map row by row, as strings of tiles. """
+    for chunk in generate_chunks(rows, cols, seed):
+        text = chunk.tobytes().decode('ascii')
+        for start in range(0, len(text), cols):
+            yield text[start:start + cols]
+
+
+def generate_map(rows: int, cols: int, seed: int = 0) -> list[str]:
+    """ Returns a generated map as a list of rows, as used by FarmModel. """
+    return list(generate_rows(rows, cols, seed))
+
+
+def write_generated_map(
+        map_file: str,
+        rows: int,
+        cols: int,
+        seed: int = 0
+    ) -> None:
+    """ Streams a generated map to a map file, a chunk of rows at a time.
+
+    Parameters:
+        map_file: The path to the map file to write.
+        rows, cols: The dimensions of the map.
+        seed: The seed for the map.
+    """
+    def blocks() -> Iterator[str]:
+        newlines = np.full((1, 1), ord('\n'), dtype=np.uint8)
+        for chunk in generate_chunks(rows, cols, seed):
+            lines = np.hstack(
+                [chunk, np.broadcast_to(newlines, (len(chunk), 1))])
+            # The last newline of each block is added by write_map
+            yield lines.tobytes()[:-1].decode('ascii')
+
+    write_map(map_file, blocks())
+
+
+def main() -> None:
+    """ Writes a generated map to the file given on the command line. """
+    parser = argparse.ArgumentParser(description='Generate a farm map.')
+    parser.add_argument('map_file', help='the map file to write')
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--cols', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_generated_map(args.map_file, args.rows, args.cols, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+from constants import *
+
+class Market:
+    """ A market whose sell prices fall as items are sold and recover from day
+        to day. The n-th unit of an item sold while its supply is s sells for
+        base * r ** (s + n), where r = exp(-1 / MARKET_DEPTH), so the revenue
+        of a bulk sale is a geometric series with a closed form and any order
+        can be priced in constant time.
+
+        Items are referred to by name, or by index into ITEMS in the
+        vectorised methods.
+    """
+
+    def __init__(
+            self,
+            base_prices: dict[str, int] = SELL_PRICES,
+            depth: float = MARKET_DEPTH,
+            recovery: float = MARKET_RECOVERY
+        ) -> None:
+        """ Constructor for a market with no supply of any item.
+
+        Parameters:
+            base_prices: The price of each item when none has been sold. Items
+                         not listed cannot be sold.
+            depth: How many units must be sold for an item's price to fall by
+                   a factor of e.
+            recovery: The fraction of each item's supply left after a day.
+        """
+        self._base = np.array([base_prices.get(item, 0) for item in ITEMS],
+                              dtype=np.float64)
+        self._ratio = np.exp(-1 / depth)
+        self._recovery = recovery
+        self._supply = np.zeros(len(ITEMS))
+
+    def get_state(self) -> np.ndarray:
+        """ Returns a copy of the supply of each item, in ITEMS order. """
+        return self._supply.copy()
+
+    def set_state(self, supply: np.ndarray) -> None:
+        """ Restores the supply of each item from get_state. """
+        self._supply = np.array(supply, dtype=np.float64)
+
+    def get_price(self, item_name: str) -> int:
+        """ Returns the price the next unit of an item would sell for. """
+        return int(self.quote([ITEMS.index(item_name)], [1])[0])
+
+    def quote(self, items: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        """ Returns what selling each quantity of each item would earn at
+            current prices, without selling anything.
+
+        Parameters:
+            items: The indices in ITEMS of the items to price.
+            quantities: The number of units of each item to sell.
+
+        Returns:
+            The revenue of each sale, rounded to whole money.
+        """
+        items = np.asarray(items)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        ratio = self._ratio
+        first = self._base[items] * ratio ** self._supply[items]
+        revenue = first * (1 - ratio ** quantities) / (1 - ratio)
+        return np.rint(revenue).astype(np.int64)
+
+    def sell(self, item_name: str, quantity: int) -> int:
+        """ Sells units of an item, lowering its price, and returns what they
+            earned.
+        """
+        index = ITEMS.index(item_name)
+        revenue = int(self.quote([index], [quantity])[0])
+        self._supply[index] += quantity
+        return revenue
+
+    def new_day(self) -> None:
+        """ Lets the supply of every item recover by a day. """
+        self._supply *= self._recovery
@@ -0,0 +1,140 @@
+import sys
+import tracemalloc
+import types
+from collections import deque
+from typing import Optional
+import numpy as np
+from constants import *
+
+# Objects of these types are counted but not walked into: walking a function
+# or a class would reach much of the program, and Tk and PIL objects hold
+# references to the whole interface.
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType,
+                 types.MethodType, types.BuiltinFunctionType)
+_OPAQUE_MODULES = ('tkinter', 'PIL', '_tkinter')
+
+
+def _image_bytes(image: object) -> int:
+    """ Returns an estimate of the pixel memory of a Tk image, which lives
+        in Tk rather than Python: four bytes per pixel.
+    """
+    try:
+        return int(image.width()) * int(image.height()) * 4
+    except Exception:
+        return 0
+
+
+def deep_sizeof(
+        obj: object,
+        seen: Optional[set[int]] = None,
+        by_type: Optional[dict[str, list[int]]] = None
+    ) -> int:
+    """ Returns the bytes used by an object and everything it refers to, by
+        walking containers, instance attributes and NumPy arrays with
+        sys.getsizeof. Objects already in seen are not counted again, so a
+        series of walks sharing seen counts each object once.
+
+    Parameters:
+        obj: The object to size.
+        seen: The ids of objects already counted, updated by the walk.
+        by_type: If given, the [count, bytes] of each type name walked are
+                 added to it.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        kind = type(obj)
+        if isinstance(obj, np.ndarray):
+            # An array owning its data counts it in getsizeof; a view's
+            # data belongs to its base.
+            if obj.base is not None:
+                stack.append(obj.base)
+        elif isinstance(obj, _OPAQUE_TYPES):
+            pass
+        elif kind.__module__.split('.')[0] in _OPAQUE_MODULES:
+            size += _image_bytes(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float, bool, complex,
+                                  type(None), memoryview)):
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for slot in getattr(kind, '__slots__', ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+        total += size
+        if by_type is not None:
+            counts = by_type.setdefault(kind.__name__, [0, 0])
+            counts[0] += 1
+            counts[1] += size
+    return total
+
+
+def format_report(report: dict) -> str:
+    """ Returns a memory report from FarmModel.memory_report as text. """
+    lines = [f'{name:<20} {size:>14,} B'
+             for name, size in report['sections'].items()]
+    lines.append(f'{"total":<20} {report["total"]:>14,} B')
+    if report.get('traced') is not None:
+        lines.append(f'{"traced (process)":<20} {report["traced"]:>14,} B')
+    if report.get('types'):
+        lines.append('')
+        top = list(report['types'].items())[:MEMORY_TOP_TYPES]
+        for name, (count, size) in top:
+            lines.append(f'{name:<20} {size:>14,} B {count:>10,} objects')
+    return '\n'.join(lines)
+
+
+class AllocationTracker:
+    """ Compares tracemalloc snapshots of the process, to find what grew
+        between two points, such as before and after reloading a map.
+        Tracing slows allocation, so it only starts when the tracker does.
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        """ Constructor for a tracker that has not started.
+
+        Parameters:
+            frames: The number of stack frames recorded per allocation.
+        """
+        self._frames = frames
+        self._snapshot = None
+
+    def is_started(self) -> bool:
+        """ Returns True iff the tracker has taken a snapshot. """
+        return self._snapshot is not None
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """ Returns a snapshot of this process's traced allocations, without
+            tracemalloc's own.
+        """
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+
+    def compare(self, limit: int = MEMORY_TOP_LINES) -> list[str]:
+        """ Takes a snapshot, starting tracemalloc if needed.
+
+        Returns:
+            The source lines whose allocations grew the most since the last
+            snapshot, largest first, or nothing for the first snapshot.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+        snapshot = self._take_snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            return []
+        stats = snapshot.compare_to(previous, 'lineno')
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
@@ -0,0 +1,162 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import numpy as np
+from constants import *
+
+class CountingCache(dict):
+    """ An image cache that counts its hits and misses. get_image reads a
+        cached image with cache[name] and stores a new one with
+        cache[name] = image, so every read is a hit and every store a miss.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, key):
+        self.hits += 1
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value) -> None:
+        self.misses += 1
+        super().__setitem__(key, value)
+
+
+class FrameMetrics:
+    """ Timings of the frames drawn by the game, kept for the most recent
+        frames. Each frame records how long each named section took (the
+        model update that led to it and the redraw of each view) along with
+        counters such as image cache hits and canvas items.
+
+        Sections timed between frames, such as the model update, are
+        attributed to the next frame. The game only creates a FrameMetrics
+        when metrics are enabled, so they cost nothing otherwise.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        """ Constructor for metrics with no frames.
+
+        Parameters:
+            window: The number of recent frames kept.
+        """
+        self._frames = deque(maxlen=window)
+        self._sections = {}
+        self._counters = {}
+        self._frame_start = None
+        self._clock_start = time.perf_counter()
+
+    @contextmanager
+    def time(self, section: str) -> Iterator[None]:
+        """ Times the body of a with statement as the named section of the
+            current (or next) frame.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._sections[section] = self._sections.get(section, 0.0) + elapsed
+
+    def count(self, counter: str, amount: int) -> None:
+        """ Adds to a counter of the current (or next) frame. """
+        self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def start_frame(self) -> None:
+        """ Starts timing a frame. """
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """ Finishes the current frame, recording its total time, sections
+            and counters.
+        """
+        end = time.perf_counter()
+        start = end if self._frame_start is None else self._frame_start
+        self._sections[FRAME_SECTION] = end - start
+        self._frames.append({
+            'start': start - self._clock_start,
+            'sections': self._sections,
+            'counters': self._counters,
+        })
+        self._sections = {}
+        self._counters = {}
+        self._frame_start = None
+
+    def get_frames(self) -> list[dict]:
+        """ Returns the recorded frames, oldest first. Times are in seconds,
+            and each frame's start is relative to when the metrics were
+            created.
+        """
+        return list(self._frames)
+
+    def get_percentiles(
+            self,
+            section: str,
+            percentiles: tuple[float, ...] = METRICS_PERCENTILES
+        ) -> Optional[dict[float, float]]:
+        """ Returns the given percentiles of a section's time over the recent
+            frames, in milliseconds, or None if no recent frame timed it.
+        """
+        times = [frame['sections'][section] for frame in self._frames
+                 if section in frame['sections']]
+        if not times:
+            return None
+        values = np.percentile(np.array(times) * 1000, percentiles)
+        return dict(zip(percentiles, values.tolist()))
+
+    def get_report(self) -> dict[str, dict]:
+        """ Returns the percentiles of every section's time, and the latest
+            value of every counter, over the recent frames.
+        """
+        sections = {name for frame in self._frames
+                    for name in frame['sections']}
+        counters = {}
+        for frame in self._frames:
+            counters.update(frame['counters'])
+        return {
+            'frames': len(self._frames),
+            'sections': {name: self.get_percentiles(name)
+                         for name in sorted(sections)},
+            'counters': counters,
+        }
+
+    def dump(self, path: str) -> None:
+        """ Writes the recorded frames to a JSON file. """
+        with open(path, 'w') as file:
+            json.dump(self.get_frames(), file, indent=1)
+
+
+class StartupProfile:
+    """ How long each phase of starting the game took, in the order the
+        phases were recorded.
+    """
+
+    def __init__(self) -> None:
+        """ Constructor for a profile with no phases. """
+        self._phases = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        """ Adds to the time taken by a phase. """
+        self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        """ Times the body of a with statement as the named phase. """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def get_phases(self) -> dict[str, float]:
+        """ Returns the time taken by each phase, in seconds. """
+        return dict(self._phases)
+
+    def report(self) -> str:
+        """ Returns a table of the time taken by each phase. """
+        width = max((len(phase) for phase in self._phases), default=0)
+        return '\n'.join(f'{phase:<{width}}  {seconds * 1000:8.1f} ms'
+                         for phase, seconds in self._phases.items())
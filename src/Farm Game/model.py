@@ -1,16 +1,71 @@
-from typing import Optional
+import sys
+import tracemalloc
+from typing import Callable, Optional
+import numpy as np
 from constants import *
-from a3_support import *
+from map_io import read_map
+from plant_store import PlantStore
+from weather import Weather
+from devices import Devices
+from history import History
+from market import Market
+from inventory import Inventory
+from tracing import traced
+from memory import deep_sizeof
+
+class _PlantField:
+    """ A plant attribute that lives in the farm's PlantStore while the plant
+        is on a farm, and on the plant itself otherwise.
+    """
+
+    def __init__(self, column: str) -> None:
+        self._column = column
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+
+    def __get__(self, plant: Optional['Plant'], owner: type = None):
+        if plant is None:
+            return self
+        if plant._store is None:
+            return plant.__dict__[self._name]
+        return getattr(plant._store, self._column)[plant._slot].item()
+
+    def __set__(self, plant: 'Plant', value) -> None:
+        if plant._store is None:
+            plant.__dict__[self._name] = value
+        else:
+            getattr(plant._store, self._column)[plant._slot] = value
+
 
 class Plant:
     """ Abstract plant class, which implements default behaviour and specifies
         required functions for all plant subclasses.
     """
     _NAME = 'abstract plant'
+    _PRODUCE = None
+    _YIELD = 1
+    _HARVEST_STAGE = 3
+    # Stage a plant returns to after harvest, for plants kept on harvest
+    _REGROW_STAGE = None
+
+    _stage = _PlantField('stage')
+    _days = _PlantField('days')
+    _days_since_harvest = _PlantField('since_harvest')
+    _growth = _PlantField('growth')
+    _quality = _PlantField('quality')
+    _store = None
+    _slot = None
+    # Whether the plant belongs to a PlantPool, to be reused once removed
+    _pooled = False
 
     def __init__(self):
         """ Constructor for this type of plant. """
         self._stage = 1
+        self._days = 0
+        self._days_since_harvest = 0
+        self._growth = 0.0
+        self._quality = 1.0
     
     def get_name(self) -> str:
         """ Returns the name of the plant. """
@@ -22,7 +77,7 @@ class Plant:
     
     def can_harvest(self) -> bool:
         """ Returns True iff the plant is ready to be harvested. """
-        return self._stage >= 3
+        return self._stage >= self._HARVEST_STAGE
     
     def remove_on_harvest(self) -> bool:
         """ Returns True iff the plant should be removed from the grid after
@@ -45,41 +100,126 @@ class Plant:
         """
         raise NotImplementedError('Plant subclasses must implement harvest()')
 
+    @staticmethod
+    def age_batch(
+            stage: np.ndarray,
+            days: np.ndarray,
+            since_harvest: np.ndarray,
+            steps: np.ndarray
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Ages many plants of this type at once, following the same rules as
+            age().
+
+        Parameters:
+            stage, days, since_harvest: The current state of each plant.
+            steps: The number of days each plant should age by.
+
+        Returns:
+            The new (stage, days, since_harvest) of each plant.
+        """
+        raise NotImplementedError(
+            'Plant subclasses must implement age_batch()')
+
+    @staticmethod
+    def harvest_days(
+            stage: np.ndarray,
+            days: np.ndarray,
+            since_harvest: np.ndarray
+        ) -> tuple[np.ndarray, int]:
+        """ Returns when many plants of this type will next be ready to
+            harvest, if each is harvested as soon as it is ready and grows one
+            stage-day per day.
+
+        Parameters:
+            stage, days, since_harvest: The current state of each plant.
+
+        Returns:
+            The number of days until each plant is first ready (0 if it is
+            ready now), and the number of days it then takes to regrow after
+            each harvest (0 if it is removed on harvest).
+        """
+        raise NotImplementedError(
+            'Plant subclasses must implement harvest_days()')
+
+    def get_state(self) -> tuple[int, int, int, float, float]:
+        """ Returns the plant's (stage, days, since_harvest, growth, quality).
+        """
+        return (self._stage, self._days, self._days_since_harvest,
+                self._growth, self._quality)
+
+    def _yield(self, amount: int) -> int:
+        """ Returns the given base harvest amount scaled by the plant's quality.
+        """
+        return max(1, int(amount * self._quality + 0.5))
+
+    def _bind(self, store: PlantStore, slot: int) -> None:
+        """ Moves this plant's state into the given slot of a plant store. """
+        state = self.get_state()
+        self._store, self._slot = store, slot
+        store.set_state(slot, state)
+
+    def _unbind(self) -> None:
+        """ Moves this plant's state out of its plant store. """
+        state = self.get_state()
+        self._store = self._slot = None
+        (self._stage, self._days, self._days_since_harvest, self._growth,
+         self._quality) = state
+
 
 class PotatoPlant(Plant):
     """ Potato plant has 5 stages, with stages 0-4 lasting one day each. At \
         stage 5 it is ready for harvest.
     """
     _NAME = 'potato'
+    _PRODUCE = 'Potato'
+    _YIELD = 1
+    _HARVEST_STAGE = 5
 
     def age(self) -> None:
         self._stage = min(self._stage + 1, 5)
+
+    @staticmethod
+    def age_batch(stage, days, since_harvest, steps):
+        return np.minimum(stage + steps, 5), days, since_harvest
+
+    @staticmethod
+    def harvest_days(stage, days, since_harvest):
+        return np.maximum(5 - stage, 0), 0
     
     def can_harvest(self) -> bool:
-        return self._stage == 5
+        return self._stage == self._HARVEST_STAGE
     
     def harvest(self) -> Optional[tuple[str, int]]:
         if self.can_harvest():
-            return ('Potato', 1)
+            return (self._PRODUCE, self._yield(self._YIELD))
 
 
 class KalePlant(Plant):
     """ Kale plant has 5 stages, with stage 5 being harvest. """
     _NAME = 'kale'
-    def __init__(self) -> None:
-        super().__init__()
-        self._days = 0
+    _PRODUCE = 'Kale'
+    _YIELD = 1
+    _HARVEST_STAGE = 5
 
     def age(self) -> None:
         self._days += 1
         self._stage = 5 if self._days >= 6 else (self._days + 1) // 2 + 1
 
+    @staticmethod
+    def age_batch(stage, days, since_harvest, steps):
+        days = days + steps
+        return np.where(days >= 6, 5, (days + 1) // 2 + 1), days, since_harvest
+
+    @staticmethod
+    def harvest_days(stage, days, since_harvest):
+        return np.where(stage == 5, 0, np.maximum(6 - days, 1)), 0
+
     def can_harvest(self) -> bool:
-        return self._stage == 5
+        return self._stage == self._HARVEST_STAGE
     
     def harvest(self) -> Optional[tuple[str, int]]:
         if self.can_harvest():
-            return ('Kale', 1)
+            return (self._PRODUCE, self._yield(self._YIELD))
 
 
 class BerryPlant(Plant):
@@ -88,13 +228,12 @@ class BerryPlant(Plant):
         days.
     """
     _NAME = 'berry'
+    _PRODUCE = 'Berry'
+    _YIELD = 3
+    _HARVEST_STAGE = 6
+    _REGROW_STAGE = 5
     _DAYS_TO_STAGE = [1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 4, 5, 5, 6]
 
-    def __init__(self) -> None:
-        super().__init__()
-        self._days = 0
-        self._days_since_harvest = 0
-
     def age(self) -> None:
         self._days += 1
 
@@ -110,18 +249,127 @@ class BerryPlant(Plant):
             self._stage = 6
         else:
             self._stage = 5
+
+    @staticmethod
+    def age_batch(stage, days, since_harvest, steps):
+        table = np.array(BerryPlant._DAYS_TO_STAGE)
+        new_days = days + steps
+        matured = new_days > 13
+
+        # Days past maturity count towards regrowth, and a plant reaching
+        # maturity today enters the regrowth phase at stage 6
+        since_harvest = since_harvest + np.where(
+            matured, new_days - np.maximum(days, 13), 0)
+        previous = np.where(days >= 13, stage, 6)
+        regrown = (since_harvest >= 4) | (previous == 6)
+        new_stage = np.where(
+            matured,
+            np.where(regrown, 6, 5),
+            table[np.minimum(new_days, 13)]
+        )
+        # Plants that did not grow today keep their stage, which may differ
+        # from the table if they were just harvested
+        return np.where(steps > 0, new_stage, stage), new_days, since_harvest
+
+    @staticmethod
+    def harvest_days(stage, days, since_harvest):
+        # Young plants first ripen on day 13, and mature ones 4 days after
+        # their last harvest
+        first = np.where(days < 13, 13 - days,
+                         np.maximum(4 - since_harvest, 1))
+        return np.where(stage == 6, 0, first), 4
         
     def remove_on_harvest(self) -> bool:
         return False
     
     def can_harvest(self) -> bool:
-        return self._stage == 6
+        return self._stage == self._HARVEST_STAGE
     
     def harvest(self) -> Optional[tuple[str, int]]:
         if self.can_harvest():
-            self._stage = 5
+            self._stage = self._REGROW_STAGE
             self._days_since_harvest = 0
-            return ('Berry', 3)
+            return (self._PRODUCE, self._yield(self._YIELD))
+
+
+# All plant types, in the order of their kind codes in a PlantStore
+PLANT_TYPES = [PotatoPlant, KalePlant, BerryPlant]
+
+
+def inventory_items(plant_types: list[type]) -> list[str]:
+    """ Returns every item an inventory can hold: ITEMS, followed by the seed
+        and produce of any registered plant type they do not include.
+    """
+    items = list(ITEMS)
+    for plant_type in plant_types:
+        for item_name in (f'{plant_type._PRODUCE} Seed', plant_type._PRODUCE):
+            if item_name not in items:
+                items.append(item_name)
+    return items
+
+# Items in the order of their index in an Inventory
+INVENTORY_ITEMS = inventory_items(PLANT_TYPES)
+
+
+class PlantPool:
+    """ Free lists of plants removed from a farm, reused for new plants of
+        the same type so that planting and harvesting in a loop allocates no
+        new plant objects. A released plant keeps its instance dictionary,
+        which a fresh plant would have to allocate again.
+
+        Only plants from acquire are released to the pool, and only if
+        nothing else still holds them, so a reference kept after a plant's
+        removal never sees it reused as a new plant.
+    """
+
+    def __init__(self, limit: int = PLANT_POOL_LIMIT) -> None:
+        """ Constructor for an empty pool.
+
+        Parameters:
+            limit: The most released plants kept of each type.
+        """
+        self._limit = limit
+        self._free = {}
+        self._created = 0
+
+    def acquire(self, plant_type: type) -> Plant:
+        """ Returns a new plant of the given type, reusing a released one if
+            there is one.
+        """
+        free = self._free.get(plant_type)
+        if free:
+            plant = free.pop()
+            plant.__init__()
+            return plant
+        self._created += 1
+        plant = plant_type()
+        plant._pooled = True
+        return plant
+
+    def release(self, plant: Plant, holders: int = 1) -> None:
+        """ Takes back a plant from acquire that has left its farm. Its state
+            is moved out of the plant store, so anything still holding it
+            sees it as it was when removed; such a plant is not reused.
+
+        Parameters:
+            plant: The plant to take back.
+            holders: The references to the plant the caller accounts for.
+        """
+        plant._unbind()
+        # The other references are release's parameter and getrefcount's
+        if sys.getrefcount(plant) > holders + 2:
+            return
+        free = self._free.setdefault(type(plant), [])
+        if len(free) < self._limit:
+            free.append(plant)
+
+    def get_created(self) -> int:
+        """ Returns the number of plant objects the pool has created. """
+        return self._created
+
+    def __len__(self) -> int:
+        """ Returns the number of released plants waiting to be reused. """
+        return sum(len(free) for free in self._free.values())
 
 
 class Player:
@@ -129,14 +377,19 @@ class Player:
 
     START_ENERGY = 100
 
-    def __init__(self) -> None:
-        """ Constructor for the player. """
-        self._energy = self.START_ENERGY
+    def __init__(self, start_energy: int = START_ENERGY) -> None:
+        """ Constructor for the player.
+
+        Parameters:
+            start_energy: The energy the player starts each day with.
+        """
+        self._start_energy = start_energy
+        self._energy = start_energy
         self._money = 0
-        self._inventory = {
+        self._inventory = Inventory(INVENTORY_ITEMS, {
             'Potato Seed': 5,
             'Kale Seed': 5,
-        }
+        })
         self._position = (0, 0)
         self._direction = DOWN
         self._selected_item = None
@@ -149,9 +402,9 @@ class Player:
         """ Returns the player's current money. """
         return self._money
     
-    def get_inventory(self) -> dict[str, int]:
-        """ Returns the player's current inventory, mapping item names to
-            amounts.
+    def get_inventory(self) -> Inventory:
+        """ Returns the player's current inventory, which maps the names of the
+            items the player has to their amounts.
         """
         return self._inventory
     
@@ -172,7 +425,17 @@ class Player:
     
     def reset_energy(self) -> None:
         """ Resets the player's energy to the starting amount. """
-        self._energy = self.START_ENERGY
+        self._energy = self._start_energy
+
+    def get_start_energy(self) -> int:
+        """ Returns the energy the player starts each day with. """
+        return self._start_energy
+
+    def set_start_energy(self, energy: int) -> None:
+        """ Sets the energy the player starts each day with, from the next
+            reset_energy on.
+        """
+        self._start_energy = energy
 
     def reduce_energy(self, amount: int) -> None:
         """ Reduces the player's energy by the given amount. Note that this
@@ -183,30 +446,63 @@ class Player:
         """
         self._energy -= amount
 
-    def sell(self, item_name: str, price: int) -> None:
-        """ Sells one instance of the given item for the given price, if the
-            player has some of the item available.
+    def sell(
+            self,
+            item_name: str,
+            price: int,
+            quantity: Optional[int] = 1
+        ) -> int:
+        """ Sells up to the given quantity of the given item for the given
+            price each, as many as the player has available.
         
         Parameters:
             item_name: The name of the item to sell.
-            price: The price to sell the item for.
+            price: The price to sell each unit of the item for.
+            quantity: The number of units to sell, or None to sell them all.
+
+        Returns:
+            The number of units sold.
         """
         amount = self._inventory.get(item_name, 0)
-        if amount > 0:
-            self._money += price
-            self.remove_item((item_name, 1))
+        sold = amount if quantity is None else min(quantity, amount)
+        if sold > 0:
+            self._money += price * sold
+            self.remove_item((item_name, sold))
+        return max(sold, 0)
 
-    def buy(self, item_name: str, price: int) -> None:
-        """ Buys one instance of the given item for the given price, if the
-            player has enough money.
+    def buy(
+            self,
+            item_name: str,
+            price: int,
+            quantity: Optional[int] = 1
+        ) -> int:
+        """ Buys up to the given quantity of the given item for the given price
+            each, as many as the player can afford.
 
         Parameters:
             item_name: The name of the item to buy.
-            price: The price to buy the item for.
+            price: The price to buy each unit of the item for.
+            quantity: The number of units to buy, or None to buy as many as
+                      possible.
+
+        Returns:
+            The number of units bought.
+
+        Raises:
+            ValueError: If the price is not positive.
         """
-        if self._money >= price:
-            self._money -= price
-            self.add_item((item_name, 1))
+        if price <= 0:
+            raise ValueError(f'price must be positive, not {price}')
+        affordable = self._money // price
+        bought = affordable if quantity is None else min(quantity, affordable)
+        if bought > 0:
+            self._money -= price * bought
+            self.add_item((item_name, bought))
+        return max(bought, 0)
+
+    def add_money(self, amount: int) -> None:
+        """ Adds the given amount to the player's money. """
+        self._money += amount
 
     def add_item(self, to_add: tuple[str, int]) -> None:
         """ Adds the given amount of the given item to the player's inventory.
@@ -215,7 +511,7 @@ class Player:
             to_add: A tuple of the item name and amount to add.
         """
         item_name, amount = to_add
-        self._inventory[item_name] = self._inventory.get(item_name, 0) + amount
+        self._inventory.add(item_name, amount)
 
     def remove_item(self, to_remove: tuple[str, int]) -> None:
         """ Removes the given amount of the given item from the player's
@@ -225,11 +521,7 @@ class Player:
             to_remove: A tuple of the item name and amount to remove.
         """
         item_name, amount = to_remove
-        new_amount = self._inventory.get(item_name, 0) - amount
-        if new_amount <= 0:
-            self._inventory.pop(item_name)
-        else:
-            self._inventory[item_name] = new_amount
+        self._inventory.remove(item_name, amount)
 
     def set_position(self, position: tuple[int, int]) -> None:
         """ Sets the player's position to the given position.
@@ -254,31 +546,178 @@ class Player:
         """ Returns the player's current direction. """
         return self._direction
 
+    def get_state(self) -> tuple:
+        """ Returns a copy of the player's energy, money, inventory, position,
+            direction and selected item.
+        """
+        return (self._energy, self._money, dict(self._inventory),
+                self._position, self._direction, self._selected_item)
+
+    def set_state(self, state: tuple) -> None:
+        """ Restores a state returned by get_state. """
+        (self._energy, self._money, inventory, self._position,
+         self._direction, self._selected_item) = state
+        self._inventory.set_amounts(inventory)
+
 
 class FarmModel:
     """ Represents the model for the farm game. """
 
-    def __init__(self, map_file: str) -> None:
+    def __init__(
+            self,
+            map_file: str | list[str],
+            weather: Optional[Weather] = None,
+            market: Optional[Market] = None,
+            plant_store: Optional[PlantStore] = None
+        ) -> None:
         """ Constructor for the farm model.
         
         Parameters:
-            map_file: The path to the file containing the map to use.
+            map_file: The path to the file containing the map to use, or the
+                      rows of the map itself (e.g. from mapgen.generate_map).
+            weather: The weather timeline to grow plants under. If None, every
+                     plant grows one stage-day per day.
+            market: The market to sell produce to. If None, items always sell
+                    at the prices in SELL_PRICES.
+            plant_store: An empty store to hold the plants in (such as a
+                         ShardedPlantStore). If None, a new PlantStore.
         """
-        self._map = read_map(map_file)
+        if isinstance(map_file, str):
+            self._map = read_map(map_file)
+        else:
+            self._map = list(map_file)
+        self._tiles = None
         self._plants = {}
+        self._store = (PlantStore(PLANT_TYPES) if plant_store is None
+                       else plant_store)
+        self._pool = PlantPool()
         self._player = Player()
         self._days_elapsed = 1
+        self._weather = weather
+        self._market = market
+        self._devices = Devices()
+        self._history = History()
     
     def get_plants(self) -> dict[tuple[int, int], Plant]:
         """ Returns the plants currently on the farm, as a dictionary mapping
             positions to plants.
         """
         return self._plants
+
+    def get_plant_store(self) -> PlantStore:
+        """ Returns the array store holding the state of the plants on the farm.
+        """
+        return self._store
+
+    def new_plant(self, plant_type: type) -> Plant:
+        """ Returns a new plant of the given type for this farm, reusing one
+            removed from it if possible. Once the plant leaves the farm, by
+            harvest or removal, it is reused unless something still holds it.
+        """
+        return self._pool.acquire(plant_type)
+
+    def discard_new_plant(self, plant: Plant) -> None:
+        """ Gives back a plant from new_plant that was never added. """
+        if plant._pooled and plant._store is None:
+            # Held by this method's caller and its parameter
+            self._pool.release(plant, holders=2)
+
+    def get_plant_pool(self) -> PlantPool:
+        """ Returns the pool reusing the plants removed from the farm. """
+        return self._pool
+
+    def get_plant_arrays(self) -> tuple[np.ndarray, ...]:
+        """ Returns the (kind, stage, row, col) arrays of the plants. """
+        store = self._store
+        slots = store.occupied()
+        return (store.kind[slots], store.stage[slots],
+                store.row[slots], store.col[slots])
+
+    def get_devices(self) -> dict[tuple[int, int], str]:
+        """ Returns the automation devices on the farm, as a dictionary mapping
+            positions to device types.
+        """
+        return self._devices.get_devices()
+
+    @traced('FarmModel.add_device')
+    def add_device(self, position: tuple[int, int], kind: str) -> bool:
+        """ Places an automation device at the given position, if there isn't
+            one there already.
+
+        Parameters:
+            position: The position at which to place the device.
+            kind: The type of device, one of SPRINKLER, HARVESTER or TILLER.
+
+        Returns:
+            True if the device was placed, False if the position is off the map,
+            the type is unknown, or there is already a device there.
+        """
+        row, col = position
+        rows, cols = self.get_dimensions()
+        if not (0 <= row < rows and 0 <= col < cols):
+            return False
+        if not self._devices.add(position, kind):
+            return False
+        self._history.record(('device', position, None))
+        return True
+
+    @traced('FarmModel.remove_device')
+    def remove_device(self, position: tuple[int, int]) -> None:
+        """ Removes the automation device at the given position, if there is
+            one.
+        """
+        kind = self._devices.remove(position)
+        if kind is not None:
+            self._history.record(('device', position, kind))
+
+    def get_weather(self) -> Optional[Weather]:
+        """ Returns the weather timeline for this game, if there is one. """
+        return self._weather
     
     def get_player(self) -> Player:
         """ Returns the player in this game. """
         return self._player
+
+    def get_market(self) -> Optional[Market]:
+        """ Returns the market for this game, if there is one. """
+        return self._market
+
+    def get_sell_price(self, item_name: str) -> Optional[int]:
+        """ Returns the price the next unit of the given item sells for, or
+            None if it cannot be sold.
+        """
+        if item_name not in SELL_PRICES:
+            return None
+        if self._market is None:
+            return SELL_PRICES[item_name]
+        return self._market.get_price(item_name)
+
+    @traced('FarmModel.sell_to_market')
+    def sell_to_market(
+            self,
+            item_name: str,
+            quantity: Optional[int] = 1
+        ) -> int:
+        """ Sells up to the given quantity of an item from the player's
+            inventory to the market, at falling prices.
+
+        Parameters:
+            item_name: The name of the item to sell.
+            quantity: The number of units to sell, or None to sell them all.
+
+        Returns:
+            The number of units sold.
+        """
+        amount = self._player.get_inventory().get(item_name, 0)
+        sold = amount if quantity is None else min(quantity, amount)
+        if sold <= 0 or item_name not in SELL_PRICES:
+            return 0
+        self._history.record(('market', self._market.get_state()))
+        self._player.add_money(self._market.sell(item_name, sold))
+        self._player.remove_item((item_name, sold))
+        return sold
     
+    @traced('FarmModel.add_plant')
     def add_plant(self, position: tuple[int, int], plant: Plant) -> bool:
         """ Adds the given plant to the given position, if the player has enough
             energy and there is no plant already at that position. Also handles
@@ -297,11 +736,13 @@ class FarmModel:
 
         if self._plants.get(position) is None:
             self._player.reduce_energy(PLANT_COST)
-            self._plants[position] = plant
+            self._record_plant(position)
+            self._place_plant(position, plant)
             return True
     
         return False
     
+    @traced('FarmModel.harvest_plant')
     def harvest_plant(
             self,
             position: tuple[int, int]
@@ -324,9 +765,14 @@ class FarmModel:
 
         if self._plants.get(position) is not None:
             plant = self._plants[position]
+            record = self._get_plant_record(position)
             harvest_result = plant.harvest()
             if harvest_result is not None:
-                if plant.remove_on_harvest():
+                self._history.record(record)
+                remove = plant.remove_on_harvest()
+                # Let go of the plant, so the pool can reuse it once removed
+                del plant
+                if remove:
                     self.remove_plant(position)
                 self._player.reduce_energy(HARVEST_COST)
                 return harvest_result
@@ -335,19 +781,207 @@ class FarmModel:
         """ Returns the map for this game. """
         return self._map
     
+    def get_tile_array(self) -> np.ndarray:
+        """ Returns the map as a (rows, columns) array of tile character codes.
+            The array is cached until the map next changes, and must not be
+            modified.
+        """
+        if self._tiles is None:
+            self._tiles = np.frombuffer(
+                ''.join(self._map).encode('ascii'),
+                dtype=np.uint8
+            ).reshape(self.get_dimensions())
+        return self._tiles
+
     def get_dimensions(self) -> tuple[int, int]:
         """ Returns the dimensions of the map for this game, as
             (number of rows, number of columns).
         """
         return (len(self._map), len(self._map[0]))
     
+    @traced('FarmModel.new_day')
     def new_day(self) -> None:
-        """ Advances the game by one day. """
-        for plant in self._plants.values():
-            plant.age()
+        """ Advances the game by one day. Plants are aged together through the
+            plant store, at the speed given by today's weather on their tile.
+            Tillers, sprinklers and harvesters then act on every cell in their
+            reach, using masks computed over the whole grid.
+        """
+        self._till_covered()
+
+        store = self._store
+        slots = store.occupied()
+        rows, cols = store.row[slots], store.col[slots]
+        rate, yields = 1.0, 1.0
+        if self._weather is not None:
+            tiles = self.get_tile_array()[rows, cols]
+            growth, yield_table = self._weather.get_tables(self._days_elapsed)
+            rate, yields = growth[tiles], yield_table[tiles]
+        if self._devices.has(SPRINKLER):
+            watered = self._devices.coverage(
+                SPRINKLER, self.get_dimensions())[rows, cols]
+            rate = rate * np.where(watered, SPRINKLER_GROWTH, 1.0)
+        if self._history.is_recording():
+            self._history.record(('ages', self._get_plant_columns(slots)))
+        store.age(rate, yields)
+
+        self._harvest_covered()
+        if self._market is not None:
+            self._history.record(('market', self._market.get_state()))
+            self._market.new_day()
         self._days_elapsed += 1
         self._player.reset_energy()
     
+    def _till_covered(self) -> None:
+        """ Tills every untilled cell within reach of a tiller. """
+        if not self._devices.has(TILLER):
+            return
+
+        tiles = self.get_tile_array()
+        covered = self._devices.coverage(TILLER, self.get_dimensions())
+        mask = covered & (tiles == ord(UNTILLED))
+        changed = np.flatnonzero(mask.any(axis=1))
+        if len(changed) == 0:
+            return
+
+        tiles = np.where(mask, np.uint8(ord(SOIL)), tiles)
+        for row in changed:
+            self._record_row(row)
+            self._map[row] = tiles[row].tobytes().decode('ascii')
+        self._tiles = tiles
+
+    def _harvest_covered(self) -> None:
+        """ Harvests every ready plant within reach of a harvester into the
+            player's inventory.
+        """
+        if not self._devices.has(HARVESTER):
+            return
+
+        store = self._store
+        slots = store.occupied()
+        covered = self._devices.coverage(HARVESTER, self.get_dimensions())
+        ready = (covered[store.row[slots], store.col[slots]]
+                 & (store.stage[slots]
+                    == store.get_harvest_stages()[store.kind[slots]]))
+
+        harvested = {}
+        for slot in slots[ready]:
+            position = (int(store.row[slot]), int(store.col[slot]))
+            plant = self._plants[position]
+            self._record_plant(position)
+            item_name, amount = plant.harvest()
+            if plant.remove_on_harvest():
+                self._discard_plant(position)
+            harvested[item_name] = harvested.get(item_name, 0) + amount
+        for to_add in harvested.items():
+            self._player.add_item(to_add)
+
+    def forecast(self, days: int) -> list[tuple[dict[str, int], int]]:
+        """ Projects the harvest of the plants on the farm over the coming
+            days, if every plant is harvested as soon as it is ready and
+            nothing new is planted. The projection is computed from each
+            plant's state, grouping plants by type and by the day they are
+            first ready, without stepping the model. Plants are assumed to
+            grow one stage-day per day: weather and sprinklers are ignored.
+
+        Parameters:
+            days: The number of days to project, starting with today.
+
+        Returns:
+            For each day (today first), the amount of each produce harvested
+            that day, and its value at SELL_PRICES.
+        """
+        store = self._store
+        slots = store.occupied()
+        kinds = store.kind[slots]
+        harvests = {}
+        for kind, plant_type in enumerate(store.get_plant_types(), start=1):
+            of_kind = slots[kinds == kind]
+            if len(of_kind) == 0:
+                continue
+            first, period = plant_type.harvest_days(
+                store.stage[of_kind].astype(np.int32),
+                store.days[of_kind], store.since_harvest[of_kind])
+            quality = store.quality[of_kind].astype(np.float64)
+            amounts = np.maximum(
+                1, (plant_type._YIELD * quality + 0.5).astype(np.int64))
+
+            soon = first < days
+            daily = np.bincount(first[soon], weights=amounts[soon],
+                                minlength=days)[:days]
+            # Regrowing plants are harvested again every period days.
+            if period > 0:
+                for offset in range(period):
+                    daily[offset::period] = np.cumsum(daily[offset::period])
+            produce = plant_type._PRODUCE
+            harvests[produce] = harvests.get(produce, 0) + daily
+
+        forecast = []
+        for day in range(days):
+            amounts = {produce: int(daily[day])
+                       for produce, daily in harvests.items()}
+            revenue = sum(amount * SELL_PRICES[produce]
+                          for produce, amount in amounts.items())
+            forecast.append((amounts, revenue))
+        return forecast
+
+    def memory_report(
+            self,
+            extra: Optional[dict[str, object]] = None,
+            by_type: bool = False
+        ) -> dict:
+        """ Reports the memory used by each part of the farm, measured by
+            walking it with sys.getsizeof (see memory.deep_sizeof). Each
+            object is counted once, in the first section that reaches it.
+
+        Parameters:
+            extra: Other objects to report, by name, such as image caches.
+            by_type: Whether to include a breakdown by type.
+
+        Returns:
+            A dictionary holding the bytes of each section ('sections') and
+            their total ('total'); the bytes tracemalloc has traced in the
+            process, if it is tracing ('traced'); and, if by_type, the
+            [count, bytes] of each type, largest first ('types').
+        """
+        plants = list(self._plants.values())
+        parts = {
+            'map': self._map,
+            'tile_array': self._tiles,
+            'plant_store': self._store,
+            # The plants themselves, then the dictionary indexing them
+            'plants': plants,
+            'plant_dict': self._plants,
+            'plant_pool': self._pool,
+            'inventory': self._player.get_inventory(),
+            'player': self._player,
+            'devices': self._devices,
+            'history': self._history,
+            'weather': self._weather,
+            'market': self._market,
+            **(extra or {}),
+        }
+        # The list gathering the plants is not part of the farm.
+        seen = {id(plants)}
+        types = {} if by_type else None
+        sections = {}
+        for name, part in parts.items():
+            if part is plants:
+                sections[name] = sum(deep_sizeof(plant, seen, types)
+                                     for plant in plants)
+            else:
+                sections[name] = (0 if part is None
+                                  else deep_sizeof(part, seen, types))
+        report = {
+            'sections': sections,
+            'total': sum(sections.values()),
+            'traced': (tracemalloc.get_traced_memory()[0]
+                       if tracemalloc.is_tracing() else None),
+        }
+        if by_type:
+            report['types'] = dict(sorted(types.items(),
+                                          key=lambda item: -item[1][1]))
+        return report
+
     def get_days_elapsed(self) -> int:
         """ Returns the number of days elapsed in this game. """
         return self._days_elapsed
@@ -362,6 +996,7 @@ class FarmModel:
         """
         return self.get_player().get_direction()
 
+    @traced('FarmModel.move_player')
     def move_player(self, direction: str) -> None:
         """ Moves the player in the given direction, if possible. Also handles
             reducing the player's energy appropriately for moving.
@@ -394,6 +1029,7 @@ class FarmModel:
         if (new_row, new_col) != (old_row, old_col):
             self._player.reduce_energy(MOVE_COST)
 
+    @traced('FarmModel.till_soil')
     def till_soil(self, position: tuple[int, int]) -> None:
         """ Tills the soil at the given position, if it is untilled soil.
             Reduces the player's energy appropriately.
@@ -408,8 +1044,11 @@ class FarmModel:
         row, col = position
         if self._map[row][col] == UNTILLED:
             self._player.reduce_energy(TILL_COST)
+            self._record_row(row)
             self._map[row] = self._map[row][:col] + SOIL + self._map[row][col + 1:]
+            self._tiles = None
     
+    @traced('FarmModel.untill_soil')
     def untill_soil(self, position: tuple[int, int]) -> None:
         """ Untills the soil at the given position, if it is tilled soil.
             Reduces the player's energy appropriately.
@@ -424,8 +1063,11 @@ class FarmModel:
         row, col = position
         if position not in self._plants and self._map[row][col] == SOIL:
             self._player.reduce_energy(UNTILL_COST)
+            self._record_row(row)
             self._map[row] = self._map[row][:col] + UNTILLED + self._map[row][col + 1:]
+            self._tiles = None
 
+    @traced('FarmModel.remove_plant')
     def remove_plant(self, position: tuple[int, int]) -> None:
         """ Removes the plant at the given position, if there is one.
             Reduces the player's energy appropriately.
@@ -439,4 +1081,187 @@ class FarmModel:
 
         if position in self._plants:
             self._player.reduce_energy(REMOVE_COST)
-            self._plants.pop(position)
+            self._discard_plant(position)
+
+    def _discard_plant(self, position: tuple[int, int]) -> None:
+        """ Takes the plant at the given position off the farm, freeing its slot
+            in the plant store, and its object too if it came from new_plant.
+        """
+        self._record_plant(position)
+        plant = self._plants.pop(position)
+        slot = plant._slot
+        if plant._pooled:
+            self._pool.release(plant)
+        else:
+            plant._unbind()
+        self._store.remove(slot)
+
+    def restore_state(
+            self,
+            days_elapsed: int,
+            player_state: tuple,
+            plants: list[tuple[tuple[int, int], int, tuple]],
+            devices: dict[tuple[int, int], str]
+        ) -> None:
+        """ Replaces the state of a model fresh from its map with a saved one.
+
+        Parameters:
+            days_elapsed: The saved day.
+            player_state: The player's state, as from Player.get_state.
+            plants: The (position, kind code, state) of each plant.
+            devices: The devices on the farm, mapping positions to types.
+        """
+        self._days_elapsed = days_elapsed
+        self._player.set_state(player_state)
+        for position, kind, state in plants:
+            self._restore(('plant', position, (kind, state)))
+        self._restore(('devices', devices))
+
+    def _place_plant(self, position: tuple[int, int], plant: Plant) -> None:
+        """ Puts a plant on the farm, moving its state into the plant store. """
+        self._plants[position] = plant
+        kind = self._store.kind_of(type(plant))
+        plant._bind(self._store, self._store.add(kind, position,
+                                                 plant.get_state()))
+
+    def do(self, apply: Callable[[], None]) -> None:
+        """ Performs an action that can be undone. Changes the action makes to
+            the model are recorded as the values they replace, so an edit costs
+            memory in proportion to what it changed rather than to the size of
+            the farm.
+
+        Parameters:
+            apply: Performs the action on this model.
+        """
+        self._record_edit(apply, clear_redo=True)
+
+    @traced('FarmModel.undo')
+    def undo(self) -> bool:
+        """ Reverts the most recent action performed with do() or redo().
+
+        Returns:
+            True if an action was undone, False if there was nothing to undo.
+        """
+        edit = self._history.pop_undo()
+        if edit is None:
+            return False
+        for record in reversed(edit.get_records()):
+            self._restore(record)
+        return True
+
+    @traced('FarmModel.redo')
+    def redo(self) -> bool:
+        """ Performs the most recently undone action again.
+
+        Returns:
+            True if an action was redone, False if there was nothing to redo.
+        """
+        edit = self._history.pop_redo()
+        if edit is None:
+            return False
+        self._record_edit(edit.get_apply(), clear_redo=False)
+        return True
+
+    def can_undo(self) -> bool:
+        """ Returns True iff there is an action to undo. """
+        return self._history.can_undo()
+
+    def can_redo(self) -> bool:
+        """ Returns True iff there is an action to redo. """
+        return self._history.can_redo()
+
+    def _record_edit(self, apply: Callable[[], None], clear_redo: bool) -> None:
+        """ Performs an action while recording the changes it makes. """
+        if self._history.is_recording():
+            apply()
+            return
+
+        edit = self._history.begin(apply)
+        before = (self._player.get_state(), self._days_elapsed)
+        edit.add(('state',) + before)
+        try:
+            apply()
+        finally:
+            changed = (len(edit.get_records()) > 1
+                       or (self._player.get_state(), self._days_elapsed)
+                       != before)
+            self._history.end(changed, clear_redo)
+
+    def _record_row(self, row: int) -> None:
+        """ Records the current contents of a row of the map. """
+        self._history.record(('row', row, self._map[row]))
+
+    def _record_plant(self, position: tuple[int, int]) -> None:
+        """ Records the plant at the given position, if any, as its kind code
+            and state.
+        """
+        if self._history.is_recording():
+            self._history.record(self._get_plant_record(position))
+
+    def _get_plant_record(self, position: tuple[int, int]) -> Optional[tuple]:
+        """ Returns a record of the plant at the given position, for a change
+            that is yet to be made, or None if no edit is being recorded.
+        """
+        if not self._history.is_recording():
+            return None
+        plant = self._plants.get(position)
+        old = None
+        if plant is not None:
+            old = (self._store.kind_of(type(plant)), plant.get_state())
+        return ('plant', position, old)
+
+    def _get_plant_columns(self, slots: np.ndarray) -> dict[str, np.ndarray]:
+        """ Returns copies of the plant store's columns for the given slots. """
+        return {name: getattr(self._store, name)[slots]
+                for name in ('row', 'col', 'stage', 'days', 'since_harvest',
+                             'growth', 'quality')}
+
+    def _restore(self, record: tuple) -> None:
+        """ Puts back the values held in a record of an edit. """
+        kind = record[0]
+        if kind == 'state':
+            _, player_state, self._days_elapsed = record
+            self._player.set_state(player_state)
+        elif kind == 'row':
+            _, row, contents = record
+            self._map[row] = contents
+            self._tiles = None
+        elif kind == 'plant':
+            _, position, old = record
+            if position in self._plants:
+                self._discard_plant(position)
+            if old is not None:
+                plant_kind, state = old
+                plant = self._pool.acquire(PLANT_TYPES[plant_kind - 1])
+                (plant._stage, plant._days, plant._days_since_harvest,
+                 plant._growth, plant._quality) = state
+                self._place_plant(position, plant)
+        elif kind == 'ages':
+            self._restore_plant_columns(record[1])
+        elif kind == 'market':
+            self._market.set_state(record[1])
+        elif kind == 'device':
+            _, position, device = record
+            self._devices.remove(position)
+            if device is not None:
+                self._devices.add(position, device)
+        elif kind == 'devices':
+            for position in list(self._devices.get_devices()):
+                self._devices.remove(position)
+            for position, device in record[1].items():
+                self._devices.add(position, device)
+
+    def _restore_plant_columns(self, columns: dict[str, np.ndarray]) -> None:
+        """ Writes plant states saved by _get_plant_columns back to the plants
+            at the same positions, wherever they are now stored.
+        """
+        store = self._store
+        width = self.get_dimensions()[1]
+        slots = store.occupied()
+        keys = store.row[slots].astype(np.int64) * width + store.col[slots]
+        order = np.argsort(keys)
+        wanted = columns['row'].astype(np.int64) * width + columns['col']
+        targets = slots[order[np.searchsorted(keys[order], wanted)]]
+        for name, values in columns.items():
+            if name not in ('row', 'col'):
+                getattr(store, name)[targets] = values
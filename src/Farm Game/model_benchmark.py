@@ -0,0 +1,468 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+import numpy as np
+from constants import *
+from model import *
+from mapgen import generate_map
+from sharded_store import ShardedPlantStore
+
+# The map sizes (rows and columns) and plant densities (fractions of cells
+# with a plant) benchmarked by default
+BENCHMARK_SIZES = (10, 100, 1000, 5000)
+BENCHMARK_DENSITIES = (0.0, 0.1, 0.5, 1.0)
+
+# Farms with more plants than this are skipped, since every plant is also a
+# Python object. By default this leaves 5000x5000 farms only benchmarked
+# empty; skipped farms are listed in the results.
+BENCHMARK_MAX_PLANTS = 1_000_000
+
+# The least time (in seconds) each operation is timed for, and the most
+# cells used for operations that need distinct cells
+BENCHMARK_MIN_TIME = 0.2
+BENCHMARK_CELLS = 1000
+
+# How much slower (or bigger) than the baseline a result may be before it
+# is reported as a regression
+BENCHMARK_TOLERANCE = 0.25
+
+OPERATIONS = ('move_player', 'till_soil/untill_soil', 'add_plant',
+              'harvest_plant', 'new_day')
+MEMORY = ('bytes_per_tile', 'bytes_per_plant')
+
+# The plant churn benchmark: the cells planted and harvested each cycle, and
+# the number of cycles measured after a warm-up cycle
+CHURN_CELLS = 1000
+CHURN_CYCLES = 50
+
+# The shard scaling benchmark: the farm's size and plant density, the shard
+# counts compared, and the number of days timed for each, keeping the fastest
+SCALING_SIZE = 1000
+SCALING_DENSITY = 0.5
+SCALING_SHARDS = (1, 2, 4, 8)
+SCALING_DAYS = 3
+
+
+def config_name(size: int, density: float) -> str:
+    """ Returns the name of the results for a farm size and plant density. """
+    return f'{size}x{size}@{round(density * 100)}%'
+
+
+def build_farm(
+        size: int,
+        density: float,
+        seed: int = 0,
+        shards: int = 0
+    ) -> tuple[FarmModel, dict[str, float]]:
+    """ Builds a farm on a generated map with plants on the given fraction of
+        its cells, which are tilled first. Plant types are mixed evenly.
+
+    Parameters:
+        shards: If positive, the plants are held in a ShardedPlantStore that
+                ages them in this many bands in parallel; its shared memory is
+                not counted by tracemalloc. The store must then be closed.
+
+    Returns:
+        The farm, and the memory it uses per tile and per plant, measured
+        with tracemalloc.
+    """
+    rng = np.random.default_rng(seed)
+    tracemalloc.start()
+    try:
+        rows = generate_map(size, size, seed)
+        tiles = np.frombuffer(''.join(rows).encode('ascii'),
+                              dtype=np.uint8).reshape(size, size).copy()
+        cells = rng.permutation(size * size)[:round(size * size * density)]
+        tiles.flat[cells] = ord(SOIL)
+        store = ShardedPlantStore(PLANT_TYPES, shards) if shards > 0 else None
+        model = FarmModel([row.tobytes().decode('ascii') for row in tiles],
+                          plant_store=store)
+        del rows, tiles
+        map_bytes = tracemalloc.get_traced_memory()[0]
+
+        player = model.get_player()
+        player.set_start_energy(sys.maxsize)
+        player.reset_energy()
+        for index, cell in enumerate(cells.tolist()):
+            plant_type = PLANT_TYPES[index % len(PLANT_TYPES)]
+            model.add_plant(divmod(cell, size), plant_type())
+        plant_bytes = tracemalloc.get_traced_memory()[0] - map_bytes
+    finally:
+        tracemalloc.stop()
+
+    return model, {
+        'bytes_per_tile': map_bytes / (size * size),
+        'bytes_per_plant': plant_bytes / len(cells) if len(cells) else None,
+    }
+
+
+def ops_per_second(run: Callable[[int], int], min_time: float) -> float:
+    """ Returns how many operations per second run performs. run(count)
+        performs about count operations and returns how many it did; the
+        count is doubled until a run lasts min_time.
+    """
+    count = 1
+    while True:
+        start = time.perf_counter()
+        done = run(count)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return done / elapsed
+        count *= 2
+
+
+def _ripen(model: FarmModel, positions: list[tuple[int, int]]) -> None:
+    """ Makes the plants at the given positions ready for harvest. """
+    store = model.get_plant_store()
+    cols = model.get_dimensions()[1]
+    slots = store.occupied()
+    keys = [row * cols + col for row, col in positions]
+    slots = slots[np.isin(store.row[slots].astype(np.int64) * cols
+                          + store.col[slots], keys)]
+    store.stage[slots] = store.get_harvest_stages()[store.kind[slots]]
+
+
+def benchmark_farm(
+        model: FarmModel,
+        min_time: float = BENCHMARK_MIN_TIME,
+        cells: int = BENCHMARK_CELLS,
+        seed: int = 0
+    ) -> dict[str, Optional[float]]:
+    """ Returns the operations per second of each of OPERATIONS on a farm
+        built by build_farm, or None for operations the farm has no cells
+        for. The farm is left with the same plants and tiles.
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = model.get_dimensions()
+    tiles = model.get_tile_array()
+    plants = model.get_plants()
+    results = {}
+
+    model.get_player().set_position((rows // 2, cols // 2))
+    moves = (RIGHT, LEFT)
+    def move(count: int) -> int:
+        for index in range(count):
+            model.move_player(moves[index & 1])
+        return count
+    results['move_player'] = ops_per_second(move, min_time)
+
+    untilled = np.flatnonzero(tiles.ravel() == ord(UNTILLED))
+    untilled = [divmod(int(cell), cols)
+                for cell in rng.permutation(untilled)[:cells]]
+    def till(count: int) -> int:
+        for index in range(count):
+            position = untilled[index % len(untilled)]
+            model.till_soil(position)
+            model.untill_soil(position)
+        return 2 * count
+    results['till_soil/untill_soil'] = (
+        ops_per_second(till, min_time) if untilled else None)
+
+    # Plants are added to, then harvested from, cells cleared of any plant
+    # they had, which are replanted afterwards.
+    positions = [divmod(int(cell), cols)
+                 for cell in rng.permutation(rows * cols)[:cells]]
+    replaced = {position: plants[position] for position in positions
+                if position in plants}
+    for position in replaced:
+        model.remove_plant(position)
+
+    add_time = harvest_time = 0.0
+    done = 0
+    while add_time + harvest_time < min_time:
+        start = time.perf_counter()
+        for position in positions:
+            model.add_plant(position, model.new_plant(PotatoPlant))
+        add_time += time.perf_counter() - start
+        _ripen(model, positions)
+        start = time.perf_counter()
+        for position in positions:
+            model.harvest_plant(position)
+        harvest_time += time.perf_counter() - start
+        done += len(positions)
+    results['add_plant'] = done / add_time
+    results['harvest_plant'] = done / harvest_time
+
+    for position, plant in replaced.items():
+        model.add_plant(position, type(plant)())
+
+    def new_day(count: int) -> int:
+        for _ in range(count):
+            model.new_day()
+        return count
+    results['new_day'] = ops_per_second(new_day, min_time)
+    return results
+
+
+def benchmark_churn(
+        cells: int = CHURN_CELLS,
+        cycles: int = CHURN_CYCLES,
+        pooled: bool = True
+    ) -> dict[str, float]:
+    """ Plants potatoes on the given number of cells and harvests them, over
+        and over, as bots do.
+
+    Parameters:
+        pooled: Whether plants come from FarmModel.new_plant, which reuses
+                harvested plants, rather than being constructed each time.
+
+    Returns:
+        The plant/harvest cycles per second, and per cycle: the plant objects
+        created, the net number of memory blocks allocated (see
+        sys.getallocatedblocks), and the garbage collections run.
+    """
+    size = int(np.ceil(np.sqrt(cells)))
+    model = FarmModel([SOIL * size] * size)
+    player = model.get_player()
+    player.set_start_energy(sys.maxsize)
+    player.reset_energy()
+    positions = [divmod(cell, size) for cell in range(cells)]
+    pool = model.get_plant_pool()
+
+    def cycle() -> int:
+        """ Runs one cycle and returns the plant objects it created. """
+        created = pool.get_created()
+        for position in positions:
+            model.add_plant(position, model.new_plant(PotatoPlant) if pooled
+                            else PotatoPlant())
+        _ripen(model, positions)
+        for position in positions:
+            model.harvest_plant(position)
+        return pool.get_created() - created if pooled else len(positions)
+
+    collections = [0]
+    def count_collection(phase: str, info: dict) -> None:
+        if phase == 'start':
+            collections[0] += 1
+
+    # The warm-up cycle grows the plant store, the inventory and the pool.
+    cycle()
+    created = 0
+    gc.callbacks.append(count_collection)
+    try:
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        for _ in range(cycles):
+            created += cycle()
+        elapsed = time.perf_counter() - start
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        gc.callbacks.remove(count_collection)
+    return {
+        'cycles_per_second': cycles * cells / elapsed,
+        'plants_created_per_cycle': created / (cycles * cells),
+        'blocks_per_cycle': blocks / (cycles * cells),
+        'gc_collections_per_cycle': collections[0] / (cycles * cells),
+    }
+
+
+def benchmark_scaling(
+        size: int = SCALING_SIZE,
+        density: float = SCALING_DENSITY,
+        shard_counts: tuple[int, ...] = SCALING_SHARDS,
+        days: int = SCALING_DAYS,
+        seed: int = 0
+    ) -> dict[int, float]:
+    """ Times new_day on one farm with its plants aged in each number of
+        bands in parallel, as by build_farm. One shard, or a farm with fewer
+        than DAY_SHARD_MIN_PLANTS plants, ages them in this process.
+
+    Returns:
+        The fastest new_day (in seconds) for each shard count.
+    """
+    results = {}
+    for shards in shard_counts:
+        model, _ = build_farm(size, density, seed, shards)
+        store = model.get_plant_store()
+        try:
+            # The first day starts the worker processes.
+            model.new_day()
+            best = float('inf')
+            for _ in range(days):
+                start = time.perf_counter()
+                model.new_day()
+                best = min(best, time.perf_counter() - start)
+            results[shards] = best
+        finally:
+            store.close()
+    return results
+
+
+def run_benchmarks(
+        sizes: tuple[int, ...] = BENCHMARK_SIZES,
+        densities: tuple[float, ...] = BENCHMARK_DENSITIES,
+        max_plants: int = BENCHMARK_MAX_PLANTS,
+        min_time: float = BENCHMARK_MIN_TIME,
+        seed: int = 0,
+        log: Optional[Callable[[str], None]] = None,
+        shards: int = 0
+    ) -> dict:
+    """ Benchmarks every combination of map size and plant density, skipping
+        those with more than max_plants plants. With shards, farms are built
+        as by build_farm, so new_day ages large farms in parallel.
+
+    Returns:
+        The results, as {'meta': {...}, 'results': {name: {metric: value}},
+        'skipped': [name, ...]}, where each name is from config_name and the
+        metrics are OPERATIONS (in operations per second) and MEMORY (in
+        bytes).
+    """
+    results = {}
+    skipped = []
+    for size in sizes:
+        for density in densities:
+            name = config_name(size, density)
+            if size * size * density > max_plants:
+                skipped.append(name)
+                if log is not None:
+                    log(f'{name}: skipped (over {max_plants:,} plants)')
+                continue
+            model, memory = build_farm(size, density, seed, shards)
+            try:
+                results[name] = {**benchmark_farm(model, min_time, seed=seed),
+                                 **memory}
+            finally:
+                if shards > 0:
+                    model.get_plant_store().close()
+            if log is not None:
+                log(format_results(name, results[name]))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'min_time': min_time,
+            'seed': seed,
+            'shards': shards,
+            'max_plants': max_plants,
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def format_results(name: str, results: dict[str, Optional[float]]) -> str:
+    """ Returns one line summarising the results of one farm. """
+    parts = [name]
+    for metric in OPERATIONS:
+        value = results.get(metric)
+        parts.append(f'{metric} ' + ('-' if value is None
+                                     else f'{value:,.0f}/s'))
+    for metric in MEMORY:
+        value = results.get(metric)
+        parts.append(f'{metric} ' + ('-' if value is None
+                                     else f'{value:,.1f}'))
+    return '  '.join(parts)
+
+
+def find_regressions(
+        results: dict,
+        baseline: dict,
+        tolerance: float = BENCHMARK_TOLERANCE,
+        lower_is_better: Callable[[str], bool] = MEMORY.__contains__
+    ) -> list[str]:
+    """ Returns a description of every result that regressed from the
+        baseline by more than the tolerance: by default, operations that got
+        slower or memory that grew. Results missing from either are ignored.
+
+    Parameters:
+        results, baseline: Results in the format of run_benchmarks.
+        tolerance: The largest change that is not a regression, as a
+                   fraction of the baseline.
+        lower_is_better: Whether a metric regresses by growing, rather than
+                         by shrinking.
+    """
+    regressions = []
+    for name, metrics in results['results'].items():
+        base_metrics = baseline['results'].get(name, {})
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if value is None or base is None or base == 0:
+                continue
+            change = value / base - 1
+            if lower_is_better(metric):
+                regressed = change > tolerance
+            else:
+                regressed = change < -tolerance
+            if regressed:
+                regressions.append(f'{name} {metric}: {value:,.1f} vs '
+                                   f'{base:,.1f} ({change:+.0%})')
+    return regressions
+
+
+def main() -> None:
+    """ Benchmarks the farm model, optionally saving the results as a
+        baseline and comparing them with an earlier baseline. Exits with
+        status 1 if any result regressed.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark FarmModel.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=BENCHMARK_SIZES)
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=BENCHMARK_DENSITIES)
+    parser.add_argument('--max-plants', type=int,
+                        default=BENCHMARK_MAX_PLANTS)
+    parser.add_argument('--min-time', type=float, default=BENCHMARK_MIN_TIME)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shards', type=int, default=0,
+                        help='age plants in this many row bands in parallel '
+                             '(0 for none, -1 for one per CPU)')
+    parser.add_argument('--churn', action='store_true',
+                        help='only benchmark planting and harvesting in a '
+                             'loop, with and without plant pooling')
+    parser.add_argument('--scaling', action='store_true',
+                        help='only time new_day on one large farm with each '
+                             'number of shards')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare with results saved '
+                                           'in this file')
+    parser.add_argument('--tolerance', type=float,
+                        default=BENCHMARK_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.churn:
+        for pooled in (True, False):
+            results = benchmark_churn(pooled=pooled)
+            print(('pooled' if pooled else 'unpooled') + '  ' + '  '.join(
+                f'{metric} {value:,.3f}' for metric, value in results.items()))
+        return
+
+    if args.scaling:
+        results = benchmark_scaling(seed=args.seed)
+        first = next(iter(results.values()))
+        for shards, seconds in results.items():
+            print(f'{shards} shards  new_day {seconds * 1000:,.1f} ms  '
+                  f'{first / seconds:,.2f}x')
+        return
+
+    shards = (os.cpu_count() or 1) if args.shards < 0 else args.shards
+    print(f'new_day shards: {shards or "none"} '
+          f'(parallel from {DAY_SHARD_MIN_PLANTS:,} plants)')
+    results = run_benchmarks(tuple(args.sizes), tuple(args.densities),
+                             args.max_plants, args.min_time, args.seed,
+                             log=print, shards=shards)
+    if results['skipped']:
+        print(f'skipped {len(results["skipped"])} farms over '
+              f'{args.max_plants:,} plants (raise --max-plants to run them): '
+              + ', '.join(results['skipped']))
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
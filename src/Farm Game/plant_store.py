@@ -0,0 +1,183 @@
+import numpy as np
+
+class PlantStore:
+    """ Stores the state of every plant on a farm as parallel arrays indexed by
+        slot, so that daily updates can be applied to all plants at once.
+
+        Slot kinds are 1-based indices into the plant types given to the
+        constructor; kind 0 marks an empty slot. Freed slots are kept on a
+        stack and reused by later plants.
+    """
+    COLUMNS = {
+        'kind': np.int8,
+        'stage': np.int8,
+        'days': np.int32,
+        'since_harvest': np.int32,
+        'growth': np.float32,
+        'quality': np.float32,
+        'row': np.int32,
+        'col': np.int32,
+    }
+    START_CAPACITY = 64
+
+    def __init__(self, plant_types: list[type]) -> None:
+        """ Constructor for the plant store.
+
+        Parameters:
+            plant_types: The plant classes that may be stored, in kind order.
+        """
+        self._plant_types = plant_types
+        self._size = 0
+        self._free = []
+        self._allocate(self.START_CAPACITY)
+
+    def _allocate(self, capacity: int) -> None:
+        """ (Re)allocates every column with the given capacity, keeping the
+            contents of the slots in use.
+        """
+        for name, dtype in self.COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if hasattr(self, name):
+                column[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, column)
+        self._capacity = capacity
+
+    def get_plant_types(self) -> list[type]:
+        """ Returns the plant classes stored, in kind order. """
+        return self._plant_types
+
+    def kind_of(self, plant_type: type) -> int:
+        """ Returns the kind code used for the given plant class. """
+        return self._plant_types.index(plant_type) + 1
+
+    def get_harvest_stages(self) -> np.ndarray:
+        """ Returns the stage at which each kind of plant can be harvested,
+            indexed by kind code.
+        """
+        return np.array([0] + [plant_type._HARVEST_STAGE
+                               for plant_type in self._plant_types])
+
+    def __len__(self) -> int:
+        """ Returns the number of plants in the store. """
+        return self._size - len(self._free)
+
+    def get_size(self) -> int:
+        """ Returns the number of slots in use or on the free stack. Columns
+            only need to be read up to this index.
+        """
+        return self._size
+
+    def add(
+            self,
+            kind: int,
+            position: tuple[int, int],
+            state: tuple[int, int, int, float, float]
+        ) -> int:
+        """ Adds a plant to the store and returns the slot it was placed in.
+
+        Parameters:
+            kind: The kind code of the plant.
+            position: The (row, col) position of the plant.
+            state: The plant's (stage, days, since_harvest, growth, quality).
+        """
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == self._capacity:
+                self._allocate(self._capacity * 2)
+            slot = self._size
+            self._size += 1
+        self.kind[slot] = kind
+        self.row[slot], self.col[slot] = position
+        self.set_state(slot, state)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """ Frees the given slot for reuse. """
+        self.kind[slot] = 0
+        self._free.append(slot)
+
+    def get_state(self, slot: int) -> tuple[int, int, int, float, float]:
+        """ Returns the (stage, days, since_harvest, growth, quality) of the
+            plant in the given slot.
+        """
+        return (int(self.stage[slot]), int(self.days[slot]),
+                int(self.since_harvest[slot]), float(self.growth[slot]),
+                float(self.quality[slot]))
+
+    def set_state(
+            self,
+            slot: int,
+            state: tuple[int, int, int, float, float]
+        ) -> None:
+        """ Overwrites the state of the plant in the given slot. """
+        (self.stage[slot], self.days[slot], self.since_harvest[slot],
+         self.growth[slot], self.quality[slot]) = state
+
+    def occupied(self) -> np.ndarray:
+        """ Returns the indices of all slots holding a plant. """
+        return np.flatnonzero(self.kind[:self._size])
+
+    def age(
+            self,
+            rate: np.ndarray | float = 1.0,
+            yield_factor: np.ndarray | float = 1.0
+        ) -> None:
+        """ Ages every plant by one day.
+
+        Parameters:
+            rate: Growth speed for each occupied slot (in occupied() order), or
+                  one speed for all plants. Fractional growth carries over to
+                  later days.
+            yield_factor: Yield multiplier for today, per occupied slot or for
+                          all plants. Each plant's quality tracks a moving
+                          average of these.
+        """
+        age_slots(self, self._plant_types, self.occupied(), rate, yield_factor)
+
+
+def age_slots(
+        columns,
+        plant_types: list[type],
+        slots: np.ndarray,
+        rate: np.ndarray | float = 1.0,
+        yield_factor: np.ndarray | float = 1.0
+    ) -> None:
+    """ Ages the plants in the given slots by one day. This is the daily update
+        of a PlantStore, but works on any object with the same plant columns
+        (kind, stage, days, since_harvest, growth and quality), such as the
+        per-cell arrays of a batch of farms.
+
+    Parameters:
+        columns: The object holding the plant columns, updated in place.
+        plant_types: The plant classes, in kind order.
+        slots: The indices of the slots holding the plants to age.
+        rate, yield_factor: As for PlantStore.age, per slot or for all slots.
+    """
+    if len(slots) == 0:
+        return
+
+    if np.isscalar(rate) and rate == 1.0:
+        steps = np.ones(len(slots), dtype=np.int32)
+    else:
+        growth = columns.growth[slots] + rate
+        steps = growth.astype(np.int32)
+        columns.growth[slots] = growth - steps
+    if not (np.isscalar(yield_factor) and yield_factor == 1.0):
+        quality = columns.quality[slots]
+        columns.quality[slots] = quality + (yield_factor - quality) * 0.25
+
+    kinds = columns.kind[slots]
+    for kind, plant_type in enumerate(plant_types, start=1):
+        of_kind = slots[kinds == kind]
+        if len(of_kind) == 0:
+            continue
+        stage, days, since = plant_type.age_batch(
+            columns.stage[of_kind].astype(np.int32),
+            columns.days[of_kind],
+            columns.since_harvest[of_kind],
+            steps[kinds == kind]
+        )
+        columns.stage[of_kind] = stage
+        columns.days[of_kind] = days
+        columns.since_harvest[of_kind] = since
@@ -0,0 +1,264 @@
+import argparse
+import json
+import sys
+import time
+import tkinter as tk
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+from unittest import mock
+from PIL import ImageTk
+from constants import *
+from model import *
+from a3 import FarmView, InfoBar, ItemView
+from model_benchmark import (BENCHMARK_TOLERANCE, build_farm,
+                             find_regressions)
+
+# The map sizes (rows and columns) benchmarked by default, covering both
+# sprite and low-detail drawing, and the plant density of their farms
+RENDER_SIZES = (10, 50, 100, 500)
+RENDER_DENSITY = 0.5
+RENDER_FRAMES = 50
+
+# The widget calls that are counted
+RECORDED_CALLS = ('create_image', 'create_text', 'create_rectangle',
+                  'delete', 'itemconfig', 'config', 'paste')
+
+
+class RecordingWidget:
+    """ A stand-in for Tk widgets that needs no display. It counts the calls
+        in RECORDED_CALLS, made to any stand-in, in one shared Counter, and
+        keeps a canvas's items so find_all works. Everything else a view
+        does to a widget (packing, binding) is accepted and ignored.
+    """
+
+    calls = Counter()
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._items = {}
+        self._next_item = 1
+
+    def _create(self, name: str, kwargs: dict) -> int:
+        """ Records the creation of a canvas item and returns its id. """
+        self.calls[name] += 1
+        item = self._next_item
+        self._next_item += 1
+        tags = kwargs.get('tags', ())
+        self._items[item] = {tags} if isinstance(tags, str) else set(tags)
+        return item
+
+    def create_image(self, *args, **kwargs) -> int:
+        return self._create('create_image', kwargs)
+
+    def create_text(self, *args, **kwargs) -> int:
+        return self._create('create_text', kwargs)
+
+    def create_rectangle(self, *args, **kwargs) -> int:
+        return self._create('create_rectangle', kwargs)
+
+    def delete(self, *tags_or_ids) -> None:
+        self.calls['delete'] += 1
+        for tag in tags_or_ids:
+            for item, tags in list(self._items.items()):
+                if tag in ('all', tk.ALL, item) or tag in tags:
+                    del self._items[item]
+
+    def find_all(self) -> tuple[int, ...]:
+        return tuple(self._items)
+
+    def itemconfig(self, *args, **kwargs) -> None:
+        self.calls['itemconfig'] += 1
+
+    def config(self, *args, **kwargs) -> None:
+        self.calls['config'] += 1
+
+    configure = itemconfigure = config
+
+    def pack(self, *args, **kwargs) -> None:
+        pass
+
+    def bind(self, *args, **kwargs) -> None:
+        pass
+
+
+class RecordingCanvas(RecordingWidget, tk.Canvas):
+    """ A stand-in for tk.Canvas (see RecordingWidget). """
+
+
+class RecordingFrame(RecordingWidget, tk.Frame):
+    """ A stand-in for tk.Frame (see RecordingWidget). """
+
+
+class RecordingPhotoImage:
+    """ A stand-in for ImageTk.PhotoImage that counts pastes. """
+
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def paste(self, *args, **kwargs) -> None:
+        RecordingWidget.calls['paste'] += 1
+
+
+class PlaceholderCache(dict):
+    """ An image cache holding every image, so get_image never loads one. """
+
+    def __contains__(self, key: object) -> bool:
+        return True
+
+    def __missing__(self, key: str) -> str:
+        return key
+
+
+def recording(view_class: type, stand_in: type) -> type:
+    """ Returns a subclass of a view whose Tk base class is replaced by a
+        stand-in, which comes before it in the method resolution order.
+    """
+    return type(f'Recording{view_class.__name__}', (view_class, stand_in), {})
+
+
+@contextmanager
+def recording_tk() -> Iterator[None]:
+    """ Replaces the Tk labels, buttons and photo images that views create
+        with stand-ins, for the duration of a with statement.
+    """
+    with mock.patch.object(tk, 'Label', RecordingWidget), \
+            mock.patch.object(tk, 'Button', RecordingWidget), \
+            mock.patch.object(ImageTk, 'PhotoImage', RecordingPhotoImage):
+        yield
+
+
+def benchmark_render(
+        size: int,
+        density: float = RENDER_DENSITY,
+        frames: int = RENDER_FRAMES,
+        seed: int = 0
+    ) -> dict[str, float]:
+    """ Draws frames of a farm as FarmGame does, with recording stand-ins
+        for Tk. Each frame the player moves and buys a seed, so every view
+        has something to redraw.
+
+    Returns:
+        For each of FarmView.redraw, InfoBar.redraw and ItemView.update, the
+        mean Python time per frame in ms ('<view> ms') and the mean number
+        of each recorded call per frame ('<view> <call>').
+    """
+    model, _ = build_farm(size, density, seed)
+    player = model.get_player()
+    player.add_money(frames * max(BUY_PRICES.values()))
+    calls = RecordingWidget.calls
+    calls.clear()
+
+    with recording_tk():
+        farm_view = recording(FarmView, RecordingCanvas)(
+            None, model.get_dimensions(), (FARM_WIDTH, FARM_WIDTH),
+            image_cache=PlaceholderCache()
+        )
+        info_bar = recording(InfoBar, RecordingCanvas)(None)
+        item_views = [recording(ItemView, RecordingFrame)(None, item, 0)
+                      for item in ITEMS]
+
+        def draw_farm() -> None:
+            position = model.get_player_position()
+            direction = model.get_player_direction()
+            if farm_view.is_low_detail():
+                farm_view.redraw_low_detail(
+                    model.get_tile_array(), model.get_plant_arrays(),
+                    position, direction, model.get_devices()
+                )
+            else:
+                farm_view.redraw(model.get_map(), model.get_plants(),
+                                 position, direction, model.get_devices())
+
+        def draw_info_bar() -> None:
+            day = model.get_days_elapsed()
+            timeline = model.get_weather()
+            weather = None if timeline is None else (
+                timeline.get_season(day), timeline.get_weather(day))
+            info_bar.redraw(day, player.get_money(), player.get_energy(),
+                            weather)
+
+        def draw_item_views() -> None:
+            inventory = player.get_inventory()
+            for item_view in item_views:
+                item_view.update(inventory.get(item_view._item_name, 0),
+                                 item_view._selected,
+                                 model.get_sell_price(item_view._item_name))
+
+        views = {'FarmView.redraw': draw_farm,
+                 'InfoBar.redraw': draw_info_bar,
+                 'ItemView.update': draw_item_views}
+        totals = {f'{name} {metric}': 0.0 for name in views
+                  for metric in ('ms',) + RECORDED_CALLS}
+        for frame in range(frames):
+            player.reset_energy()
+            model.move_player((RIGHT, LEFT)[frame % 2])
+            seed_name = SEEDS[frame % len(SEEDS)]
+            player.buy(seed_name, BUY_PRICES[seed_name])
+            for name, draw in views.items():
+                before = calls.copy()
+                start = time.perf_counter()
+                draw()
+                totals[f'{name} ms'] += (time.perf_counter() - start) * 1000
+                for call, count in (calls - before).items():
+                    totals[f'{name} {call}'] += count
+
+    return {metric: total / frames for metric, total in totals.items()}
+
+
+def run_benchmarks(
+        sizes: tuple[int, ...] = RENDER_SIZES,
+        density: float = RENDER_DENSITY,
+        frames: int = RENDER_FRAMES,
+        seed: int = 0
+    ) -> dict:
+    """ Benchmarks rendering each map size, returning results in the format
+        of model_benchmark.run_benchmarks, named '<size>x<size>'.
+    """
+    return {
+        'meta': {'density': density, 'frames': frames, 'seed': seed},
+        'results': {f'{size}x{size}': benchmark_render(size, density,
+                                                       frames, seed)
+                    for size in sizes},
+    }
+
+
+def main() -> None:
+    """ Benchmarks rendering, optionally saving the results as a baseline and
+        comparing them with an earlier baseline. Both the time and the
+        number of calls per frame regress by growing. Exits with status 1 if
+        any result regressed.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark farm rendering.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=RENDER_SIZES)
+    parser.add_argument('--density', type=float, default=RENDER_DENSITY)
+    parser.add_argument('--frames', type=int, default=RENDER_FRAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare with results saved '
+                                           'in this file')
+    parser.add_argument('--tolerance', type=float,
+                        default=BENCHMARK_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_benchmarks(tuple(args.sizes), args.density, args.frames,
+                             args.seed)
+    for name, metrics in results['results'].items():
+        print(name)
+        for metric, value in metrics.items():
+            print(f'  {metric:<32} {value:12,.2f}')
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance,
+                                       lambda metric: True)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+import numpy as np
+from constants import *
+from model import *
+
+# Layout of each plant in a save
+PLANT_DTYPE = np.dtype([
+    ('row', np.int32),
+    ('col', np.int32),
+    ('kind', np.int8),
+    ('stage', np.int8),
+    ('days', np.int32),
+    ('since_harvest', np.int32),
+    ('growth', np.float32),
+    ('quality', np.float32),
+])
+
+# How long close() waits for the last save to be written, in seconds
+CLOSE_TIMEOUT = 10
+
+
+class SaveSnapshot:
+    """ The state of a farm at one moment, taken cheaply enough to do on the
+        Tk thread. The map is kept as references to its rows, which the model
+        replaces rather than modifies, and the plants are copied out of the
+        plant store as one packed array. Serialising it is left to write().
+    """
+
+    def __init__(self, model: FarmModel) -> None:
+        """ Takes a snapshot of the given model.
+
+        Parameters:
+            model: The model to snapshot.
+        """
+        self._rows = list(model.get_map())
+        self._player = model.get_player().get_state()
+        self._days = model.get_days_elapsed()
+        self._devices = dict(model.get_devices())
+        weather = model.get_weather()
+        self._weather_seed = None if weather is None else weather.get_seed()
+        market = model.get_market()
+        self._market = None if market is None else market.get_state()
+
+        store = model.get_plant_store()
+        slots = store.occupied()
+        self._plants = np.empty(len(slots), dtype=PLANT_DTYPE)
+        for name in PLANT_DTYPE.names:
+            self._plants[name] = getattr(store, name)[slots]
+
+    def write(self, path: str, keep: int = AUTOSAVE_KEEP) -> None:
+        """ Writes the snapshot to the given path. The save is written to a
+            temporary file that is renamed into place, so the file at path is
+            always a complete save. The previous saves are kept as path.1 (the
+            most recent) to path.<keep - 1>.
+
+        Parameters:
+            path: The path of the save file.
+            keep: The number of saves to keep, including this one.
+        """
+        state = {
+            'player': self._player,
+            'days': self._days,
+            'devices': [[*position, kind]
+                        for position, kind in self._devices.items()],
+            'weather_seed': self._weather_seed,
+            'market': None if self._market is None else self._market.tolist(),
+        }
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp',
+                                         delete=False) as file:
+            try:
+                np.savez_compressed(
+                    file,
+                    tiles=np.frombuffer('\n'.join(self._rows).encode('ascii'),
+                                        dtype=np.uint8),
+                    plants=self._plants,
+                    state=np.frombuffer(json.dumps(state).encode('utf-8'),
+                                        dtype=np.uint8),
+                )
+                file.flush()
+                os.fsync(file.fileno())
+            except BaseException:
+                file.close()
+                os.unlink(file.name)
+                raise
+
+        # The current save is copied to path.1 rather than moved, so there is
+        # a complete save at path until the new one replaces it.
+        for number in range(keep - 1, 1, -1):
+            if os.path.exists(f'{path}.{number - 1}'):
+                os.replace(f'{path}.{number - 1}', f'{path}.{number}')
+        if keep > 1 and os.path.exists(path):
+            _copy_save(path, f'{path}.1')
+        os.replace(file.name, path)
+
+
+def _copy_save(path: str, copy: str) -> None:
+    """ Replaces the file at copy with a hard link to (or, where the file
+        system has none, a copy of) the file at path, in one rename.
+    """
+    partial = copy + '.tmp'
+    try:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        try:
+            os.link(path, partial)
+        except OSError:
+            shutil.copy2(path, partial)
+        os.replace(partial, copy)
+    except BaseException:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+
+
+def load_save(path: str) -> FarmModel:
+    """ Returns a model with the state saved at the given path.
+
+    Parameters:
+        path: The path of a save written by SaveSnapshot.write.
+    """
+    with np.load(path) as data:
+        rows = data['tiles'].tobytes().decode('ascii').split('\n')
+        plants = data['plants']
+        state = json.loads(data['state'].tobytes().decode('utf-8'))
+
+    seed = state['weather_seed']
+    market = None
+    if state.get('market') is not None:
+        market = Market()
+        market.set_state(state['market'])
+    model = FarmModel(rows, None if seed is None else Weather(seed), market)
+    energy, money, inventory, position, direction, selected = state['player']
+    model.restore_state(
+        state['days'],
+        (energy, money, inventory, tuple(position), direction, selected),
+        [((int(plant['row']), int(plant['col'])), int(plant['kind']),
+          (int(plant['stage']), int(plant['days']),
+           int(plant['since_harvest']), float(plant['growth']),
+           float(plant['quality'])))
+         for plant in plants],
+        {(row, col): kind for row, col, kind in state['devices']}
+    )
+    return model
+
+
+class Autosaver:
+    """ Writes save snapshots on a background thread, so the game never waits
+        for serialisation or disk I/O. Only the latest snapshot is kept while
+        a save is being written; older ones that were never started are
+        skipped.
+    """
+
+    def __init__(self, path: str, keep: int = AUTOSAVE_KEEP) -> None:
+        """ Starts the thread that writes saves.
+
+        Parameters:
+            path: The path of the save file.
+            keep: The number of saves to keep (see SaveSnapshot.write).
+        """
+        self._path = path
+        self._keep = keep
+        self._pending = None
+        self._closing = False
+        self._errors = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get_path(self) -> str:
+        """ Returns the path saves are written to. """
+        return self._path
+
+    def submit(self, snapshot: SaveSnapshot) -> None:
+        """ Queues a snapshot to be saved, replacing any that is still waiting.
+        """
+        with self._condition:
+            self._pending = snapshot
+            self._condition.notify()
+
+    def get_errors(self) -> list[str]:
+        """ Returns and clears the errors from failed saves. """
+        with self._condition:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def close(self, timeout: Optional[float] = CLOSE_TIMEOUT) -> None:
+        """ Writes the last queued snapshot, if any, and stops the thread. """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        """ Writes queued snapshots until the saver is closed. """
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closing:
+                    self._condition.wait()
+                snapshot, self._pending = self._pending, None
+                if snapshot is None:
+                    return
+            try:
+                snapshot.write(self._path, self._keep)
+            except Exception as error:
+                with self._condition:
+                    self._errors.append(repr(error))
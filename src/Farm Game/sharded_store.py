@@ -0,0 +1,241 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+import numpy as np
+from constants import *
+from plant_store import PlantStore, age_slots
+
+
+def _column_layout(capacity: int) -> tuple[dict[str, tuple], int]:
+    """ Returns the (dtype, offset) of each PlantStore column in a shared
+        block holding the given number of slots, and the size of the block.
+    """
+    layout, offset = {}, 0
+    for name, dtype in PlantStore.COLUMNS.items():
+        # Keep every column aligned to its own item size.
+        itemsize = np.dtype(dtype).itemsize
+        offset = -(-offset // itemsize) * itemsize
+        layout[name] = (dtype, offset)
+        offset += itemsize * capacity
+    return layout, max(offset, 1)
+
+
+class _Columns:
+    """ The plant columns of a shared block, viewed as NumPy arrays. """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int) -> None:
+        """ Views the columns of a block holding the given number of slots. """
+        for name, (dtype, offset) in _column_layout(capacity)[0].items():
+            setattr(self, name, np.ndarray(
+                (capacity,), dtype=dtype, buffer=shm.buf, offset=offset))
+
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """ Copies an array into a new shared block.
+
+    Returns:
+        The block, and the (name, dtype, length) a worker attaches to it with.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.dtype.str, len(array))
+
+
+# The blocks a worker process is attached to, by name. A worker keeps the
+# block of the store's columns between days, and drops the rest.
+_ATTACHED = {}
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """ Returns this worker's attachment to the named shared block. """
+    if name not in _ATTACHED:
+        _ATTACHED[name] = shared_memory.SharedMemory(name=name)
+    return _ATTACHED[name]
+
+
+def _detach_all_but(keep: str) -> None:
+    """ Closes this worker's attachments to every block but the named one. """
+    for name in [name for name in _ATTACHED if name != keep]:
+        try:
+            _ATTACHED.pop(name).close()
+        except BufferError:
+            pass
+
+
+def _attached_array(shared: tuple) -> np.ndarray:
+    """ Returns the array in a block described by _share. """
+    name, dtype, length = shared
+    return np.ndarray((length,), dtype=dtype, buffer=_attach(name).buf)
+
+
+def _age_band(
+        columns_name: str,
+        capacity: int,
+        plant_types: list[type],
+        band: tuple[int, int],
+        slots: tuple,
+        rate: tuple | float,
+        yield_factor: tuple | float
+    ) -> None:
+    """ Ages the plants in one band of rows, in a worker process.
+
+    Parameters:
+        columns_name, capacity: The shared block of the store's columns.
+        plant_types: The plant classes, in kind order.
+        band: The (start, stop) of the band's plants in slots.
+        slots: The shared occupied slots, grouped by band (see _share).
+        rate, yield_factor: The shared per-slot arrays aligned with slots, or
+                            one value for every plant.
+    """
+    columns = _Columns(_attach(columns_name), capacity)
+    start, stop = band
+    slots = _attached_array(slots)[start:stop]
+    per_slot = [value if np.isscalar(value)
+                else _attached_array(value)[start:stop]
+                for value in (rate, yield_factor)]
+    age_slots(columns, plant_types, slots, *per_slot)
+    del columns, slots, per_slot
+    _detach_all_but(columns_name)
+
+
+class ShardedPlantStore(PlantStore):
+    """ A PlantStore whose columns live in shared memory, so that the daily
+        update can be split into bands of rows aged in parallel by a pool of
+        worker processes. Every plant is aged by exactly one worker, with the
+        same per-plant arithmetic as PlantStore.age, so a farm ends each day
+        in exactly the state it would with a PlantStore.
+
+        Call close when done with the store, to stop the workers and free the
+        shared memory.
+    """
+
+    def __init__(
+            self,
+            plant_types: list[type],
+            shards: Optional[int] = None,
+            min_plants: int = DAY_SHARD_MIN_PLANTS
+        ) -> None:
+        """ Constructor for the plant store.
+
+        Parameters:
+            plant_types: The plant classes that may be stored, in kind order.
+            shards: The number of bands, and of worker processes, or None for
+                    one per CPU.
+            min_plants: The fewest plants worth aging in parallel; smaller
+                        farms are aged in this process.
+        """
+        self._shards = shards if shards is not None else os.cpu_count() or 1
+        self._min_plants = min_plants
+        self._shm = None
+        self._retired = []
+        self._pool = None
+        super().__init__(plant_types)
+
+    def get_shards(self) -> int:
+        """ Returns the number of bands the daily update is split into. """
+        return self._shards
+
+    def _allocate(self, capacity: int) -> None:
+        """ (Re)allocates every column in a new shared block with the given
+            capacity, keeping the contents of the slots in use.
+        """
+        shm = shared_memory.SharedMemory(
+            create=True, size=_column_layout(capacity)[1])
+        columns = _Columns(shm, capacity)
+        for name in self.COLUMNS:
+            if hasattr(self, name):
+                getattr(columns, name)[:self._size] = \
+                    getattr(self, name)[:self._size]
+            setattr(self, name, getattr(columns, name))
+        self._capacity = capacity
+        if self._shm is not None:
+            self._retire(self._shm)
+        self._shm = shm
+
+    def _retire(self, shm: shared_memory.SharedMemory) -> None:
+        """ Frees a shared block. It is closed once no array views it. """
+        shm.unlink()
+        self._retired.append(shm)
+        for retired in list(self._retired):
+            try:
+                retired.close()
+                self._retired.remove(retired)
+            except BufferError:
+                pass
+
+    def _get_bands(
+            self,
+            rows: np.ndarray
+        ) -> tuple[np.ndarray, list[tuple[int, int]]]:
+        """ Splits plants into bands of rows holding about as many plants as
+            each other, with the band edges at quantiles of the plants' rows.
+            Plants in one row stay in one band, so a farm with most of its
+            plants in a few rows may have fewer, or less even, bands.
+
+        Parameters:
+            rows: The row of each plant.
+
+        Returns:
+            The order that groups the plants by band, and the (start, stop)
+            of each non-empty band in that order.
+        """
+        quantiles = np.linspace(0, 1, self._shards + 1)[1:-1]
+        edges = np.quantile(rows, quantiles, method='lower')
+        bands = np.searchsorted(edges, rows, side='right').astype(np.uint16)
+        # A stable sort of small integers is a radix sort, linear in plants
+        order = np.argsort(bands, kind='stable')
+        stops = np.cumsum(np.bincount(bands, minlength=self._shards))
+        starts = stops - np.bincount(bands, minlength=self._shards)
+        return order, [(int(start), int(stop))
+                       for start, stop in zip(starts, stops) if stop > start]
+
+    def age(
+            self,
+            rate: np.ndarray | float = 1.0,
+            yield_factor: np.ndarray | float = 1.0
+        ) -> None:
+        """ Ages every plant by one day, as PlantStore.age, with each band of
+            rows aged by a worker process.
+        """
+        slots = self.occupied()
+        if self._shards <= 1 or len(slots) < max(self._min_plants, 1):
+            super().age(rate, yield_factor)
+            return
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self._shards)
+        # Each worker is sent only its own band's plants: the arrays are
+        # shared grouped by band, and a worker slices out its band.
+        order, bands = self._get_bands(self.row[slots])
+        blocks = []
+        try:
+            shared = []
+            for array in (slots, rate, yield_factor):
+                if np.isscalar(array):
+                    shared.append(array)
+                else:
+                    shm, description = _share(np.asarray(array)[order])
+                    blocks.append(shm)
+                    shared.append(description)
+            futures = [self._pool.submit(
+                _age_band, self._shm.name, self._capacity, self._plant_types,
+                band, *shared) for band in bands]
+            for future in futures:
+                future.result()
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    def close(self) -> None:
+        """ Stops the worker processes and frees the shared memory. The store
+            must not be used afterwards.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for name in self.COLUMNS:
+            delattr(self, name)
+        if self._shm is not None:
+            self._retire(self._shm)
+            self._shm = None
@@ -0,0 +1,90 @@
+import os
+import time
+from concurrent.futures import Executor, Future
+from PIL import ImageTk, Image
+from constants import *
+from model import PLANT_TYPES
+
+def sprite_names() -> list[str]:
+    """ Returns the path of every sprite the FarmView can draw: the tiles, the
+        player facing each way, and each stage of each plant.
+    """
+    names = [f'images/{IMAGES[tile]}' for tile in (GRASS, SOIL, UNTILLED)]
+    names += [f'images/player_{direction}.png' for direction in MOVE_DELTAS]
+    for plant_type in PLANT_TYPES:
+        names += [f'images/plants/{plant_type._NAME}/stage_{stage}.png'
+                  for stage in range(1, plant_type._HARVEST_STAGE + 1)]
+    return names
+
+
+def load_sprites(
+        names: list[str],
+        size: tuple[int, int]
+    ) -> dict[str, Image.Image]:
+    """ Decodes and resizes sprites, skipping any that do not exist. This
+        uses only PIL, so it can run off the Tk thread.
+
+    Parameters:
+        names: The paths of the sprites to load.
+        size: The size to resize them to, as (width, height).
+
+    Returns:
+        The loaded sprites, by path.
+    """
+    sprites = {}
+    for name in names:
+        if os.path.exists(name):
+            with Image.open(name) as image:
+                sprites[name] = image.resize(size)
+    return sprites
+
+
+def cache_sprites(
+        sprites: dict[str, Image.Image],
+        cache: dict[str, ImageTk.PhotoImage]
+    ) -> None:
+    """ Adds loaded sprites to an image cache used with get_image. This
+        creates Tk images, so it must run on the Tk thread.
+    """
+    for name, image in sprites.items():
+        cache[name] = ImageTk.PhotoImage(image=image)
+
+
+def _load_timed(
+        names: list[str],
+        size: tuple[int, int]
+    ) -> tuple[dict[str, Image.Image], float]:
+    """ Loads sprites (see load_sprites) and returns them with the time taken.
+    """
+    start = time.perf_counter()
+    sprites = load_sprites(names, size)
+    return sprites, time.perf_counter() - start
+
+
+def preload_sprites(
+        executor: Executor,
+        names: list[str],
+        size: tuple[int, int]
+    ) -> list[Future]:
+    """ Starts loading each sprite as a separate task, so a thread pool
+        decodes them in parallel. Pass the result to collect_sprites.
+    """
+    return [executor.submit(_load_timed, [name], size) for name in names]
+
+
+def collect_sprites(
+        futures: list[Future]
+    ) -> tuple[dict[str, Image.Image], float]:
+    """ Waits for sprites started by preload_sprites.
+
+    Returns:
+        The loaded sprites by path, and the total time spent loading them
+        across every thread.
+    """
+    sprites = {}
+    total = 0.0
+    for future in futures:
+        loaded, seconds = future.result()
+        sprites.update(loaded)
+        total += seconds
+    return sprites, total
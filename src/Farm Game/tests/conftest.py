@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The game modules are run as scripts from their own directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def map_file(tmp_path):
+    """ A 6x8 map file with untilled, tilled and grass columns. """
+    path = tmp_path / 'map.txt'
+    path.write_text('\n'.join(['UUSSGGUS'] * 6) + '\n')
+    return str(path)
@@ -0,0 +1,79 @@
+import pytest
+
+from constants import *
+from model import *
+import actions
+
+
+def test_planting_uses_selected_seed(map_file):
+    model = FarmModel(map_file)
+    actions.apply_keypress(model, PLANT_KEY, 'Kale Seed')
+
+    assert isinstance(model.get_plants()[(0, 0)], KalePlant)
+    assert model.get_player().get_inventory()['Kale Seed'] == 4
+
+
+@pytest.mark.parametrize('selected', [None, 'Potato', 'Berry Seed'])
+def test_planting_needs_a_seed_in_the_inventory(map_file, selected):
+    model = FarmModel(map_file)
+    actions.apply_keypress(model, PLANT_KEY, selected)
+
+    assert model.get_plants() == {}
+
+
+def test_planting_is_not_allowed_on_grass(map_file):
+    model = FarmModel(map_file)
+    for _ in range(4):
+        actions.apply_keypress(model, RIGHT)
+    actions.apply_keypress(model, PLANT_KEY, 'Potato Seed')
+
+    assert model.get_plants() == {}
+
+
+def test_harvest_adds_produce_to_inventory(map_file):
+    model = FarmModel(map_file)
+    actions.apply_keypress(model, PLANT_KEY, 'Potato Seed')
+    for _ in range(4):
+        actions.perform(model, 'next_day')
+    actions.apply_keypress(model, HARVEST_KEY)
+
+    assert model.get_player().get_inventory()['Potato'] == 1
+    assert model.get_plants() == {}
+
+
+def test_device_keys_place_and_remove_devices(map_file):
+    model = FarmModel(map_file)
+    actions.apply_keypress(model, '3')
+    assert model.get_devices() == {(0, 0): TILLER}
+    actions.apply_keypress(model, REMOVE_DEVICE_KEY)
+    assert model.get_devices() == {}
+
+
+def test_buy_and_sell_use_store_prices(map_file):
+    model = FarmModel(map_file)
+    actions.perform(model, 'sell', 'Kale Seed')
+    assert model.get_player().get_money() == SELL_PRICES['Kale Seed']
+    actions.perform(model, 'buy', 'Potato Seed')
+    assert model.get_player().get_money() == \
+        SELL_PRICES['Kale Seed'] - BUY_PRICES['Potato Seed']
+    assert model.get_player().get_inventory()['Potato Seed'] == 6
+
+
+def test_create_plant_by_produce_name():
+    assert isinstance(actions.create_plant('Berry'), BerryPlant)
+    assert actions.create_plant('Carrot') is None
+
+
+def test_planting_reuses_harvested_plants(map_file):
+    model = FarmModel(map_file)
+    model.get_player().add_item(('Kale Seed', 2))
+    model.get_player().set_position((0, 2))
+    actions.apply_keypress(model, PLANT_KEY, 'Kale Seed')
+    for _ in range(6):
+        model.new_day()
+    actions.apply_keypress(model, HARVEST_KEY)
+    model.get_player().reset_energy()
+    actions.apply_keypress(model, PLANT_KEY, 'Kale Seed')
+
+    assert model.get_plant_pool().get_created() == 1
+    assert model.get_plants()[(0, 2)].get_stage() == 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from constants import *
+from devices import Devices, box_sum
+from model import *
+
+
+def test_box_sum_matches_naive_convolution():
+    grid = np.random.default_rng(0).integers(0, 3, size=(7, 9))
+    for radius in range(4):
+        expected = np.zeros_like(grid)
+        for row in range(7):
+            for col in range(9):
+                expected[row, col] = grid[
+                    max(0, row - radius):row + radius + 1,
+                    max(0, col - radius):col + radius + 1].sum()
+        assert (box_sum(grid, radius) == expected).all()
+
+
+def test_coverage_is_clipped_at_map_edges():
+    devices = Devices()
+    devices.add((0, 0), TILLER)
+    mask = devices.coverage(TILLER, (6, 8))
+
+    assert mask.sum() == 9
+    assert mask[:3, :3].all()
+    assert not mask[5, 7]
+
+
+def test_coverage_is_recomputed_after_changes():
+    devices = Devices()
+    devices.add((2, 2), SPRINKLER)
+    assert devices.coverage(SPRINKLER, (6, 8)).sum() == 9
+    devices.add((5, 7), SPRINKLER)
+    assert devices.coverage(SPRINKLER, (6, 8)).sum() == 13
+    devices.remove((2, 2))
+    assert devices.coverage(SPRINKLER, (6, 8)).sum() == 4
+
+
+@pytest.mark.parametrize('position', [(-1, -1), (0, -1), (6, 0), (0, 8)])
+def test_devices_off_the_map_are_rejected(map_file, position):
+    model = FarmModel(map_file)
+    assert not model.add_device(position, TILLER)
+    model.new_day()
+    assert model.get_map() == FarmModel(map_file).get_map()
+
+
+def test_unknown_or_duplicate_devices_are_rejected(map_file):
+    model = FarmModel(map_file)
+    assert not model.add_device((0, 0), 'scarecrow')
+    assert model.add_device((0, 0), TILLER)
+    assert not model.add_device((0, 0), SPRINKLER)
+    assert model.get_devices() == {(0, 0): TILLER}
+
+
+def test_tiller_tills_untilled_cells_in_reach(map_file):
+    model = FarmModel(map_file)
+    model.add_device((5, 0), TILLER)
+    model.new_day()
+
+    for row, line in enumerate(model.get_map()):
+        expected = 'SSSSGGUS' if row >= 3 else 'UUSSGGUS'
+        assert line == expected
+    assert (model.get_tile_array() == np.frombuffer(
+        ''.join(model.get_map()).encode(), np.uint8).reshape(6, 8)).all()
+
+
+def test_sprinkler_speeds_up_plants_in_reach(map_file):
+    model = FarmModel(map_file)
+    model.add_device((0, 0), SPRINKLER)
+    model.add_plant((1, 1), KalePlant())
+    model.add_plant((2, 2), KalePlant())
+    for _ in range(4):
+        model.new_day()
+
+    assert model.get_plants()[(1, 1)]._days == 6
+    assert model.get_plants()[(2, 2)]._days == 4
+
+
+def test_harvester_collects_ready_plants_in_reach(map_file):
+    model = FarmModel(map_file)
+    model.add_device((5, 7), HARVESTER)
+    for position in [(4, 6), (5, 6), (3, 7)]:
+        model.get_player().reset_energy()
+        model.add_plant(position, PotatoPlant())
+    model.add_plant((4, 7), BerryPlant())
+    for _ in range(13):
+        model.new_day()
+
+    assert model.get_player().get_inventory()['Potato'] == 2
+    assert model.get_player().get_inventory()['Berry'] == 3
+    assert set(model.get_plants()) == {(3, 7), (4, 7)}
+    assert model.get_plants()[(4, 7)].get_stage() == 5
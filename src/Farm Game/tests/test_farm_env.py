@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from constants import *
+import farm_env
+from farm_env import ENV_ACTIONS, FarmEnv, VecFarmEnv
+
+
+def _random_actions(seed, steps, num_envs):
+    """ Random actions weighted towards farming, so plants get planted, grown
+        and harvested within a short run.
+    """
+    weights = np.ones(len(ENV_ACTIONS))
+    for index, action in enumerate(ENV_ACTIONS):
+        if action[0] == 'keypress' and action[1] in (PLANT_KEY, HARVEST_KEY):
+            weights[index] = 6
+        elif action[0] == 'next_day':
+            weights[index] = 8
+    rng = np.random.default_rng(seed)
+    return rng.choice(len(ENV_ACTIONS), size=(steps, num_envs),
+                      p=weights / weights.sum())
+
+
+@pytest.mark.parametrize('weather_seed', [None, 7])
+def test_batched_farms_match_single_farms(map_file, weather_seed):
+    num_envs = 4
+    singles = [FarmEnv(map_file, weather_seed, max_days=25)
+               for _ in range(num_envs)]
+    batch = VecFarmEnv(map_file, num_envs, weather_seed, max_days=25)
+
+    harvested = False
+    for env_actions in _random_actions(1, 1500, num_envs):
+        observations, rewards, dones, _ = batch.step(env_actions)
+        for index, (env, action) in enumerate(zip(singles, env_actions)):
+            observation, reward, done, _ = env.step(action)
+            if done:
+                observation = env.reset()
+            assert done == dones[index]
+            assert reward == rewards[index]
+            for key, value in observation.items():
+                assert (observations[key][index] == value).all(), key
+        harvested |= bool((observations['player'][:, -3:] > 0).any())
+    assert harvested
+
+
+def test_reward_is_money_earned(map_file):
+    env = FarmEnv(map_file)
+    sell = ENV_ACTIONS.index(('sell', 'Kale Seed'))
+    buy = ENV_ACTIONS.index(('buy', 'Potato Seed'))
+
+    assert env.step(sell)[1] == SELL_PRICES['Kale Seed']
+    assert env.step(buy)[1] == -BUY_PRICES['Potato Seed']
+
+
+def test_finished_episodes_are_restarted(map_file):
+    batch = VecFarmEnv(map_file, 3, max_days=2)
+    next_day = ENV_ACTIONS.index(('next_day',))
+    move = ENV_ACTIONS.index(('keypress', RIGHT))
+
+    batch.step([next_day, move, move])
+    observations, _, dones, _ = batch.step([next_day, next_day, move])
+
+    assert dones.tolist() == [True, False, False]
+    assert observations['player'][:, 5].tolist() == [1, 2, 1]
+    assert observations['player'][:, 1].tolist() == [0, 1, 2]
+
+
+def test_environments_do_not_import_tk():
+    code = ('import sys, farm_env; '
+            'assert "tkinter" not in sys.modules and "PIL" not in sys.modules')
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(farm_env.__file__))
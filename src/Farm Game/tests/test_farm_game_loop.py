@@ -0,0 +1,44 @@
+import pytest
+
+from game_loop import FixedTimestep, interpolate, move_fraction
+
+
+def test_ticks_are_spent_from_accumulated_time():
+    clock = FixedTimestep(tick=0.25, frame_budget=0.02, max_ticks=10)
+
+    assert clock.advance(5.0) == 0
+    assert clock.advance(5.625) == 2
+    assert clock.get_alpha() == 0.5
+    assert clock.advance(5.75) == 1
+    assert clock.get_ticks() == 3
+
+
+def test_catching_up_carries_ticks_over_and_drops_frames():
+    clock = FixedTimestep(tick=0.125, frame_budget=0.02, max_ticks=4)
+    clock.advance(0.0)
+
+    assert clock.advance(1.25) == 4
+    assert clock.is_behind()
+    assert not clock.should_render(1.25, 1.251)
+    assert clock.advance(1.25) == 4
+    assert clock.advance(1.25) == 2
+    assert not clock.is_behind()
+    assert clock.should_render(1.25, 1.251)
+    assert clock.get_ticks() == 10
+    assert (clock.get_frames(), clock.get_dropped_frames()) == (1, 1)
+
+
+def test_frames_over_budget_are_dropped():
+    clock = FixedTimestep(tick=0.1, frame_budget=0.02)
+    clock.advance(0.0)
+
+    assert not clock.should_render(0.0, 0.05)
+    assert clock.should_render(0.0, 0.01)
+    assert (clock.get_frames(), clock.get_dropped_frames()) == (1, 1)
+
+
+def test_player_moves_are_interpolated():
+    assert interpolate((2, 4), (3, 4), 0.25) == (2.25, 4)
+    assert move_fraction(None, 10.0) == 1.0
+    assert move_fraction(10.0, 10.05, duration=0.1) == pytest.approx(0.5)
+    assert move_fraction(10.0, 11.0, duration=0.1) == 1.0
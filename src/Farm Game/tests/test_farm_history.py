@@ -0,0 +1,139 @@
+import numpy as np
+
+from constants import *
+from model import *
+from weather import Weather
+import actions
+
+
+def _state(model):
+    """ Everything about a model that an undo should restore. """
+    plants = {position: (type(plant), plant.get_state())
+              for position, plant in model.get_plants().items()}
+    return (list(model.get_map()), plants, model.get_player().get_state(),
+            model.get_days_elapsed(), dict(model.get_devices()))
+
+
+def test_undo_and_redo_till(map_file):
+    model = FarmModel(map_file)
+    before = _state(model)
+    actions.perform(model, 'keypress', TILL_KEY)
+    after = _state(model)
+
+    assert model.undo()
+    assert _state(model) == before
+    assert model.get_tile_array()[0, 0] == ord(UNTILLED)
+    assert model.redo()
+    assert _state(model) == after
+
+
+def test_undo_restores_removed_plant(map_file):
+    model = FarmModel(map_file)
+    actions.perform(model, 'keypress', PLANT_KEY, 'Kale Seed')
+    for _ in range(3):
+        actions.perform(model, 'next_day')
+    before = _state(model)
+    actions.perform(model, 'keypress', REMOVE_KEY)
+    assert model.get_plants() == {}
+
+    model.undo()
+    assert _state(model) == before
+    model.get_plants()[(0, 0)].age()
+    assert model.get_plants()[(0, 0)].get_stage() == 3
+
+
+def test_undo_new_day_with_weather_and_devices(map_file):
+    model = FarmModel(map_file, Weather(3))
+    model.add_device((2, 2), HARVESTER)
+    model.add_device((3, 6), TILLER)
+    model.add_device((4, 1), SPRINKLER)
+    for row in range(6):
+        for col in (0, 3, 6):
+            model.get_player().set_position((row, col))
+            actions.perform(model, 'keypress', PLANT_KEY,
+                            SEEDS[(row + col) % 2])
+            model.get_player().add_item(('Berry Seed', 1))
+    model.get_player().set_position((0, 0))
+
+    states = [_state(model)]
+    for _ in range(20):
+        actions.perform(model, 'next_day')
+        states.append(_state(model))
+    for expected in reversed(states[:-1]):
+        model.undo()
+        assert _state(model) == expected
+    for expected in states[1:]:
+        model.redo()
+        assert _state(model) == expected
+
+
+def test_random_actions_undo_to_start_and_redo_to_end(map_file):
+    model = FarmModel(map_file, Weather(5))
+    start = _state(model)
+    rng = np.random.default_rng(2)
+    keys = list(MOVE_DELTAS) + [PLANT_KEY, HARVEST_KEY, REMOVE_KEY, TILL_KEY,
+                                UNTILL_KEY]
+    for _ in range(400):
+        choice = rng.integers(4)
+        if choice == 0:
+            actions.perform(model, 'next_day')
+        elif choice == 1:
+            actions.perform(model, rng.choice(['buy', 'sell']),
+                            ITEMS[rng.integers(len(ITEMS))])
+        else:
+            actions.perform(model, 'keypress', keys[rng.integers(len(keys))],
+                            SEEDS[rng.integers(len(SEEDS))])
+    end = _state(model)
+
+    while model.undo():
+        pass
+    assert _state(model) == start
+    while model.redo():
+        pass
+    assert _state(model) == end
+
+
+def test_unchanged_rows_are_shared(map_file):
+    model = FarmModel(map_file)
+    rows = list(model.get_map())
+    actions.perform(model, 'keypress', TILL_KEY)
+    assert all(new is old for new, old in zip(model.get_map()[1:], rows[1:]))
+
+
+def test_actions_that_change_nothing_are_not_recorded(map_file):
+    model = FarmModel(map_file)
+    model.get_player().set_direction(UP)
+    actions.perform(model, 'keypress', UP)
+    actions.perform(model, 'keypress', HARVEST_KEY)
+    assert not model.can_undo()
+
+
+def test_failed_harvests_and_device_changes_are_not_recorded(map_file):
+    model = FarmModel(map_file)
+    actions.perform(model, 'keypress', PLANT_KEY, 'Kale Seed')
+    key = next(iter(DEVICE_KEYS))
+    actions.perform(model, 'keypress', key)
+    undoable = len(model._history)
+
+    actions.perform(model, 'keypress', HARVEST_KEY)
+    actions.perform(model, 'keypress', key)
+    actions.perform(model, 'keypress', REMOVE_DEVICE_KEY)
+    actions.perform(model, 'keypress', REMOVE_DEVICE_KEY)
+    assert len(model._history) == undoable + 1
+    assert model.get_devices() == {}
+
+    model.undo()
+    assert model.get_devices() == {(0, 0): DEVICE_KEYS[key]}
+    model.undo()
+    assert model.get_devices() == {}
+    assert (0, 0) in model.get_plants()
+
+
+def test_new_action_clears_redo(map_file):
+    model = FarmModel(map_file)
+    actions.perform(model, 'keypress', RIGHT)
+    actions.perform(model, 'undo')
+    assert model.can_redo()
+    actions.perform(model, 'keypress', DOWN)
+    assert not model.can_redo()
+    assert not model.redo()
@@ -0,0 +1,86 @@
+import pytest
+
+from constants import *
+from model import *
+from inventory import Inventory
+
+
+def test_inventory_reads_like_a_dict():
+    inventory = Inventory(ITEMS, {'Kale': 3, 'Potato Seed': 1})
+    inventory.remove('Potato Seed', 1)
+
+    assert inventory == {'Kale': 3}
+    assert list(inventory) == ['Kale'] and len(inventory) == 1
+    assert inventory['Kale'] == 3 and inventory.get('Berry', 0) == 0
+    assert 'Potato Seed' not in inventory and 'Unknown' not in inventory
+    with pytest.raises(KeyError):
+        inventory['Berry']
+
+
+def test_amounts_are_indexed_by_item_order():
+    inventory = Inventory(ITEMS)
+    inventory.add('Berry', 4)
+
+    assert inventory.get_amounts()[ITEMS.index('Berry')] == 4
+    assert inventory.index('Kale Seed') == ITEMS.index('Kale Seed')
+
+
+def test_version_changes_with_every_change():
+    inventory = Inventory(ITEMS)
+    versions = [inventory.get_version()]
+    inventory.add('Kale', 1)
+    versions.append(inventory.get_version())
+    inventory.remove('Kale', 1)
+    versions.append(inventory.get_version())
+    inventory.set_amounts({'Berry': 2})
+    versions.append(inventory.get_version())
+    inventory.get('Berry')
+
+    assert len(set(versions)) == 4
+    assert inventory.get_version() == versions[-1]
+
+
+def test_removing_more_than_there_is_leaves_none():
+    player = Player()
+    player.remove_item(('Kale Seed', 8))
+    player.remove_item(('Berry', 1))
+
+    assert player.get_inventory() == {'Potato Seed': 5}
+
+
+def test_registered_plants_extend_the_items():
+    class TurnipPlant(Plant):
+        _PRODUCE = 'Turnip'
+
+    items = inventory_items(PLANT_TYPES + [TurnipPlant])
+
+    assert items[:len(ITEMS)] == ITEMS
+    assert items[len(ITEMS):] == ['Turnip Seed', 'Turnip']
+    assert inventory_items(PLANT_TYPES) == INVENTORY_ITEMS == ITEMS
+
+
+def test_player_state_round_trip_changes_version():
+    player = Player()
+    state = player.get_state()
+    player.add_item(('Kale', 2))
+    version = player.get_inventory().get_version()
+    player.set_state(state)
+
+    assert player.get_inventory() == {'Potato Seed': 5, 'Kale Seed': 5}
+    assert player.get_inventory().get_version() != version
+
+
+def test_snapshot_inventory_keeps_version(map_file):
+    from farm_process import FarmBuffer, FarmSnapshot
+
+    model = FarmModel(map_file)
+    model.get_player().add_item(('Berry', 7))
+    buffer = FarmBuffer(6, 8)
+    try:
+        buffer.write(model)
+        inventory = FarmSnapshot(buffer).get_player().get_inventory()
+        assert inventory == model.get_player().get_inventory()
+        assert inventory.get_version() == \
+            model.get_player().get_inventory().get_version()
+    finally:
+        buffer.close()
@@ -0,0 +1,67 @@
+import numpy as np
+
+from constants import *
+from model import *
+import lod
+
+
+def test_cell_raster_colours_tiles_plants_and_devices(map_file):
+    model = FarmModel(map_file)
+    model.add_plant((0, 2), PotatoPlant())
+    model.add_device((1, 4), SPRINKLER)
+
+    raster = lod.build_cell_raster(model.get_tile_array(),
+                                   model.get_plant_arrays(),
+                                   model.get_devices())
+
+    assert raster.shape == (6, 8, 3)
+    assert tuple(raster[0, 0]) == LOD_TILE_COLOURS[UNTILLED]
+    assert tuple(raster[0, 3]) == LOD_TILE_COLOURS[SOIL]
+    assert tuple(raster[0, 4]) == LOD_TILE_COLOURS[GRASS]
+    assert tuple(raster[0, 2]) == LOD_PLANT_COLOURS[0]
+    assert tuple(raster[1, 4]) == LOD_DEVICE_COLOUR
+
+
+def test_ripe_plants_are_drawn_in_the_harvest_colour(map_file):
+    model = FarmModel(map_file)
+    model.add_plant((0, 2), PotatoPlant())
+    for _ in range(10):
+        model.new_day()
+
+    assert model.get_plants()[(0, 2)].can_harvest()
+    raster = lod.build_cell_raster(model.get_tile_array(),
+                                   model.get_plant_arrays())
+    assert tuple(raster[0, 2]) == LOD_PLANT_COLOURS[1]
+
+
+def test_scale_raster_up_and_down():
+    raster = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+
+    large = lod.scale_raster(raster, (12, 8))
+    assert large.shape == (8, 12, 3)
+    assert (large[::2, ::2] == raster).all()
+
+    small = lod.scale_raster(raster, (3, 2))
+    assert small.shape == (2, 3, 3)
+    assert (small == raster[::2, ::2]).all()
+
+
+def test_block_bounds_cover_the_image():
+    bounds = lod.block_bounds((10, 7), 3)
+
+    assert len(bounds) == 9
+    covered = np.zeros((7, 10), dtype=int)
+    for x_min, y_min, x_max, y_max in bounds:
+        covered[y_min:y_max, x_min:x_max] += 1
+    assert (covered == 1).all()
+
+
+def test_only_changed_blocks_are_dirty():
+    bounds = lod.block_bounds((8, 8), 2)
+    old = np.zeros((8, 8, 3), dtype=np.uint8)
+    new = old.copy()
+
+    assert lod.dirty_blocks(None, new, bounds) == [0, 1, 2, 3]
+    assert lod.dirty_blocks(old, new, bounds) == []
+    new[5, 1] = 255
+    assert lod.dirty_blocks(old, new, bounds) == [2]
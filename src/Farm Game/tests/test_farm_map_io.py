@@ -0,0 +1,37 @@
+import pytest
+
+from constants import *
+from map_io import *
+from mapgen import generate_map, generate_rows
+
+
+def test_binary_map_reads_back_as_text_map_does(tmp_path):
+    rows = generate_map(90, 70, seed=4)
+    text, binary = str(tmp_path / 'map.txt'), str(tmp_path / 'map.fmap')
+    write_map(text, rows)
+    write_binary_map(binary, generate_rows(90, 70, seed=4))
+
+    assert read_map(binary) == read_map(text) == rows
+    with open(binary, 'rb') as file:
+        assert file.read(4) == BINARY_MAGIC
+
+
+def test_long_runs_and_blocks_of_rows(tmp_path):
+    rows = [GRASS * 70_000, SOIL * 3 + GRASS * 69_997, UNTILLED * 70_000]
+    path = str(tmp_path / 'wide.fmap')
+    write_binary_map(path, ['\n'.join(rows[:2]), rows[2]])
+
+    assert read_map(path) == rows
+
+
+def test_bad_binary_maps_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_binary_map(str(tmp_path / 'ragged.fmap'), ['GG', 'GGG'])
+
+    path = tmp_path / 'map.fmap'
+    write_binary_map(str(path), ['GSU', 'UUU'])
+    data = path.read_bytes()
+    with pytest.raises(ValueError):
+        decode_binary_map(data[:-1])
+    with pytest.raises(ValueError):
+        decode_binary_map(data[:4] + b'\x09' + data[5:])
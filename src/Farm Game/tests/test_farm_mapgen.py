@@ -0,0 +1,39 @@
+import numpy as np
+
+from constants import *
+from map_io import read_map
+from mapgen import generate_chunks, generate_map, write_generated_map
+from model import FarmModel
+
+
+def test_same_seed_gives_same_map():
+    assert generate_map(50, 70, seed=3) == generate_map(50, 70, seed=3)
+    assert generate_map(50, 70, seed=3) != generate_map(50, 70, seed=4)
+
+
+def test_chunk_size_does_not_change_map():
+    whole = np.vstack(list(generate_chunks(300, 90, seed=5)))
+    pieces = np.vstack(list(generate_chunks(300, 90, seed=5, chunk_rows=7)))
+    assert (whole == pieces).all()
+
+
+def test_map_has_expected_shape_and_tiles():
+    rows = generate_map(120, 130, seed=1)
+    assert len(rows) == 120
+    assert all(len(row) == 130 for row in rows)
+    tiles = set(''.join(rows))
+    assert tiles <= {GRASS, SOIL, UNTILLED}
+    assert {GRASS, SOIL} <= tiles
+
+
+def test_written_map_reads_back(tmp_path):
+    path = str(tmp_path / 'generated.txt')
+    write_generated_map(path, 300, 45, seed=2)
+    assert read_map(path) == generate_map(300, 45, seed=2)
+
+
+def test_model_accepts_generated_rows():
+    rows = generate_map(20, 30, seed=0)
+    model = FarmModel(rows)
+    assert model.get_dimensions() == (20, 30)
+    assert model.get_map() == rows
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from constants import *
+from model import *
+from market import Market
+from savegame import SaveSnapshot, load_save
+import actions
+
+
+def test_bulk_buy_is_limited_by_money():
+    player = Player()
+    player.add_money(95)
+
+    assert player.buy('Potato Seed', 10, 20) == 9
+    assert player.get_money() == 5
+    assert player.get_inventory()['Potato Seed'] == 14
+    assert player.buy('Kale Seed', 70) == 0
+
+
+def test_buy_as_many_as_possible():
+    player = Player()
+    player.add_money(250)
+
+    assert player.buy('Kale Seed', 70, None) == 3
+    assert player.get_money() == 40
+
+
+@pytest.mark.parametrize('quantity', [1, None])
+def test_buying_needs_a_positive_price(quantity):
+    player = Player()
+    player.add_money(100)
+    inventory = dict(player.get_inventory())
+    for price in (0, -5):
+        with pytest.raises(ValueError):
+            player.buy('Kale Seed', price, quantity)
+    assert player.get_money() == 100
+    assert dict(player.get_inventory()) == inventory
+
+
+def test_bulk_sell_is_limited_by_inventory():
+    player = Player()
+
+    assert player.sell('Kale Seed', 35, 3) == 3
+    assert player.sell('Kale Seed', 35, 10) == 2
+    assert player.get_money() == 35 * 5
+    assert 'Kale Seed' not in player.get_inventory()
+
+
+def test_sell_all(map_file):
+    model = FarmModel(map_file)
+    model.get_player().add_item(('Potato', 2000))
+    actions.perform(model, 'sell', 'Potato', None)
+
+    assert model.get_player().get_money() == 2000 * SELL_PRICES['Potato']
+    assert 'Potato' not in model.get_player().get_inventory()
+
+
+def test_quote_matches_unit_by_unit_prices():
+    market = Market()
+    market.sell('Kale', 37)
+    index = ITEMS.index('Kale')
+    quantities = np.array([1, 5, 100, 2500])
+
+    quotes = market.quote(np.full(4, index), quantities)
+
+    ratio = np.exp(-1 / MARKET_DEPTH)
+    for quote, quantity in zip(quotes, quantities):
+        units = SELL_PRICES['Kale'] * ratio ** (37 + np.arange(quantity))
+        assert quote == pytest.approx(units.sum(), abs=1)
+
+
+def test_sales_lower_prices_until_they_recover():
+    market = Market()
+    before = market.get_price('Potato')
+    first = market.sell('Potato', 100)
+    second = market.sell('Potato', 100)
+
+    assert before == SELL_PRICES['Potato']
+    assert second < first < 100 * before
+    assert market.get_price('Potato') < before
+    for _ in range(20):
+        market.new_day()
+    assert market.get_price('Potato') == before
+
+
+def test_market_sale_can_be_undone(map_file):
+    model = FarmModel(map_file, market=Market())
+    model.get_player().add_item(('Berry', 500))
+    actions.perform(model, 'sell', 'Berry', 400)
+    low = model.get_sell_price('Berry')
+
+    assert model.get_player().get_inventory()['Berry'] == 100
+    assert low < SELL_PRICES['Berry']
+    model.undo()
+    assert model.get_sell_price('Berry') == SELL_PRICES['Berry']
+    assert model.get_player().get_money() == 0
+    model.redo()
+    assert model.get_sell_price('Berry') == low
+
+
+def test_market_is_saved(map_file, tmp_path):
+    model = FarmModel(map_file, market=Market())
+    model.get_player().add_item(('Kale', 300))
+    actions.perform(model, 'sell', 'Kale', 300)
+    path = str(tmp_path / 'save.npz')
+    SaveSnapshot(model).write(path)
+
+    assert load_save(path).get_sell_price('Kale') == \
+        model.get_sell_price('Kale')
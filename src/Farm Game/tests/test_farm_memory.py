@@ -0,0 +1,60 @@
+import sys
+import tracemalloc
+
+import numpy as np
+
+from memory import *
+from model import *
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    shared = [1.5] * 100
+    seen = set()
+
+    first = deep_sizeof({'a': shared}, seen)
+    second = deep_sizeof({'b': shared}, seen)
+
+    assert first > sys.getsizeof(shared)
+    assert second < sys.getsizeof(shared)
+
+
+def test_deep_sizeof_counts_array_data_through_views():
+    array = np.zeros(10_000)
+    by_type = {}
+
+    assert deep_sizeof(array[::2], by_type=by_type) >= array.nbytes
+    assert by_type['ndarray'][0] == 2
+
+
+def test_memory_report_grows_with_plants(map_file):
+    model = FarmModel(map_file)
+    empty = model.memory_report()
+    for row in range(6):
+        model.get_player().reset_energy()
+        model.add_plant((row, 0), PotatoPlant())
+
+    report = model.memory_report({'cache': {'image': 'x' * 1000}},
+                                 by_type=True)
+
+    assert report['sections']['plants'] > empty['sections']['plants'] == 0
+    assert report['sections']['plant_dict'] > empty['sections']['plant_dict']
+    assert report['sections']['cache'] > 1000
+    assert report['total'] == sum(report['sections'].values())
+    assert report['types']['PotatoPlant'][0] == 6
+    assert 'map' in format_report(report)
+
+
+def test_allocation_tracker_finds_growth():
+    was_tracing = tracemalloc.is_tracing()
+    tracker = AllocationTracker()
+    try:
+        assert tracker.compare() == []
+        grown = [bytearray(1000) for _ in range(1000)]
+        lines = tracker.compare()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    assert tracker.is_started()
+    assert any('test_farm_memory.py' in line for line in lines)
+    del grown
@@ -0,0 +1,82 @@
+import json
+import time
+
+from constants import *
+from metrics import CountingCache, FrameMetrics, StartupProfile
+
+
+def test_sections_are_attributed_to_the_next_frame():
+    metrics = FrameMetrics()
+    with metrics.time('model'):
+        pass
+    metrics.start_frame()
+    with metrics.time('FarmView.redraw'):
+        time.sleep(0.002)
+    with metrics.time('FarmView.redraw'):
+        pass
+    metrics.count('canvas_items', 12)
+    metrics.end_frame()
+
+    frame, = metrics.get_frames()
+    assert set(frame['sections']) == {'model', 'FarmView.redraw',
+                                      FRAME_SECTION}
+    assert frame['sections']['FarmView.redraw'] >= 0.002
+    assert frame['sections'][FRAME_SECTION] >= 0.002
+    assert frame['counters'] == {'canvas_items': 12}
+
+
+def test_window_keeps_only_recent_frames():
+    metrics = FrameMetrics(window=3)
+    for items in range(5):
+        metrics.start_frame()
+        metrics.count('canvas_items', items)
+        metrics.end_frame()
+
+    assert [frame['counters']['canvas_items']
+            for frame in metrics.get_frames()] == [2, 3, 4]
+    report = metrics.get_report()
+    assert report['frames'] == 3
+    assert report['counters'] == {'canvas_items': 4}
+    assert set(report['sections'][FRAME_SECTION]) == set(METRICS_PERCENTILES)
+
+
+def test_percentiles_of_a_missing_section():
+    metrics = FrameMetrics()
+    metrics.start_frame()
+    metrics.end_frame()
+
+    assert metrics.get_percentiles('InfoBar.redraw') is None
+
+
+def test_dump(tmp_path):
+    metrics = FrameMetrics()
+    metrics.start_frame()
+    metrics.end_frame()
+    path = tmp_path / 'metrics.json'
+
+    metrics.dump(str(path))
+
+    assert json.loads(path.read_text()) == metrics.get_frames()
+
+
+def test_counting_cache():
+    cache = CountingCache()
+    cache['grass'] = 'image'
+    assert 'grass' in cache
+    assert cache['grass'] == 'image'
+    assert cache['grass'] == 'image'
+
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_startup_profile_reports_phases_in_order():
+    profile = StartupProfile()
+    profile.record('imports', 0.25)
+    with profile.time('model'):
+        pass
+    profile.record('imports', 0.25)
+
+    assert list(profile.get_phases()) == ['imports', 'model']
+    assert profile.get_phases()['imports'] == 0.5
+    lines = profile.report().splitlines()
+    assert lines[0].startswith('imports') and lines[0].endswith('500.0 ms')
@@ -0,0 +1,221 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from constants import *
+from model import *
+from plant_store import PlantStore
+
+
+def fresh(plant_type, days, harvest=False):
+    """ Returns a plant aged by `days` single days, optionally harvested. """
+    plant = plant_type()
+    for _ in range(days):
+        plant.age()
+    if harvest:
+        plant.harvest()
+    return plant
+
+
+@pytest.mark.parametrize('plant_type', PLANT_TYPES)
+@pytest.mark.parametrize('steps', range(5))
+def test_age_batch_matches_repeated_age(plant_type, steps):
+    plants = [fresh(plant_type, days, harvest=harvest)
+              for days in range(25) for harvest in (False, True)]
+    stage = np.array([p._stage for p in plants], dtype=np.int32)
+    days = np.array([p._days for p in plants], dtype=np.int32)
+    since = np.array([p._days_since_harvest for p in plants], dtype=np.int32)
+
+    new_stage, new_days, new_since = plant_type.age_batch(
+        stage, days, since, np.full(len(plants), steps, dtype=np.int32))
+
+    for plant in plants:
+        for _ in range(steps):
+            plant.age()
+    assert list(new_stage) == [p._stage for p in plants]
+    assert list(new_days) == [p._days for p in plants]
+    assert list(new_since) == [p._days_since_harvest for p in plants]
+
+
+def test_zero_growth_does_not_regrow_harvested_berry():
+    store = PlantStore(PLANT_TYPES)
+    berry = fresh(BerryPlant, 13)
+    berry._bind(store, store.add(store.kind_of(BerryPlant), (0, 0),
+                                 berry.get_state()))
+    assert berry.harvest() is not None
+
+    store.age(0.0)
+
+    assert berry.get_stage() == 5
+    assert not berry.can_harvest()
+
+
+def test_new_day_matches_per_plant_age(map_file):
+    model = FarmModel(map_file)
+    reference = {}
+    for col, plant_type in zip(range(8), itertools.cycle(PLANT_TYPES)):
+        model.get_player().reset_energy()
+        assert model.add_plant((col % 6, col), plant_type())
+        reference[(col % 6, col)] = plant_type()
+
+    for day in range(30):
+        model.new_day()
+        for plant in reference.values():
+            plant.age()
+        if day % 5 == 4:
+            for position, plant in reference.items():
+                model.get_player().reset_energy()
+                assert model.harvest_plant(position) == plant.harvest()
+        for position in list(reference):
+            if position not in model.get_plants():
+                reference.pop(position)
+        for position, plant in reference.items():
+            assert model.get_plants()[position].get_stage() == \
+                plant.get_stage()
+
+
+def test_forecast_matches_harvesting_when_ready():
+    model = FarmModel(['S' * 25] * 6)
+    model.get_player().set_start_energy(10 ** 6)
+    model.get_player().reset_energy()
+    for (row, plant_type), age in itertools.product(
+            enumerate(PLANT_TYPES * 2), range(25)):
+        plant = fresh(plant_type, age, harvest=row >= 3)
+        plant._quality = 0.6 if age % 3 == 0 else 1.0
+        model.add_plant((row, age), plant)
+
+    forecast = model.forecast(30)
+
+    for day, (amounts, revenue) in enumerate(forecast):
+        harvested = {}
+        for position in list(model.get_plants()):
+            result = model.harvest_plant(position)
+            if result is not None:
+                produce, amount = result
+                harvested[produce] = harvested.get(produce, 0) + amount
+        model.new_day()
+        assert {produce: amount for produce, amount in amounts.items()
+                if amount} == harvested
+        assert revenue == sum(amount * SELL_PRICES[produce]
+                              for produce, amount in harvested.items())
+    assert model.forecast(0) == []
+
+
+def test_removed_plant_keeps_its_state(map_file):
+    model = FarmModel(map_file)
+    plant = KalePlant()
+    model.add_plant((0, 0), plant)
+    model.new_day()
+    model.remove_plant((0, 0))
+
+    assert plant._store is None
+    assert plant.get_stage() == 2
+
+
+def test_harvested_plants_are_reused_as_new_ones(map_file):
+    model = FarmModel(map_file)
+    pool = model.get_plant_pool()
+    model.add_plant((0, 0), model.new_plant(PotatoPlant))
+    first = id(model.get_plants()[(0, 0)])
+    for _ in range(5):
+        model.new_day()
+    assert model.harvest_plant((0, 0)) == ('Potato', 1)
+    assert len(pool) == 1
+
+    model.get_player().reset_energy()
+    second = model.new_plant(PotatoPlant)
+    model.add_plant((0, 0), second)
+
+    assert id(second) == first and pool.get_created() == 1
+    assert second.get_stage() == 1 and second._store is not None
+    assert id(model.new_plant(KalePlant)) != first
+    # Plants not from the pool are left alone when removed.
+    model.add_plant((1, 0), KalePlant())
+    model.remove_plant((1, 0))
+    assert len(pool) == 0
+
+
+def test_plants_still_held_when_removed_are_not_reused(map_file):
+    model = FarmModel(map_file)
+    pool = model.get_plant_pool()
+    kept = model.new_plant(KalePlant)
+    model.add_plant((0, 0), kept)
+    model.new_day()
+    model.remove_plant((0, 0))
+
+    assert len(pool) == 0 and kept._store is None
+    assert kept.get_stage() == 2
+    model.add_plant((0, 0), model.new_plant(KalePlant))
+    assert model.get_plants()[(0, 0)] is not kept
+    assert kept.get_stage() == 2
+
+
+def test_memory_report_counts_the_plant_pool(map_file):
+    model = FarmModel(map_file)
+    model.add_plant((0, 0), model.new_plant(KalePlant))
+    model.remove_plant((0, 0))
+    assert len(model.get_plant_pool()) == 1
+    assert model.memory_report()['sections']['plant_pool'] > 0
+
+
+def test_same_seed_gives_same_weather():
+    first, second = Weather(7), Weather(7)
+    timeline = [first.get_weather(day) for day in range(1, 200)]
+
+    assert timeline == [second.get_weather(day) for day in range(1, 200)]
+    assert timeline != [Weather(8).get_weather(day) for day in range(1, 200)]
+    # Asking for a later day first gives the same timeline
+    assert Weather(7).get_weather(150) == timeline[149]
+
+
+def test_new_day_with_weather_is_reproducible(map_file):
+    def run(seed):
+        model = FarmModel(map_file, Weather(seed))
+        for col in range(8):
+            model.add_plant((0, col), BerryPlant())
+        for _ in range(60):
+            model.new_day()
+        return [plant.get_state() for plant in model.get_plants().values()]
+
+    assert run(3) == run(3)
+
+
+def test_weather_growth_follows_tables(map_file):
+    weather = Weather(1)
+    model = FarmModel(map_file, weather)
+    for col in range(8):
+        model.add_plant((0, col), KalePlant())
+    expected = np.zeros(8)
+    tiles = model.get_tile_array()[0]
+    for day in range(1, 20):
+        growth, _ = weather.get_tables(day)
+        expected += growth[tiles]
+        model.new_day()
+
+    days = [model.get_plants()[(0, col)]._days for col in range(8)]
+    assert days == [int(total + 1e-4) for total in expected]
+
+
+def test_frost_stops_growth(map_file):
+    weather = Weather(0)
+    frost_day = next(day for day in range(1, 400)
+                     if weather.get_weather(day) == FROST)
+    model = FarmModel(map_file, weather)
+    model._days_elapsed = frost_day
+    model.add_plant((0, 0), PotatoPlant())
+
+    model.new_day()
+
+    assert model.get_plants()[(0, 0)].get_stage() == 1
+
+
+def test_start_energy_is_per_player():
+    player, other = Player(500), Player()
+    assert player.get_energy() == 500
+    player.reduce_energy(400)
+    player.set_start_energy(2000)
+    player.reset_energy()
+    assert player.get_energy() == 2000
+    other.reset_energy()
+    assert other.get_energy() == Player.START_ENERGY
@@ -0,0 +1,65 @@
+import json
+
+from constants import *
+from model_benchmark import *
+
+
+def test_build_farm_plants_the_requested_density():
+    model, memory = build_farm(20, 0.5, seed=3)
+
+    assert len(model.get_plants()) == 200
+    tiles = model.get_tile_array()
+    assert all(tiles[position] == ord(SOIL) for position in model.get_plants())
+    assert memory['bytes_per_tile'] > 0
+    assert memory['bytes_per_plant'] > 0
+
+
+def test_benchmark_leaves_the_farm_unchanged():
+    model, _ = build_farm(12, 0.5, seed=1)
+    plants = {position: plant.get_name()
+              for position, plant in model.get_plants().items()}
+    rows = list(model.get_map())
+
+    results = benchmark_farm(model, min_time=0.001, cells=20)
+
+    assert set(results) == set(OPERATIONS)
+    assert all(value is None or value > 0 for value in results.values())
+    assert {position: plant.get_name()
+            for position, plant in model.get_plants().items()} == plants
+    assert model.get_map() == rows
+
+
+def test_run_benchmarks_skips_farms_with_too_many_plants(tmp_path):
+    results = run_benchmarks(sizes=(4, 8), densities=(0.0, 1.0),
+                             max_plants=20, min_time=0.001)
+
+    assert list(results['results']) == ['4x4@0%', '4x4@100%', '8x8@0%']
+    assert results['skipped'] == ['8x8@100%']
+    assert results['results']['4x4@0%']['bytes_per_plant'] is None
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps(results))
+    assert json.loads(path.read_text()) == results
+
+
+def test_regressions_are_slower_operations_or_more_memory():
+    baseline = {'results': {'4x4@0%': {
+        'move_player': 1000.0, 'new_day': 100.0, 'bytes_per_tile': 10.0,
+        'bytes_per_plant': None}}}
+    results = {'results': {'4x4@0%': {
+        'move_player': 700.0, 'new_day': 200.0, 'bytes_per_tile': 13.0,
+        'bytes_per_plant': 5.0}, '8x8@0%': {'move_player': 1.0}}}
+
+    regressions = find_regressions(results, baseline, tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith('4x4@0% move_player')
+    assert regressions[1].startswith('4x4@0% bytes_per_tile')
+
+
+def test_pooled_churn_creates_no_plants():
+    pooled = benchmark_churn(cells=50, cycles=5)
+    unpooled = benchmark_churn(cells=50, cycles=5, pooled=False)
+
+    assert pooled['plants_created_per_cycle'] == 0
+    assert abs(pooled['blocks_per_cycle']) < 0.1
+    assert unpooled['plants_created_per_cycle'] == 1
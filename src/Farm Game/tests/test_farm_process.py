@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+import pytest
+
+from constants import *
+from model import *
+from farm_process import (FRONT, READING, SEQUENCE, FarmBuffer, FarmProcess,
+                          FarmSnapshot, _publish)
+
+
+def wait_for_update(process, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not process.has_update():
+        assert time.monotonic() < deadline, 'no state was published'
+        time.sleep(0.01)
+    return process.snapshot()
+
+
+@pytest.fixture
+def buffers():
+    buffers = [FarmBuffer(6, 8) for _ in range(2)]
+    yield buffers
+    for buffer in buffers:
+        buffer.close()
+
+
+def test_publish_flips_to_the_back_buffer(map_file, buffers):
+    model = FarmModel(map_file)
+    control = np.array([1, 0, -1], dtype=np.int64)
+
+    assert _publish(model, buffers, control)
+
+    assert control[FRONT] == 0 and control[SEQUENCE] == 1
+    snapshot = FarmSnapshot(buffers[0])
+    assert snapshot.get_map() == model.get_map()
+    assert snapshot.get_player().get_inventory() == \
+        model.get_player().get_inventory()
+
+
+def test_reader_blocks_publish_to_its_buffer(map_file, buffers):
+    model = FarmModel(map_file)
+    control = np.array([1, 0, -1], dtype=np.int64)
+    _publish(model, buffers, control)
+    _publish(model, buffers, control)
+    control[READING] = 1 - control[FRONT]
+    before = buffers[control[READING]].scalars.copy()
+
+    model.new_day()
+    assert not _publish(model, buffers, control)
+
+    assert (buffers[control[READING]].scalars == before).all()
+    control[READING] = -1
+    assert _publish(model, buffers, control)
+
+
+def test_snapshot_matches_model(map_file, buffers):
+    model = FarmModel(map_file)
+    model.add_plant((1, 2), KalePlant())
+    model.add_device((3, 3), HARVESTER)
+    model.move_player(RIGHT)
+    model.new_day()
+    buffers[0].write(model)
+
+    snapshot = FarmSnapshot(buffers[0])
+    plants = snapshot.get_plants()
+    assert list(plants) == [(1, 2)]
+    assert plants[(1, 2)].get_name() == 'kale'
+    assert plants[(1, 2)].get_stage() == 2
+    assert snapshot.get_devices() == {(3, 3): HARVESTER}
+    assert snapshot.get_player_position() == (0, 1)
+    assert snapshot.get_player_direction() == RIGHT
+    assert snapshot.get_days_elapsed() == 2
+
+
+def test_process_round_trip(map_file):
+    process = FarmProcess(map_file, weather_seed=4)
+    try:
+        assert process.snapshot().get_days_elapsed() == 1
+        process.send('keypress', TILL_KEY)
+        process.send('keypress', PLANT_KEY, 'Potato Seed')
+        process.send('next_day')
+
+        snapshot = wait_for_update(process)
+        while snapshot.get_days_elapsed() < 2:
+            snapshot = wait_for_update(process)
+        assert snapshot.get_map()[0][0] == SOIL
+        assert snapshot.get_plants()[(0, 0)].get_stage() >= 1
+        assert snapshot.get_player().get_inventory()['Potato Seed'] == 4
+        assert snapshot.get_weather().get_weather(1) == \
+            Weather(4).get_weather(1)
+    finally:
+        process.close()
+    assert not process.is_alive()
+
+
+def test_process_reports_errors_and_keeps_running(map_file):
+    process = FarmProcess(map_file)
+    try:
+        process.send('fly')
+        process.send('keypress', RIGHT)
+        snapshot = wait_for_update(process)
+        while snapshot.get_player_position() == (0, 0):
+            snapshot = wait_for_update(process)
+
+        assert snapshot.get_player_position() == (0, 1)
+        deadline = time.monotonic() + 5
+        errors = []
+        while not errors and time.monotonic() < deadline:
+            errors = process.get_errors()
+        assert 'fly' in errors[0]
+    finally:
+        process.close()
+
+
+def test_blocked_publish_does_not_repeat_commands(map_file):
+    process = FarmProcess(map_file)
+    try:
+        # Holding each snapshot makes the simulation retry blocked publishes
+        snapshot = process.snapshot()
+        for _ in range(3):
+            process.send('keypress', RIGHT)
+            time.sleep(0.05)
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if process.has_update():
+                snapshot = process.snapshot()
+            time.sleep(0.05)
+
+        assert snapshot.get_player_position() == (0, 3)
+    finally:
+        process.close()
+
+
+def test_process_fails_to_start_on_missing_map(tmp_path):
+    with pytest.raises(RuntimeError):
+        FarmProcess(str(tmp_path / 'missing.txt'))
@@ -0,0 +1,50 @@
+import tkinter as tk
+
+from model_benchmark import find_regressions
+from render_benchmark import *
+
+
+def test_recording_canvas_counts_calls_and_deletes_by_tag():
+    canvas = RecordingCanvas()
+    RecordingWidget.calls.clear()
+
+    canvas.create_image((0, 0), image='grass')
+    player = canvas.create_rectangle(0, 0, 1, 1, tags='player')
+    canvas.create_text((0, 0), text='Day:')
+    canvas.delete('player')
+
+    assert player not in canvas.find_all()
+    assert len(canvas.find_all()) == 2
+    canvas.delete(tk.ALL)
+    assert canvas.find_all() == ()
+    assert RecordingWidget.calls == {'create_image': 1, 'create_rectangle': 1,
+                                     'create_text': 1, 'delete': 2}
+
+
+def test_sprite_farm_draws_every_cell_and_plant_each_frame():
+    results = benchmark_render(6, density=0.5, frames=4)
+
+    # 36 tiles, 18 plants and the player
+    assert results['FarmView.redraw create_image'] == 55
+    assert results['FarmView.redraw create_rectangle'] == 0
+    assert results['InfoBar.redraw create_text'] == 6
+    assert results['FarmView.redraw ms'] > 0
+
+
+def test_low_detail_farm_only_creates_its_blocks_once():
+    results = benchmark_render(100, density=0.5, frames=4)
+
+    assert results['FarmView.redraw create_image'] == LOD_BLOCKS ** 2 / 4
+    assert results['FarmView.redraw create_rectangle'] == 1
+
+
+def test_more_calls_per_frame_is_a_regression():
+    baseline = run_benchmarks(sizes=(6,), frames=2)
+    results = run_benchmarks(sizes=(6,), frames=2)
+    results['results']['6x6']['FarmView.redraw create_image'] *= 2
+
+    regressions = find_regressions(results, baseline,
+                                   lower_is_better=lambda metric: True)
+
+    assert [regression.split(':')[0] for regression in regressions
+            if 'ms' not in regression] == ['6x6 FarmView.redraw create_image']
@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pytest
+
+from constants import *
+from model import *
+from weather import Weather
+from farm_process import FarmProcess
+from savegame import Autosaver, SaveSnapshot, load_save
+import actions
+
+
+def _state(model):
+    plants = {position: (type(plant), plant.get_state())
+              for position, plant in model.get_plants().items()}
+    weather = model.get_weather()
+    return (model.get_map(), plants, model.get_player().get_state(),
+            model.get_days_elapsed(), model.get_devices(),
+            None if weather is None else weather.get_seed())
+
+
+@pytest.fixture
+def saves(tmp_path):
+    path = tmp_path / 'saves'
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def model(map_file):
+    model = FarmModel(map_file, Weather(4))
+    model.add_device((2, 3), SPRINKLER)
+    actions.perform(model, 'keypress', TILL_KEY)
+    for col, seed in enumerate(['Potato Seed', 'Kale Seed']):
+        model.get_player().set_position((1, col))
+        actions.perform(model, 'keypress', PLANT_KEY, seed)
+    for _ in range(5):
+        actions.perform(model, 'next_day')
+    model.get_player().select_item('Kale Seed')
+    return model
+
+
+def test_save_round_trip(model, tmp_path):
+    path = str(tmp_path / 'save.npz')
+    SaveSnapshot(model).write(path)
+
+    assert _state(load_save(path)) == _state(model)
+
+
+def test_snapshot_is_not_affected_by_later_changes(model, tmp_path):
+    path = str(tmp_path / 'save.npz')
+    expected = _state(model)
+    expected = (list(expected[0]), expected[1], expected[2], expected[3],
+                dict(expected[4]), expected[5])
+    snapshot = SaveSnapshot(model)
+    actions.perform(model, 'keypress', UNTILL_KEY)
+    actions.perform(model, 'next_day')
+    model.remove_device((2, 3))
+
+    snapshot.write(path)
+    assert _state(load_save(path)) == expected
+
+
+def test_old_saves_are_rotated(model, saves):
+    path = str(saves / 'save.npz')
+    days = []
+    for _ in range(5):
+        SaveSnapshot(model).write(path, keep=3)
+        days.append(model.get_days_elapsed())
+        actions.perform(model, 'next_day')
+
+    assert sorted(os.listdir(saves)) == \
+        ['save.npz', 'save.npz.1', 'save.npz.2']
+    assert load_save(path).get_days_elapsed() == days[-1]
+    assert load_save(path + '.2').get_days_elapsed() == days[-3]
+
+
+def test_interrupted_rotation_keeps_current_save(model, saves, monkeypatch):
+    path = str(saves / 'save.npz')
+    SaveSnapshot(model).write(path)
+    expected = _state(load_save(path))
+
+    replace = os.replace
+    def crash(source, target):
+        if target == path:
+            raise OSError('power cut')
+        replace(source, target)
+    monkeypatch.setattr(os, 'replace', crash)
+    actions.perform(model, 'next_day')
+    with pytest.raises(OSError):
+        SaveSnapshot(model).write(path)
+
+    assert _state(load_save(path)) == expected
+    assert _state(load_save(path + '.1')) == expected
+
+
+def test_failed_save_keeps_previous_save(model, saves, monkeypatch):
+    path = str(saves / 'save.npz')
+    SaveSnapshot(model).write(path)
+    expected = _state(load_save(path))
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(np, 'savez_compressed', fail)
+    actions.perform(model, 'next_day')
+    with pytest.raises(OSError):
+        SaveSnapshot(model).write(path)
+
+    assert os.listdir(saves) == ['save.npz']
+    assert _state(load_save(path)) == expected
+
+
+def test_autosaver_writes_latest_snapshot_on_close(model, tmp_path):
+    path = str(tmp_path / 'saves' / 'auto.npz')
+    saver = Autosaver(path)
+    for _ in range(3):
+        saver.submit(SaveSnapshot(model))
+        actions.perform(model, 'next_day')
+    saver.submit(SaveSnapshot(model))
+    saver.close()
+
+    assert saver.get_errors() == []
+    assert load_save(path).get_days_elapsed() == model.get_days_elapsed()
+
+
+def test_autosaver_reports_errors(model, tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    saver = Autosaver(str(blocker / 'save.npz'))
+    saver.submit(SaveSnapshot(model))
+    saver.close()
+
+    assert len(saver.get_errors()) == 1
+
+
+def test_simulation_process_saves(map_file, tmp_path):
+    path = str(tmp_path / 'save.npz')
+    process = FarmProcess(map_file)
+    try:
+        process.send('next_day')
+        process.save(path)
+    finally:
+        process.close()
+
+    assert process.get_errors() == []
+    assert load_save(path).get_days_elapsed() == 2
@@ -0,0 +1,135 @@
+import asyncio
+import random
+
+import pytest
+
+from constants import *
+from model import PLANT_TYPES
+from farm_load import load_map, random_actions, run_load
+from farm_server import *
+
+
+def _normalised(state):
+    return {**state, 'plants': sorted(state['plants']),
+            'devices': sorted(state['devices'])}
+
+
+def test_diffs_rebuild_the_state_of_the_farm():
+    store = SessionStore()
+    state = store.open(0, load_map(10))
+    rng = random.Random(1)
+    model = store.get_model(0)
+    model.get_player().add_money(1000)
+
+    names = set()
+    for _ in range(30):
+        diff = store.act(0, random_actions(rng, 10) + [
+            ['buy', 'Potato Seed', 1], ['keypress', PLANT_KEY, 'Potato Seed'],
+            ['keypress', '1'], ['keypress', 'x']])
+        apply_diff(state, diff)
+        names.update(plant[2] for plant in diff.get('plants', ())
+                     if len(plant) > 2)
+
+    assert _normalised(state) == _normalised(FarmState(model).to_message())
+    assert names and names <= {plant_type._NAME
+                               for plant_type in PLANT_TYPES}
+    assert store.act(0, []) == {}
+
+
+def test_diff_only_holds_what_changed():
+    store = SessionStore()
+    store.open(0, size=6, seed=0)
+    store.get_model(0).get_player().set_position((0, 0))
+
+    diff = store.act(0, [['keypress', TILL_KEY]])
+
+    assert set(diff) <= {'tiles', 'player'}
+    assert diff.get('tiles', [[0, 0, SOIL]]) == [[0, 0, SOIL]]
+
+
+def test_bad_requests_get_errors():
+    store = SessionStore()
+    store.open(0, size=4)
+
+    assert 'error' in store.handle({'op': 'act', 'session': 0,
+                                    'actions': [['fly']]})
+    assert 'error' in store.handle({'op': 'act', 'session': 1,
+                                    'actions': []})
+    assert 'error' in store.handle({'op': 'open', 'session': 0})
+    assert 'error' in store.handle({'op': 'dance', 'session': 0})
+    for request in ({'size': -3}, {'size': 'big'}, {'map': []},
+                    {'map': ['GG', 'G']}, {'map': ['', '']}, {'map': [1]}):
+        assert 'error' in store.handle({'op': 'open', 'session': 2,
+                                        **request})
+    # Clients may not have the server read its files
+    reply = store.handle({'op': 'open', 'session': 2, 'map': __file__})
+    assert reply == {'error': 'map must be a non-empty list of rows'}
+    assert len(store) == 1
+
+
+def test_a_failed_request_leaves_the_connection_open(tmp_path):
+    path = str(tmp_path / 'farm.sock')
+
+    async def run():
+        server = FarmServer()
+        await server.start(path)
+        try:
+            client = await FarmClient.connect(path)
+            with pytest.raises(RuntimeError):
+                await client.request({'op': 'open', 'size': -3})
+            session, state = await client.open(['GS', 'UU'])
+            await client.close()
+        finally:
+            await server.close()
+        return state
+
+    assert asyncio.run(run())['map'] == ['GS', 'UU']
+
+
+def test_client_reports_a_closed_connection(tmp_path):
+    path = str(tmp_path / 'farm.sock')
+
+    async def hang_up(reader, writer):
+        await reader.readline()
+        writer.close()
+
+    async def run():
+        listener = await asyncio.start_unix_server(hang_up, path)
+        try:
+            client = await FarmClient.connect(path)
+            with pytest.raises(ConnectionError):
+                await client.open(size=3)
+            await client.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('shards', [0, 2])
+def test_load_runs_against_a_server(tmp_path, shards):
+    path = str(tmp_path / 'farm.sock')
+
+    async def run():
+        server = FarmServer(shards)
+        await server.start(path)
+        try:
+            client = await FarmClient.connect(path)
+            session, state = await client.open(size=5, seed=1)
+            reply = await client.request({'op': 'act', 'session': session,
+                                          'actions': [], 'id': 'a'})
+            await client.close()
+            results = await run_load(lambda: FarmClient.connect(path),
+                                     sessions=4, batches=3, batch_size=5,
+                                     size=5)
+        finally:
+            await server.close()
+        return state, reply, results
+
+    state, reply, results = asyncio.run(run())
+
+    assert len(state['map']) == 5
+    assert reply == {'session': 0, 'diff': {}, 'id': 'a'}
+    assert results['actions'] == 60
+    assert results['actions_per_second'] > 0
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from constants import *
+from mapgen import generate_map
+from model import *
+from sharded_store import ShardedPlantStore
+from weather import Weather
+
+
+def _farm(store=None):
+    rows = [row.replace(GRASS, SOIL) for row in generate_map(30, 40, 5)]
+    model = FarmModel(rows, Weather(3), plant_store=store)
+    player = model.get_player()
+    player.set_start_energy(10 ** 6)
+    player.reset_energy()
+    for cell in range(0, 30 * 40, 3):
+        model.add_plant(divmod(cell, 40), PLANT_TYPES[cell % 5 % 3]())
+    model.add_device((10, 10), SPRINKLER)
+    model.add_device((20, 30), HARVESTER)
+    return model
+
+
+def _columns(model):
+    store = model.get_plant_store()
+    slots = store.occupied()
+    return {name: getattr(store, name)[slots].copy()
+            for name in store.COLUMNS}
+
+
+@pytest.mark.parametrize('shards', [2, 3])
+def test_sharded_days_match_single_process_days(shards):
+    store = ShardedPlantStore(PLANT_TYPES, shards, min_plants=0)
+    try:
+        expected, sharded = _farm(), _farm(store)
+        for day in range(12):
+            expected.new_day()
+            sharded.new_day()
+            # Harvest and replant some plants so slots are reused.
+            for model in (expected, sharded):
+                model.harvest_plant((day, 0))
+                model.add_plant((day, 1), KalePlant())
+
+        assert store._pool is not None
+        for name, column in _columns(expected).items():
+            np.testing.assert_array_equal(_columns(sharded)[name], column)
+        assert (sharded.get_player().get_inventory()
+                == expected.get_player().get_inventory())
+    finally:
+        store.close()
+
+
+def test_columns_stay_shared_as_the_store_grows():
+    store = ShardedPlantStore(PLANT_TYPES, 2, min_plants=0)
+    try:
+        model = _farm(store)
+        assert store.get_size() > store.START_CAPACITY
+        assert np.shares_memory(store.kind, np.ndarray(
+            store.get_size(), np.int8, buffer=store._shm.buf))
+        model.new_day()
+        assert all(plant.get_stage() >= 1
+                   for plant in model.get_plants().values())
+    finally:
+        store.close()
+
+
+def test_small_farms_are_aged_in_process():
+    store = ShardedPlantStore(PLANT_TYPES, 4)
+    try:
+        model = _farm(store)
+        model.new_day()
+        assert store._pool is None
+        assert store.get_shards() == 4
+    finally:
+        store.close()
+
+
+def test_bands_hold_even_shares_of_clustered_plants():
+    store = ShardedPlantStore(PLANT_TYPES, 4, min_plants=0)
+    try:
+        # Most plants are in the first few of 1000 rows.
+        rng = np.random.default_rng(0)
+        rows = np.concatenate([rng.integers(0, 10, 9000),
+                               rng.integers(10, 1000, 1000)]).astype(np.int32)
+        order, bands = store._get_bands(rows)
+        sizes = [stop - start for start, stop in bands]
+        assert bands[0][0] == 0 and bands[-1][1] == len(rows)
+        assert all(first[1] == second[0]
+                   for first, second in zip(bands, bands[1:]))
+        assert len(bands) == 4 and max(sizes) < 2 * len(rows) / 4
+        # Each band is a contiguous range of rows, in order.
+        grouped = rows[order]
+        for (start, stop), (next_start, _) in zip(bands, bands[1:]):
+            assert grouped[start:stop].max() < grouped[next_start]
+
+        # Plants all in one row cannot be split.
+        order, bands = store._get_bands(np.full(100, 7, np.int32))
+        assert bands == [(0, 100)]
+    finally:
+        store.close()
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from constants import *
+from sprites import (collect_sprites, load_sprites, preload_sprites,
+                     sprite_names)
+
+
+def test_sprite_names_cover_tiles_players_and_plant_stages():
+    names = sprite_names()
+
+    assert 'images/grass.png' in names
+    assert 'images/player_w.png' in names
+    assert 'images/plants/potato/stage_1.png' in names
+    assert 'images/plants/berry/stage_5.png' in names
+    assert len(names) == len(set(names))
+
+
+def test_load_sprites_resizes_and_skips_missing_files(tmp_path):
+    path = str(tmp_path / 'grass.png')
+    Image.new('RGB', (40, 40), 'green').save(path)
+
+    sprites = load_sprites([path, str(tmp_path / 'missing.png')], (10, 12))
+
+    assert list(sprites) == [path]
+    assert sprites[path].size == (10, 12)
+
+
+def test_preloaded_sprites_are_collected(tmp_path):
+    paths = []
+    for index in range(5):
+        paths.append(str(tmp_path / f'sprite_{index}.png'))
+        Image.new('RGB', (20, 20), 'red').save(paths[-1])
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = preload_sprites(executor, paths, (8, 8))
+        sprites, seconds = collect_sprites(futures)
+
+    assert sorted(sprites) == sorted(paths)
+    assert all(sprite.size == (8, 8) for sprite in sprites.values())
+    assert seconds > 0
@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import tracing
+from tracing import Tracer, traced
+
+
+def test_calls_are_exported_as_begin_and_end_events():
+    tracer = Tracer()
+    add = tracer.wrap(lambda a, b: a + b, 'add')
+
+    assert add(2, 3) == 5
+    assert add.__name__ == '<lambda>'
+    (name, begin, end, thread), = tracer.get_calls()
+    assert name == 'add' and begin <= end
+
+    events = tracer.to_chrome()['traceEvents']
+    assert [(event['name'], event['ph']) for event in events] == [
+        ('add', 'B'), ('add', 'E')]
+    assert events[0]['pid'] == os.getpid()
+    assert events[0]['ts'] <= events[1]['ts']
+
+
+def test_calls_that_raise_are_recorded():
+    tracer = Tracer()
+
+    def fail():
+        raise ValueError
+
+    try:
+        tracer.wrap(fail, 'fail')()
+    except ValueError:
+        pass
+    assert [call[0] for call in tracer.get_calls()] == ['fail']
+
+
+def test_ring_buffer_keeps_the_most_recent_calls():
+    tracer = Tracer(capacity=3)
+    functions = [tracer.wrap(lambda: None, f'call {index}')
+                 for index in range(5)]
+    for function in functions:
+        function()
+
+    assert [call[0] for call in tracer.get_calls()] == [
+        'call 2', 'call 3', 'call 4']
+    tracer.clear()
+    assert tracer.get_calls() == []
+
+
+def test_traced_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACER', None)
+
+    def function():
+        pass
+
+    assert traced('function')(function) is function
+
+
+def test_trace_written_at_exit(tmp_path):
+    path = tmp_path / 'trace.json'
+    game_directory = os.path.dirname(os.path.abspath(tracing.__file__))
+    script = ('from model import *\n'
+              "model = FarmModel(['SS', 'SS'])\n"
+              "model.move_player('d')\n"
+              'model.new_day()\n')
+
+    subprocess.run([sys.executable, '-c', script], cwd=game_directory,
+                   env={**os.environ, 'GAME_TRACE': str(path)}, check=True)
+
+    events = json.loads(path.read_text())['traceEvents']
+    assert [(event['name'], event['ph']) for event in events] == [
+        ('FarmModel.move_player', 'B'), ('FarmModel.move_player', 'E'),
+        ('FarmModel.new_day', 'B'), ('FarmModel.new_day', 'E')]
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_worker_processes_write_their_own_traces(tmp_path, method):
+    path = tmp_path / 'trace.json'
+    script = tmp_path / 'workers.py'
+    script.write_text(
+        'import multiprocessing\n'
+        'from concurrent.futures import ProcessPoolExecutor\n'
+        'from model import FarmModel\n'
+        'def day(_):\n'
+        "    FarmModel(['SS', 'SS']).new_day()\n"
+        "if __name__ == '__main__':\n"
+        f"    context = multiprocessing.get_context('{method}')\n"
+        '    day(0)\n'
+        '    with ProcessPoolExecutor(2, mp_context=context) as executor:\n'
+        '        list(executor.map(day, range(6)))\n')
+    game_directory = os.path.dirname(os.path.abspath(tracing.__file__))
+
+    subprocess.run([sys.executable, str(script)], cwd=game_directory,
+                   env={**os.environ, 'GAME_TRACE': str(path),
+                        'PYTHONPATH': game_directory}, check=True)
+
+    days = {}
+    for trace in tmp_path.glob('trace*.json'):
+        events = json.loads(trace.read_text())['traceEvents']
+        days[trace.name] = sum(event['name'] == 'FarmModel.new_day'
+                               and event['ph'] == 'B' for event in events)
+    assert days.pop('trace.json') == 1
+    assert 1 <= len(days) <= 2 and sum(days.values()) == 6
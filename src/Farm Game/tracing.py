@@ -0,0 +1,145 @@
+import atexit
+import functools
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+# Tracing is enabled by setting GAME_TRACE to the path the trace is written
+# to when the program exits, in the Chrome trace event format (open it in
+# chrome://tracing or https://ui.perfetto.dev). GAME_TRACE_CALLS sets the
+# number of most recent calls kept. Processes started with multiprocessing,
+# including the workers of a ProcessPoolExecutor, write their own traces when
+# they exit (see trace_path).
+TRACE_ENV = 'GAME_TRACE'
+TRACE_CALLS_ENV = 'GAME_TRACE_CALLS'
+TRACE_CALLS = 100_000
+
+
+class Tracer:
+    """ A ring buffer of the most recent calls of traced functions. Each call
+        is stored as one (name, begin, end, thread) tuple appended to a
+        bounded deque, which is safe to share between threads, and exported
+        as a pair of begin and end events.
+    """
+
+    def __init__(self, capacity: int = TRACE_CALLS) -> None:
+        """ Constructor for a tracer with no events.
+
+        Parameters:
+            capacity: The number of most recent calls kept.
+        """
+        self._calls = deque(maxlen=capacity)
+        self._start = time.perf_counter_ns()
+
+    def wrap(self, function: Callable, name: str) -> Callable:
+        """ Returns the function wrapped to record every call. """
+        record = self._calls.append
+        clock = time.perf_counter_ns
+        thread = threading.get_ident
+
+        @functools.wraps(function)
+        def traced_function(*args, **kwargs):
+            begin = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record((name, begin, clock(), thread()))
+
+        return traced_function
+
+    def get_calls(self) -> list[tuple[str, int, int, int]]:
+        """ Returns the recorded (name, begin, end, thread) calls, with times
+            in ns, in the order they ended.
+        """
+        return list(self._calls)
+
+    def clear(self) -> None:
+        """ Discards every recorded call. """
+        self._calls.clear()
+
+    def to_chrome(self) -> dict:
+        """ Returns the recorded calls as begin and end events in the Chrome
+            trace event format, with times in microseconds since the tracer
+            was created.
+        """
+        pid = os.getpid()
+        events = []
+        for name, begin, end, tid in self._calls:
+            for phase, ns in (('B', begin), ('E', end)):
+                events.append({'name': name, 'ph': phase, 'pid': pid,
+                               'tid': tid, 'ts': (ns - self._start) / 1000})
+        # Viewers expect each thread's events in time order, with a call's
+        # begin before those of the calls nested in it.
+        events.sort(key=lambda event: (event['ts'], event['ph'] == 'E'))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str) -> None:
+        """ Writes the recorded events to a Chrome trace file. """
+        with open(path, 'w') as file:
+            json.dump(self.to_chrome(), file)
+
+
+def trace_path(path: str) -> str:
+    """ Returns the path a process writes its trace to: the given path for
+        the main process, and the path with the process id added for any
+        process it starts, so they do not overwrite each other.
+    """
+    if multiprocessing.parent_process() is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}.{os.getpid()}{extension}'
+
+
+def _create_tracer() -> Optional[Tracer]:
+    """ Returns a tracer if tracing is enabled. """
+    path = os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    return Tracer(int(os.environ.get(TRACE_CALLS_ENV, TRACE_CALLS)))
+
+# The tracer of this process, or None if tracing is disabled
+TRACER = _create_tracer()
+
+
+def export() -> None:
+    """ Writes this process's trace to its trace_path, if tracing is enabled.
+        This happens when the program exits, or when a process started with
+        multiprocessing finishes, but a process may also call it sooner.
+    """
+    if TRACER is not None:
+        TRACER.export(trace_path(os.environ[TRACE_ENV]))
+
+
+def _trace_child(tracer: Tracer) -> None:
+    """ Sets up tracing in a process started with multiprocessing, which
+        does not run exit handlers: its trace is exported by multiprocessing
+        when it finishes. A forked process drops the calls it inherited.
+    """
+    tracer.clear()
+    multiprocessing.util.Finalize(tracer, export, exitpriority=0)
+
+atexit.register(export)
+if TRACER is not None:
+    if multiprocessing.parent_process() is not None:
+        # Imported by a child process that is already running
+        _trace_child(TRACER)
+    else:
+        # Run in children forked from this process, or in a spawned child
+        # that imports this module before it starts running
+        multiprocessing.util.register_after_fork(TRACER, _trace_child)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """ Returns a decorator that traces a function under the given name if
+        tracing is enabled, and otherwise leaves it unchanged.
+    """
+    def decorate(function: Callable) -> Callable:
+        if TRACER is None:
+            return function
+        return TRACER.wrap(function, name)
+    return decorate
@@ -0,0 +1,53 @@
+import random
+import numpy as np
+from constants import *
+
+class Weather:
+    """ A seeded timeline of seasons and weather. The same seed always gives
+        the same weather on the same day, so headless runs are reproducible.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        """ Constructor for the weather timeline.
+
+        Parameters:
+            seed: The seed used to generate the weather.
+        """
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._timeline = []
+        self._tables = {}
+
+    def get_seed(self) -> int:
+        """ Returns the seed used to generate this timeline. """
+        return self._seed
+
+    def get_season(self, day: int) -> str:
+        """ Returns the season on the given day (the first day is day 1). """
+        return SEASONS[(day - 1) // SEASON_LENGTH % len(SEASONS)]
+
+    def get_weather(self, day: int) -> str:
+        """ Returns the weather on the given day (the first day is day 1). """
+        # Days are generated in order so each day only depends on the seed
+        while len(self._timeline) < day:
+            chances = WEATHER_CHANCES[self.get_season(len(self._timeline) + 1)]
+            self._timeline.extend(self._rng.choices(
+                list(chances.keys()), weights=list(chances.values())))
+        return self._timeline[day - 1]
+
+    def get_tables(self, day: int) -> tuple[np.ndarray, np.ndarray]:
+        """ Returns lookup tables of the growth speed and yield multipliers on
+            the given day, indexed by tile character code. Indexing a table with
+            an array of tiles gives the effect on each tile at once.
+        """
+        key = (self.get_season(day), self.get_weather(day))
+        if key not in self._tables:
+            season, weather = key
+            growth = np.full(256, SEASON_GROWTH[season], dtype=np.float32)
+            yields = np.ones(256, dtype=np.float32)
+            for tile, multiplier in WEATHER_GROWTH[weather].items():
+                growth[ord(tile)] *= multiplier
+            for tile, multiplier in WEATHER_YIELD[weather].items():
+                yields[ord(tile)] = multiplier
+            self._tables[key] = (growth, yields)
+        return self._tables[key]